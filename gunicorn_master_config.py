@@ -1,3 +1,8 @@
 bind = "0.0.0.0:5001"
-workers = 3
+# The worker registry is held in memory, so the master runs as one process
+# and serves concurrent requests from a thread pool.
+wsgi_app = "devops_bot.master:create_app()"
+workers = 1
+worker_class = "gthread"
+threads = 64
 timeout = 120
@@ -0,0 +1,86 @@
+"""Cold-start benchmark for the devops-bot CLI.
+
+Runs ``devops-bot --help`` in fresh interpreters and records how long it takes
+to import the CLI and render the help text.  The run fails when the median
+exceeds STARTUP_BUDGET_MS or when any of the cloud SDKs gets imported, since
+those belong to the lazily loaded command groups.
+
+    python benchmarks/startup.py [--runs 10] [--budget-ms 150]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STARTUP_BUDGET_MS = 150
+
+HEAVY_MODULES = (
+    'boto3', 'botocore', 'kubernetes', 'paramiko', 'flask',
+    'cryptography', 'tabulate', 'yaml', 'requests',
+)
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'devops-bot')
+
+# Executed in a fresh interpreter.  Falls back to loading the package from the
+# source tree, where the directory name is not importable as devops_bot.
+PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+try:
+    import devops_bot
+except ImportError:
+    spec = importlib.util.spec_from_file_location(
+        'devops_bot', {package_dir!r} + '/__init__.py', submodule_search_locations=[{package_dir!r}])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['devops_bot'] = module
+    spec.loader.exec_module(module)
+from devops_bot.cli import cli
+try:
+    cli.main(['--help'], prog_name='devops-bot', standalone_mode=False)
+except SystemExit:
+    pass
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+sys.stderr.write(json.dumps({{'elapsed_ms': elapsed_ms, 'heavy_modules': heavy}}) + '\\n')
+"""
+
+
+def run_once():
+    probe = PROBE.format(package_dir=PACKAGE_DIR, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-c', probe], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    timings = [sample['elapsed_ms'] for sample in samples]
+    heavy = sorted({name for sample in samples for name in sample['heavy_modules']})
+    report = {
+        'runs': args.runs,
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'budget_ms': args.budget_ms,
+        'heavy_modules': heavy,
+    }
+    print(json.dumps(report))
+
+    if heavy:
+        print(f"FAIL: --help imported {', '.join(heavy)}", file=sys.stderr)
+        return 1
+    if report['median_ms'] > args.budget_ms:
+        print(f"FAIL: median startup {report['median_ms']}ms exceeds budget {args.budget_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
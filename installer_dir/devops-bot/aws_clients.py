@@ -0,0 +1,100 @@
+"""Process-wide registry of boto3 sessions and clients.
+
+Building a boto3 client resolves endpoints, loads service models and sets up
+credentials, which is far more expensive than the API call most commands make
+with it.  Clients are thread-safe once built, so every command path shares one
+client per (service, region, credential set) for the life of the process.
+"""
+import hashlib
+import threading
+
+MAX_POOL_CONNECTIONS = 50
+
+
+def _credential_key(credentials):
+    """Fingerprint a credential set without keeping the secret in the key."""
+    if not credentials:
+        return None
+    material = "\0".join(
+        credentials.get(name) or ''
+        for name in ('aws_access_key_id', 'aws_secret_access_key', 'aws_session_token')
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ClientRegistry:
+    """Lazily built, thread-safe cache of boto3 sessions and clients."""
+
+    def __init__(self, max_pool_connections=MAX_POOL_CONNECTIONS):
+        self.max_pool_connections = max_pool_connections
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._clients = {}
+
+    def _session(self, credentials, region_name):
+        # boto3 sessions are not thread-safe, callers must hold self._lock.
+        import boto3
+
+        key = (_credential_key(credentials), region_name)
+        session = self._sessions.get(key)
+        if session is None:
+            kwargs = {}
+            if credentials:
+                kwargs = {
+                    'aws_access_key_id': credentials.get('aws_access_key_id'),
+                    'aws_secret_access_key': credentials.get('aws_secret_access_key'),
+                    'aws_session_token': credentials.get('aws_session_token'),
+                }
+            session = boto3.session.Session(region_name=region_name, **kwargs)
+            self._sessions[key] = session
+        return session
+
+    def get_session(self, credentials=None, region_name=None):
+        """Return the shared session for a credential set and region."""
+        region_name = region_name or (credentials or {}).get('region_name')
+        with self._lock:
+            return self._session(credentials, region_name)
+
+    def get_client(self, service, credentials=None, region_name=None):
+        """Return the shared client for a service, region and credential set.
+
+        ``region_name`` overrides the region stored with the credentials.
+        """
+        region_name = region_name or (credentials or {}).get('region_name')
+        key = (service, region_name, _credential_key(credentials))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                from botocore.config import Config
+
+                session = self._session(credentials, region_name)
+                client = session.client(
+                    service,
+                    config=Config(max_pool_connections=self.max_pool_connections)
+                )
+                self._clients[key] = client
+        return client
+
+    def clear(self):
+        """Drop every cached session and client."""
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+
+
+_registry = ClientRegistry()
+
+
+def get_session(credentials=None, region_name=None):
+    return _registry.get_session(credentials, region_name)
+
+
+def get_client(service, credentials=None, region_name=None):
+    return _registry.get_client(service, credentials, region_name)
+
+
+def clear_clients():
+    _registry.clear()
@@ -0,0 +1,61 @@
+import time
+
+import click
+
+from ..common import API_BASE_URL
+from ..http_client import http_post
+from ..token_cache import (
+    get_valid_token, load_token_record, new_token_record, save_token_record, token_status, verify_token_remote
+)
+
+group = click.Group(name="auth", help="DevOps Bot account commands.")
+
+def format_expiry(record):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['expires_at']))
+
+@group.command(help="Login to the DevOps Bot.")
+@click.option('--force', is_flag=True, help="Log in again even if the saved token is still valid.")
+def login(force):
+    record = load_token_record()
+    status = token_status(record)
+    if not force and status in ('valid', 'expiring') and get_valid_token():
+        click.echo(f"Already logged in as {record['username']}; token valid until {format_expiry(record)}.")
+        if status == 'expiring':
+            click.echo("Token is close to expiry; re-verifying it in the background.")
+        return
+    username = click.prompt('Enter your username')
+    password = click.prompt('Enter your password', hide_input=True)
+    response = http_post(f"{API_BASE_URL}/api/login", headers={'Content-Type': 'application/json'}, json={"username": username, "password": password})
+    if response.status_code == 200:
+        body = response.json()
+        token = body.get('token')
+        if token:
+            record = new_token_record(username, token, body)
+            save_token(record)
+            click.echo(f"Login successful! Your token is: {token}")
+            verify_token(record)
+        else:
+            click.echo("Failed to retrieve token.")
+    else:
+        click.echo("Invalid username or password")
+
+@group.command(name="token-status", help="Show the saved login token's status.")
+def token_status_command():
+    record = load_token_record()
+    status = token_status(record)
+    if status == 'missing':
+        click.echo("Not logged in.")
+        return
+    click.echo(f"User: {record['username'] or 'unknown'}")
+    click.echo(f"Status: {status}")
+    click.echo(f"Expires: {format_expiry(record)}")
+
+def verify_token(record):
+    if verify_token_remote(record):
+        click.echo(f"Token verified successfully for {record['username']}.")
+    else:
+        click.echo("Token verification failed.")
+
+def save_token(record):
+    save_token_record(record)
+    click.echo("Token saved locally.")
@@ -0,0 +1,89 @@
+import json
+import os
+
+import click
+import yaml
+from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+
+from ..aws_clients import get_client
+from ..common import (
+    AWS_CREDENTIALS_FILE, DOB_SCREENPLAY_FILE, KEY_FILE, encrypt_data,
+    ensure_user_folder, generate_key, load_aws_credentials, load_key
+)
+from .s3 import create_s3_bucket
+
+group = click.Group(name="aws", help="AWS credential commands.")
+
+# Save AWS credentials encrypted
+def save_aws_credentials(access_key, secret_key, region):
+    ensure_user_folder()
+    key = load_key()
+    credentials = {
+        'aws_access_key_id': access_key,
+        'aws_secret_access_key': secret_key,
+        'region_name': region
+    }
+    encrypted_credentials = encrypt_data(json.dumps(credentials), key)
+    with open(AWS_CREDENTIALS_FILE, 'wb') as cred_file:
+        cred_file.write(encrypted_credentials)
+    os.chmod(AWS_CREDENTIALS_FILE, 0o600)
+    click.echo("AWS credentials encrypted and saved locally.")
+
+# Upload encrypted credentials to S3
+def upload_encrypted_credentials_to_s3(bucket_name):
+    try:
+        key = load_key()
+        with open(AWS_CREDENTIALS_FILE, 'rb') as cred_file:
+            encrypted_credentials = cred_file.read()
+            click.echo("Encrypted credentials loaded for upload.")
+
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials)
+        s3.put_object(Bucket=bucket_name, Key='aws_credentials.enc', Body=encrypted_credentials)
+        click.echo(f"Encrypted credentials uploaded to bucket {bucket_name} successfully.")
+    except (NoCredentialsError, PartialCredentialsError) as e:
+        click.echo(f"Error with AWS credentials: {e}")
+    except ClientError as e:
+        click.echo(f"Error uploading encrypted credentials to bucket: {e}")
+
+# Save the dob-screenplay content to a file
+def save_dob_screenplay(dob_screenplay_content):
+    with open(DOB_SCREENPLAY_FILE, 'w') as f:
+        yaml.dump(dob_screenplay_content, f)
+    click.echo("dob-screenplay content saved locally.")
+
+@group.command(name="configure-aws", help="Configure AWS credentials.")
+@click.option('--aws_access_key_id', required=True, help="AWS Access Key ID")
+@click.option('--aws_secret_access_key', required=True, help="AWS Secret Access Key")
+@click.option('--region', required=True, help="AWS Region")
+def configure_aws(aws_access_key_id, aws_secret_access_key, region):
+    if not os.path.exists(KEY_FILE):
+        generate_key()
+
+    save_aws_credentials(aws_access_key_id, aws_secret_access_key, region)
+    click.echo("AWS credentials configured and saved locally successfully.")
+
+    if click.confirm("Do you want to save these credentials in a cloud storage like S3?", default=True):
+        num_buckets = click.prompt("How many storage buckets do you require?", type=int)
+        bucket_names = [click.prompt(f"Enter name for bucket {i+1}") for i in range(num_buckets)]
+
+        dob_screenplay_content = {
+            'version': '1.0',
+            'resources': {
+                's3_buckets': [
+                    {'name': bucket_name, 'region': region} for bucket_name in bucket_names
+                ]
+            }
+        }
+
+        save_dob_screenplay(dob_screenplay_content)
+
+        click.echo(yaml.dump(dob_screenplay_content))
+        if click.confirm("Do you want to proceed with creating the above buckets?", default=True):
+            for bucket in dob_screenplay_content['resources']['s3_buckets']:
+                create_s3_bucket(bucket['name'], bucket['region'])
+                upload_encrypted_credentials_to_s3(bucket['name'])
+
+            click.echo("All buckets created successfully and encrypted credentials uploaded.")
+        else:
+            click.echo("Bucket creation aborted.")
@@ -0,0 +1,702 @@
+import json
+import uuid
+from collections import Counter
+
+import click
+import yaml
+from botocore.exceptions import ClientError
+from tabulate import tabulate
+
+from ..aws_clients import get_client
+from ..common import VERSION_BUCKET_NAME, load_aws_credentials
+from ..inventory import INVENTORY_TTL, Inventory
+from ..launch import SharedLaunch, launch_instances, launch_spec, spec_key
+from ..output import OUTPUT_FORMATS, write_rows
+from ..plan import STATE_TTL, PlanEntry, ScreenplayState, plan_buckets, print_plan, spec_hash
+from ..regions import REGION_COLUMN, RegionFanOut, resolve_regions
+from ..screenplay import SCREENPLAY_WORKERS, ScreenplayExecutor, ScreenplayTask
+from ..versions import (
+    check_bucket_exists, create_version_bucket, list_versions, load_version_info, load_version_infos,
+    save_version_info_locally, save_version_info_to_bucket
+)
+from ..waiter import get_instance_waiter
+
+group = click.Group(name="ec2", help="EC2 instance, version and screenplay commands.")
+
+# Delete instance
+@group.command(name="delete-ec2", help="Delete EC2 instances using instance IDs or a version ID.")
+@click.argument('ids', nargs=-1)
+@click.option('--version-id', help="Version ID to delete instances from")
+@click.option('--cached', is_flag=True, help="Skip instances the local inventory already shows as terminated")
+def delete_ec2(ids, version_id, cached):
+    instance_ids = list(ids)
+
+    if version_id:
+        version_info = load_version_info(version_id)
+        if not version_info:
+            click.echo("No version information found.")
+            return
+        instance_ids.extend(instance['InstanceId'] for instance in version_info['content'])
+
+    inventory = None
+    if cached and instance_ids:
+        inventory, region = load_inventory(load_aws_credentials())
+        gone = {instance['InstanceId'] for instance in inventory.query(region, instance_ids, states=('shutting-down', 'terminated'))}
+        if gone:
+            click.echo(click.style(f"Skipping {len(gone)} instance(s) already terminated: {', '.join(sorted(gone))}", fg="yellow"))
+            instance_ids = [instance_id for instance_id in instance_ids if instance_id not in gone]
+
+    if not instance_ids:
+        click.echo("No instance IDs provided.")
+        return
+
+    table_data = [
+        [click.style("-", fg="red"), "Instance ID", instance_id] for instance_id in instance_ids
+    ]
+    click.echo(click.style("\nStaging area: Deleting EC2 instance(s) with IDs:", fg="red"))
+    click.echo(tabulate(table_data, headers=["", "Attribute", "Value"], tablefmt="grid"))
+
+    if click.confirm(click.style("Do you want to proceed with deleting the instance(s)?", fg="red"), default=False):
+        comment = click.prompt(click.style("Enter a comment for this version", fg="red"))
+        version_id = str(uuid.uuid4())  # Generate a unique version ID
+
+        try:
+            terminated_instances = delete_ec2_instances(instance_ids)
+            if terminated_instances is None:
+                raise Exception("Instance deletion failed. Aborting operation.")
+
+            click.echo(click.style("Instances deleted successfully.", fg="green"))
+            if inventory:
+                inventory.set_state([instance['InstanceId'] for instance in terminated_instances], 'shutting-down')
+            for idx, instance in enumerate(terminated_instances):
+                click.echo(click.style(f"Instance {idx+1}: ID = {instance['InstanceId']} - {instance['CurrentState']['Name']}", fg="green"))
+
+            version_content = [{'InstanceId': instance['InstanceId'], 'CurrentState': instance['CurrentState']} for instance in terminated_instances]
+
+            if check_bucket_exists(VERSION_BUCKET_NAME):
+                save_version_info_to_bucket(version_id, comment, version_content)
+            else:
+                if click.confirm("Do you want to save the version information in a bucket?", default=False):
+                    create_version_bucket()
+                    save_version_info_to_bucket(version_id, comment, version_content)
+                else:
+                    save_version_info_locally(version_id, comment, version_content)
+        except Exception as e:
+            click.echo(click.style(f"Failed to delete instances: {e}", fg="red"))
+    else:
+        click.echo(click.style("Instance deletion aborted.", fg="yellow"))
+
+# Utility function for deleting EC2 instances
+def delete_ec2_instances(instance_ids):
+    credentials = load_aws_credentials()
+    if not credentials:
+        click.echo("No AWS credentials found. Please configure them first.")
+        return None
+
+    ec2 = get_client('ec2', credentials)
+    try:
+        response = ec2.terminate_instances(InstanceIds=instance_ids)
+        return response['TerminatingInstances']
+    except ClientError as e:
+        click.echo(click.style(f"Failed to delete instances: {e}", fg="red"))
+        return None
+
+def create_ec2_instances(instance_type, ami_id, key_name, security_group, count, tags, user_data=None):
+    credentials = load_aws_credentials()
+    if not credentials:
+        click.echo("No AWS credentials found. Please configure them first.")
+        return None
+
+    ec2 = get_client('ec2', credentials)
+    try:
+        spec = launch_spec(instance_type, ami_id, key_name, [security_group], tags, user_data)
+        return launch_instances(ec2, [(spec, count)])[0]
+    except Exception as e:
+        click.echo(click.style(f"Failed to create instances: {e}", fg="red"))
+        return None
+
+LIVE_STATES = ('pending', 'running', 'stopping', 'stopped')
+PLAN_FILTER_BATCH = 200  # values per describe_instances filter
+
+EC2_COLUMNS = ["State", "Instance ID", "Instance Type", "Key Name", "Security Groups", "Launch Time", "Tags", "Public IP"]
+
+EC2_STATE_SYMBOLS = {
+    'running': click.style('+', fg='green'),
+    'stopped': click.style('-', fg='red'),
+    'terminated': click.style('x', fg='yellow')
+}
+
+def build_instance_filters(states=(), tags=(), instance_types=()):
+    """Build server-side describe_instances filters.
+
+    Tags are given as KEY=VALUE, or just KEY to match any value.
+    """
+    filters = []
+    if states:
+        filters.append({'Name': 'instance-state-name', 'Values': list(states)})
+    if instance_types:
+        filters.append({'Name': 'instance-type', 'Values': list(instance_types)})
+    for tag in tags:
+        key, _, value = tag.partition('=')
+        if value:
+            filters.append({'Name': f'tag:{key}', 'Values': [value]})
+        else:
+            filters.append({'Name': 'tag-key', 'Values': [key]})
+    return filters
+
+def iter_ec2_instances(ec2, instance_ids=None, filters=None, page_size=None):
+    """Yield instances one at a time from a describe_instances paginator."""
+    kwargs = {}
+    if instance_ids:
+        kwargs['InstanceIds'] = list(instance_ids)
+    if filters:
+        kwargs['Filters'] = filters
+    if page_size and not instance_ids:
+        # MaxResults cannot be combined with InstanceIds.
+        kwargs['PaginationConfig'] = {'PageSize': page_size}
+    paginator = ec2.get_paginator('describe_instances')
+    for page in paginator.paginate(**kwargs):
+        for reservation in page['Reservations']:
+            yield from reservation['Instances']
+
+def instance_row(instance):
+    return {
+        "State": instance['State']['Name'],
+        "Instance ID": instance['InstanceId'],
+        "Instance Type": instance['InstanceType'],
+        "Key Name": instance.get('KeyName', '-'),
+        "Security Groups": ', '.join([sg['GroupId'] for sg in instance.get('SecurityGroups', [])]),
+        "Launch Time": instance['LaunchTime'].strftime('%Y-%m-%d %H:%M:%S'),
+        "Tags": ', '.join([f"{tag['Key']}={tag['Value']}" for tag in instance.get('Tags', [])]),
+        "Public IP": instance.get('PublicIpAddress', 'N/A')
+    }
+
+def styled_instance_row(row):
+    return dict(row, State=EC2_STATE_SYMBOLS.get(row['State'], row['State']))
+
+def load_inventory(credentials, region=None, refresh=False, ttl=INVENTORY_TTL):
+    """Return the local inventory and region, refreshing the region if stale."""
+    region = region or credentials.get('region_name')
+    inventory = Inventory()
+    if refresh or not inventory.is_fresh(region, ttl):
+        ec2 = get_client('ec2', credentials, region_name=region)
+        inventory.replace_region(region, iter_ec2_instances(ec2))
+    return inventory, region
+
+
+@group.command(name="create-ec2", help="Create EC2 instances with specified options.")
+@click.option('--instance-type', required=True, help="EC2 instance type")
+@click.option('--ami-id', required=True, help="AMI ID")
+@click.option('--key-name', required=True, help="Key pair name")
+@click.option('--security-group', required=True, help="Security group ID")
+@click.option('--count', default=1, help="Number of instances to create")
+@click.option('--tags', multiple=True, type=(str, str), help="Tags for the instance in key=value format", required=False)
+def create_ec2(instance_type, ami_id, key_name, security_group, count, tags):
+    tags_dict = dict(tags)
+    table_data = [
+        [click.style("+", fg="green"), "Instance Type", instance_type],
+        [click.style("+", fg="green"), "AMI ID", ami_id],
+        [click.style("+", fg="green"), "Key Name", key_name],
+        [click.style("+", fg="green"), "Security Group", security_group],
+        [click.style("+", fg="green"), "Count", count],
+        [click.style("+", fg="green"), "Tags", tags_dict]
+    ]
+    click.echo(click.style("\nStaging area: Creating EC2 instance(s) with the following configuration:\n", fg="green"))
+    click.echo(tabulate(table_data, headers=["", "Attribute", "Value"], tablefmt="grid"))
+
+    if click.confirm(click.style("Do you want to proceed with creating the instance(s)?", fg="green"), default=True):
+        version_id = str(uuid.uuid4())  # Generate a unique version ID
+        comment = click.prompt(click.style("Enter a comment for this version", fg="green"))
+
+        try:
+            instances = create_ec2_instances(instance_type, ami_id, key_name, security_group, count, tags_dict)
+            if instances is None:
+                raise Exception("Instance creation failed. Aborting operation.")
+
+            click.echo(click.style("Instances created successfully.", fg="green"))
+            for idx, instance in enumerate(instances):
+                click.echo(click.style(f"Instance {idx+1}: ID = {instance['InstanceId']}", fg="green"))
+
+            version_content = [{'InstanceId': instance['InstanceId'], 'InstanceType': instance['InstanceType'], 'ImageId': instance['ImageId'], 'KeyName': instance['KeyName'], 'SecurityGroups': instance['SecurityGroups'], 'Tags': instance.get('Tags', [])} for instance in instances]
+
+            if check_bucket_exists(VERSION_BUCKET_NAME):
+                save_version_info_to_bucket(version_id, comment, version_content)
+            else:
+                if click.confirm("Do you want to save the version information in a bucket?", default=False):
+                    create_version_bucket()
+                    save_version_info_to_bucket(version_id, comment, version_content)
+                else:
+                    save_version_info_locally(version_id, comment, version_content)
+        except Exception as e:
+            click.echo(click.style(f"Failed to create instances: {e}", fg="red"))
+    else:
+        click.echo(click.style("Instance creation aborted.", fg="yellow"))
+
+@group.command(name="recreate-ec2", help="Recreate EC2 instances using a version ID.")
+@click.option('--version-id', required=True, help="Version ID to recreate instances from")
+def recreate_ec2(version_id):
+    version_info = load_version_info(version_id)
+    if not version_info:
+        click.echo("No version information found.")
+        return
+
+    instances_to_recreate = version_info['content']
+
+    click.echo(click.style(f"\nStaging area: Recreating EC2 instance(s):", fg="green"))
+    table_data = []
+    for idx, instance in enumerate(instances_to_recreate):
+        table_data.append([click.style("+", fg="green"), "Instance Type", instance.get('InstanceType', 'Unknown')])
+        table_data.append([click.style("+", fg="green"), "AMI ID", instance.get('ImageId', 'Unknown')])
+        table_data.append([click.style("+", fg="green"), "Key Name", instance.get('KeyName', 'Unknown')])
+        security_groups = instance.get('SecurityGroups', [])
+        security_group_ids = [sg['GroupId'] for sg in security_groups] if security_groups else None
+        table_data.append([click.style("+", fg="green"), "Security Group", security_group_ids if security_group_ids else 'None'])
+        table_data.append([click.style("+", fg="green"), "Tags", instance.get('Tags', [])])
+    click.echo(tabulate(table_data, headers=["", "Attribute", "Value"], tablefmt="grid"))
+
+    if click.confirm(click.style("Do you want to proceed with recreating the instance(s)?", fg="green"), default=True):
+        new_version_id = str(uuid.uuid4())
+        comment = click.prompt(click.style("Enter a new comment for this version", fg="green"))
+
+        try:
+            ec2 = get_client('ec2', load_aws_credentials())
+            requests = []
+            for instance in instances_to_recreate:
+                spec = launch_spec(
+                    instance_type=instance.get('InstanceType', 'Unknown'),
+                    ami_id=instance.get('ImageId', 'Unknown'),
+                    key_name=instance.get('KeyName'),
+                    security_group_ids=[sg['GroupId'] for sg in instance.get('SecurityGroups', [])],
+                    # Tags under the aws: prefix are reserved and cannot be set on launch.
+                    tags={tag['Key']: tag['Value'] for tag in instance.get('Tags', []) if not tag['Key'].startswith('aws:')}
+                )
+                requests.append((spec, 1))
+            # Identical items are launched together, so a large version takes a few calls.
+            recreated_instances = [created for instances in launch_instances(ec2, requests) for created in instances]
+
+            click.echo(click.style("Instances recreated successfully.", fg="green"))
+            for idx, instance in enumerate(recreated_instances):
+                click.echo(click.style(f"Instance {idx+1}: ID = {instance['InstanceId']}", fg="green"))
+
+            if check_bucket_exists(VERSION_BUCKET_NAME):
+                save_version_info_to_bucket(new_version_id, comment, recreated_instances)
+            else:
+                if click.confirm("Do you want to save the version information in a bucket?", default=False):
+                    create_version_bucket()
+                    save_version_info_to_bucket(new_version_id, comment, recreated_instances)
+                else:
+                    save_version_info_locally(new_version_id, comment, recreated_instances)
+        except Exception as e:
+            click.echo(click.style(f"Failed to recreate instances: {e}", fg="red"))
+    else:
+        click.echo(click.style("Instance recreation aborted.", fg="yellow"))
+
+@group.command(name="view-version", help="View version information.")
+@click.option('-o', '--output', type=click.Choice(['table', 'wide']), default='table', help="Output format")
+@click.option('--limit', type=click.IntRange(1), default=None, help="Show only the newest N versions")
+@click.option('--since', default=None, help="Only versions saved on or after this UTC date or time, e.g. 2024-07-25")
+@click.option('--rebuild-index', is_flag=True, help="Rebuild the version bucket manifest from the version objects now instead of trusting it (it is checked hourly)")
+def view_version(output, limit, since, rebuild_index):
+    versions = list_versions(limit, since, rebuild_index)
+    if output == 'table':
+        table = [[version_id, comment, timestamp, count] for version_id, comment, timestamp, count, _ in versions]
+        headers = ["Version ID", "Comment", "Date", "Count"]
+        click.echo(tabulate(table, headers, tablefmt="grid"))
+    elif output == 'wide':
+        payloads = load_version_infos([(version[0], version[4]) for version in versions])
+        for (version_id, comment, timestamp, count, _), version_info in zip(versions, payloads):
+            if not version_info:
+                continue
+            click.echo(click.style(f"Version ID: {version_id}", fg="green"))
+            click.echo(click.style(f"Comment: {comment}", fg="green"))
+            click.echo(click.style(f"Timestamp: {timestamp}", fg="green"))
+            click.echo(click.style(f"Count: {count}", fg="green"))
+            click.echo(click.style(json.dumps(version_info['content'], indent=2), fg="green"))
+            click.echo("-" * 80)
+
+# List EC2 instances command
+@group.command(name="list-ec2", help="List EC2 instances in a table format.")
+@click.option('--instance-ids', multiple=True, help="Filter by instance IDs")
+@click.option('--state', 'states', multiple=True, help="Filter by instance state, e.g. running")
+@click.option('--tag', 'tags', multiple=True, help="Filter by tag in KEY=VALUE or KEY format")
+@click.option('--instance-type', 'instance_types', multiple=True, help="Filter by instance type")
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='table', help="Output format; jsonl and csv stream rows as pages arrive")
+@click.option('--page-size', default=None, type=click.IntRange(5, 1000), help="Instances requested per API page")
+@click.option('--regions', default=None, help="Regions to query concurrently: 'all' or a comma-separated list")
+@click.option('--cached', is_flag=True, help=f"Answer from the local inventory, refreshing regions older than {INVENTORY_TTL}s")
+@click.option('--refresh', is_flag=True, help="Refresh the local inventory from the API before listing")
+def list_ec2_instances(instance_ids, states, tags, instance_types, output, page_size, regions, cached, refresh):
+    credentials = load_aws_credentials()
+    filters = build_instance_filters(states, tags, instance_types)
+
+    def fetch(region):
+        if cached or refresh:
+            inventory, region = load_inventory(credentials, region, refresh)
+            instances = inventory.query(region, instance_ids, states, instance_types, tags)
+        else:
+            ec2 = get_client('ec2', credentials, region_name=region)
+            instances = iter_ec2_instances(ec2, instance_ids, filters, page_size)
+        return (instance_row(instance) for instance in instances)
+
+    if regions:
+        try:
+            region_names = resolve_regions(regions, credentials)
+        except ClientError as e:
+            click.echo(click.style(f"Failed to list regions: {e}", fg="red"))
+            return
+        fan_out = RegionFanOut(region_names, fetch)
+        write_rows(fan_out, output, [REGION_COLUMN] + EC2_COLUMNS, table_row=styled_instance_row)
+        fan_out.report()
+        return
+
+    try:
+        write_rows(fetch(None), output, EC2_COLUMNS, table_row=styled_instance_row)
+    except ClientError as e:
+        click.echo(click.style(f"Failed to list instances: {e}", fg="red"))
+
+def fetch_instance_details(instance_ids, credentials):
+    """Wait until every instance is running and return their descriptions in order."""
+    ec2 = get_client('ec2', credentials)
+    return get_instance_waiter(ec2).wait(instance_ids)
+
+def screenplay_user_data(resource):
+    if 'user_data_path' in resource:
+        with open(resource['user_data_path'], 'r') as user_data_file:
+            return user_data_file.read()
+    return resource.get('user_data', '')
+
+def screenplay_instance_names(instances):
+    """Task names for ec2_instances entries, in order.
+
+    A named entry is ``ec2:<name>``.  An unnamed one is keyed by its spec
+    hash, with a counter for identical specs, so inserting or reordering
+    entries never hands an entry another one's record; editing an unnamed
+    entry makes it a new entry.
+    """
+    names, seen = [], Counter()
+    for resource in instances:
+        if 'name' in resource:
+            names.append(f"ec2:{resource['name']}")
+            continue
+        digest = instance_spec_hash(resource)[:12]
+        seen[digest] += 1
+        names.append(f"ec2:{digest}" if seen[digest] == 1 else f"ec2:{digest}-{seen[digest]}")
+    return names
+
+def preview_screenplay_instances(instances):
+    for resource in instances:
+        table_data = [
+            [click.style("+", fg="green"), "Instance Type", resource['instance_type']],
+            [click.style("+", fg="green"), "AMI ID", resource['ami_id']],
+            [click.style("+", fg="green"), "Key Name", resource['key_name']],
+            [click.style("+", fg="green"), "Security Group", resource['security_group']],
+            [click.style("+", fg="green"), "Count", resource.get('count', 1)],
+            [click.style("+", fg="green"), "Tags", resource.get('tags', {})],
+            [click.style("+", fg="green"), "User Data", screenplay_user_data(resource)]
+        ]
+        click.echo(tabulate(table_data, headers=["", "Attribute", "Value"], tablefmt="grid"))
+
+def screenplay_launch_spec(resource):
+    return launch_spec(resource['instance_type'], resource['ami_id'], resource['key_name'],
+                       [resource['security_group']], resource.get('tags'), screenplay_user_data(resource))
+
+def launch_screenplay_instances(ec2, resource, count, shared=None, member=None):
+    """Launch ``count`` instances of one ec2_instances entry and wait until they are running.
+
+    With ``shared`` the instances are this entry's share of a launch
+    coalesced with identical entries.
+    """
+    if shared:
+        launched = shared.take(member)
+    else:
+        launched = launch_instances(ec2, [(screenplay_launch_spec(resource), count)])[0]
+    instance_ids = [instance['InstanceId'] for instance in launched]
+    click.echo(f"Instances created with IDs: {', '.join(instance_ids)}")
+    running_instances = get_instance_waiter(ec2).wait(instance_ids)
+    for instance in running_instances:
+        public_ip = instance.get('PublicIpAddress', 'No public IP')
+        click.echo(f"Instance {instance['InstanceId']} is running with Public IP: {public_ip}")
+    return running_instances
+
+def create_screenplay_bucket(s3, bucket):
+    bucket_name = bucket['name']
+    click.echo(click.style(f"Creating S3 bucket: {bucket_name}", fg="green"))
+    s3.create_bucket(Bucket=bucket_name)
+    click.echo(click.style(f"Bucket {bucket_name} created successfully.", fg="green"))
+
+def attach_ebs_volume(ec2, volume, instance_id):
+    volume_id = volume['volume_id']
+    device = volume['device']
+    click.echo(click.style(f"Attaching EBS volume {volume_id} to instance {instance_id} as {device}", fg="green"))
+    ec2.attach_volume(VolumeId=volume_id, InstanceId=instance_id, Device=device)
+    click.echo(click.style(f"Volume {volume_id} attached to instance {instance_id} as {device}.", fg="green"))
+
+def detach_ebs_volume(ec2, volume):
+    volume_id = volume['volume_id']
+    click.echo(click.style(f"Detaching EBS volume {volume_id}", fg="green"))
+    ec2.detach_volume(VolumeId=volume_id)
+    click.echo(click.style(f"Volume {volume_id} detached successfully.", fg="green"))
+
+def instance_spec_hash(resource):
+    # The count is left out: changing it scales the entry instead of replacing it.
+    spec = {key: value for key, value in resource.items() if key not in ('count', 'user_data_path')}
+    spec['user_data'] = screenplay_user_data(resource)
+    return spec_hash(spec)
+
+def plan_screenplay_instances(ec2, state, instances, refresh=False, ttl=STATE_TTL):
+    """Plan ec2_instances entries against the instances recorded for them.
+
+    Stale records are refreshed with batched describe_instances calls that
+    cover only the recorded IDs; instances that are gone are dropped.
+    """
+    names = screenplay_instance_names(instances)
+    # Entries removed from the screenplay are forgotten, never terminated.
+    for name in [name for name in state.records if name.startswith('ec2:') and name not in names]:
+        instance_ids = state.get(name)['instance_ids']
+        if instance_ids:
+            click.echo(click.style(f"{name} is no longer in the screenplay; its instances are left running: "
+                                   f"{', '.join(instance_ids)}", fg="yellow"))
+        state.remove(name)
+    stale = [name for name in names if state.get(name) and (refresh or not state.is_fresh(name, ttl))]
+    recorded = [instance_id for name in stale for instance_id in state.get(name)['instance_ids']]
+    live = set()
+    for start in range(0, len(recorded), PLAN_FILTER_BATCH):
+        filters = [{'Name': 'instance-id', 'Values': recorded[start:start + PLAN_FILTER_BATCH]}]
+        live.update(instance['InstanceId'] for instance in iter_ec2_instances(ec2, filters=filters)
+                    if instance['State']['Name'] in LIVE_STATES)
+    for name in stale:
+        record = state.get(name)
+        state.put(name, dict(record, instance_ids=[instance_id for instance_id in record['instance_ids'] if instance_id in live]))
+
+    entries = {}
+    for name, resource in zip(names, instances):
+        count = resource.get('count', 1)
+        record = state.get(name)
+        instance_ids = record['instance_ids'] if record else []
+        if not instance_ids:
+            entries[name] = PlanEntry(name, 'ec2', 'add', f"launch {count} instance(s)",
+                                      data={'launch': count, 'keep': [], 'terminate': []})
+        elif record['hash'] != instance_spec_hash(resource):
+            entries[name] = PlanEntry(name, 'ec2', 'change', f"replace {len(instance_ids)} instance(s) with {count} (spec changed)",
+                                      data={'launch': count, 'keep': [], 'terminate': instance_ids})
+        elif len(instance_ids) < count:
+            entries[name] = PlanEntry(name, 'ec2', 'change', f"launch {count - len(instance_ids)} more instance(s)",
+                                      data={'launch': count - len(instance_ids), 'keep': instance_ids, 'terminate': []})
+        elif len(instance_ids) > count:
+            entries[name] = PlanEntry(name, 'ec2', 'change', f"terminate {len(instance_ids) - count} surplus instance(s)",
+                                      data={'launch': 0, 'keep': instance_ids[:count], 'terminate': instance_ids[count:]})
+        else:
+            entries[name] = PlanEntry(name, 'ec2', 'no-op', f"{count} instance(s) running",
+                                      result=[{'InstanceId': instance_id} for instance_id in instance_ids])
+    return entries
+
+def plan_screenplay_volumes(ec2, resources, instance_entries):
+    """Plan attachments and detachments from the volumes' current attachments.
+
+    Attachments change outside this tool too, so they are not cached; one
+    describe_volumes call covers every volume in the screenplay.
+    """
+    attaches = resources.get('attach_ebs_volumes', [])
+    detaches = resources.get('detach_ebs_volumes', [])
+    volume_ids = sorted({volume['volume_id'] for volume in attaches + detaches})
+    if not volume_ids:
+        return {}
+    attached_to = {}
+    for page in ec2.get_paginator('describe_volumes').paginate(Filters=[{'Name': 'volume-id', 'Values': volume_ids}]):
+        for volume in page['Volumes']:
+            attached_to[volume['VolumeId']] = [attachment['InstanceId'] for attachment in volume.get('Attachments', [])
+                                               if attachment['State'] in ('attaching', 'attached')]
+
+    entries = {}
+    for volume in attaches:
+        name = f"attach:{volume['volume_id']}"
+        if 'instance' in volume:
+            target_entry = instance_entries.get(f"ec2:{volume['instance']}")
+            target = target_entry.result[0]['InstanceId'] if target_entry and target_entry.action == 'no-op' else None
+            label = target or f"ec2:{volume['instance']}"
+        else:
+            target = label = volume['instance_id']
+        if target and target in attached_to.get(volume['volume_id'], []):
+            entries[name] = PlanEntry(name, 'ebs', 'no-op', f"attached to {target}")
+        else:
+            entries[name] = PlanEntry(name, 'ebs', 'add', f"attach to {label} as {volume['device']}")
+    for volume in detaches:
+        name = f"detach:{volume['volume_id']}"
+        attach_entry = entries.get(f"attach:{volume['volume_id']}")
+        if attached_to.get(volume['volume_id']) or (attach_entry and attach_entry.action != 'no-op'):
+            entries[name] = PlanEntry(name, 'ebs', 'add', "detach volume")
+        else:
+            entries[name] = PlanEntry(name, 'ebs', 'no-op', "volume is not attached")
+    return entries
+
+def plan_screenplay(credentials, state, resources, refresh=False):
+    """Return the plan for every screenplay resource, keyed by task name."""
+    ec2 = get_client('ec2', credentials)
+    plan = plan_screenplay_instances(ec2, state, resources.get('ec2_instances', []), refresh)
+    if resources.get('s3_buckets'):
+        plan.update(plan_buckets(get_client('s3', credentials), state, resources['s3_buckets'], refresh))
+    plan.update(plan_screenplay_volumes(ec2, resources, plan))
+    return plan
+
+def apply_instance_plan(ec2, resource, entry, shared=None):
+    created = launch_screenplay_instances(ec2, resource, entry.data['launch'], shared, entry.name) if entry.data['launch'] else []
+    if entry.data['terminate']:
+        ec2.terminate_instances(InstanceIds=entry.data['terminate'])
+        click.echo(f"Terminated instances: {', '.join(entry.data['terminate'])}")
+    entry.data['created'] = created
+    return [{'InstanceId': instance_id} for instance_id in entry.data['keep']] + created
+
+def build_screenplay_tasks(resources, credentials, plan, include_instances=True):
+    """Turn screenplay resources into tasks with explicit and inferred dependencies.
+
+    Every resource may list task names under ``depends_on``.  An attachment
+    that names a screenplay instance entry with ``instance`` (instead of a
+    literal ``instance_id``) waits for that entry and attaches to its first
+    instance, and a detachment waits for an attachment of the same volume.
+    Resources the plan marks as no-op are handed to the executor already done.
+    Instance entries with the same launch spec and dependencies share one
+    coalesced launch.
+    """
+    ec2 = get_client('ec2', credentials)
+    s3 = get_client('s3', credentials)
+    tasks = []
+
+    instances = resources.get('ec2_instances', [])
+    names = screenplay_instance_names(instances)
+    launches = {}
+    for name, resource in zip(names, instances):
+        entry = plan[name]
+        if include_instances and entry.action != 'no-op' and entry.data['launch']:
+            spec = screenplay_launch_spec(resource)
+            key = (spec_key(spec), tuple(sorted(resource.get('depends_on', []))))
+            launches.setdefault(key, (spec, {}))[1][entry.name] = entry.data['launch']
+    shared = {}
+    for spec, counts in launches.values():
+        if len(counts) > 1:
+            launch = SharedLaunch(ec2, spec, counts)
+            shared.update((name, launch) for name in counts)
+
+    def add(task):
+        entry = plan[task.name]
+        if entry.action == 'no-op':
+            task.status = 'done'
+            task.result = entry.result
+        elif task.service == 'ec2' and not include_instances:
+            task.status = 'skipped'
+            task.error = "instance changes declined"
+        tasks.append(task)
+
+    for name, resource in zip(names, instances):
+        add(ScreenplayTask(
+            name, 'ec2',
+            lambda results, resource=resource, entry=plan[name]: apply_instance_plan(ec2, resource, entry, shared.get(entry.name)),
+            resource.get('depends_on', [])
+        ))
+
+    for bucket in resources.get('s3_buckets', []):
+        add(ScreenplayTask(
+            f"s3:{bucket['name']}", 's3',
+            lambda results, bucket=bucket: create_screenplay_bucket(s3, bucket),
+            bucket.get('depends_on', [])
+        ))
+
+    attached = set()
+    for volume in resources.get('attach_ebs_volumes', []):
+        depends_on = list(volume.get('depends_on', []))
+        target = f"ec2:{volume['instance']}" if 'instance' in volume else None
+        if target:
+            depends_on.append(target)
+
+        def attach(results, volume=volume, target=target):
+            instance_id = results[target][0]['InstanceId'] if target else volume['instance_id']
+            attach_ebs_volume(ec2, volume, instance_id)
+
+        add(ScreenplayTask(f"attach:{volume['volume_id']}", 'ebs', attach, depends_on))
+        attached.add(volume['volume_id'])
+
+    for volume in resources.get('detach_ebs_volumes', []):
+        depends_on = list(volume.get('depends_on', []))
+        if volume['volume_id'] in attached:
+            depends_on.append(f"attach:{volume['volume_id']}")
+        add(ScreenplayTask(
+            f"detach:{volume['volume_id']}", 'ebs',
+            lambda results, volume=volume: detach_ebs_volume(ec2, volume),
+            depends_on
+        ))
+    return tasks
+
+def record_screenplay_state(state, resources, executor):
+    """Record what the run created so the next plan starts from it."""
+    instances = resources.get('ec2_instances', [])
+    names = screenplay_instance_names(instances)
+    for name, resource in zip(names, instances):
+        task = executor.tasks[name]
+        if task.status == 'done' and task.start is not None:
+            state.put(task.name, {'hash': instance_spec_hash(resource),
+                                  'instance_ids': [instance['InstanceId'] for instance in task.result]})
+    for bucket in resources.get('s3_buckets', []):
+        task = executor.tasks[f"s3:{bucket['name']}"]
+        if task.status == 'done' and task.start is not None:
+            state.put(task.name, {'exists': True})
+    state.save()
+
+def save_screenplay_version(version_id, comment, instances):
+    if check_bucket_exists(VERSION_BUCKET_NAME):
+        save_version_info_to_bucket(version_id, comment, instances)
+    else:
+        if click.confirm("Do you want to save the version information in a bucket?", default=False):
+            create_version_bucket()
+            save_version_info_to_bucket(version_id, comment, instances)
+        else:
+            save_version_info_locally(version_id, comment, instances)
+
+@group.command(name="create-ec2-dob", help="Create EC2 instances using dob-screenplay YAML file.")
+@click.argument('dob_screenplay', type=click.Path(exists=True))
+@click.option('--workers', default=SCREENPLAY_WORKERS, show_default=True, type=click.IntRange(1), help="Resources to create concurrently")
+@click.option('--limit', 'limits', multiple=True, type=(str, click.IntRange(1)), help="Concurrency limit for one service, e.g. --limit ec2 2")
+@click.option('--refresh', is_flag=True, help="Check every resource against AWS instead of the cached state")
+@click.option('--plan-only', is_flag=True, help="Show the plan without applying it")
+def create_ec2_dob(dob_screenplay, workers, limits, refresh, plan_only):
+    with open(dob_screenplay, 'r') as f:
+        dob_content = yaml.safe_load(f)
+
+    resources = dob_content.get('resources') or {}
+    credentials = load_aws_credentials()
+    state = ScreenplayState(dob_screenplay)
+    plan = plan_screenplay(credentials, state, resources, refresh)
+    state.save()
+    if not plan:
+        click.echo("Nothing to create.")
+        return
+    print_plan(plan.values())
+    if all(entry.action == 'no-op' for entry in plan.values()):
+        click.echo(click.style("No changes. The screenplay is up to date.", fg="green"))
+        return
+    if plan_only:
+        return
+
+    instances = resources.get('ec2_instances', [])
+    names = screenplay_instance_names(instances)
+    changed_instances = [resource for name, resource in zip(names, instances) if plan[name].action != 'no-op']
+    include_instances = False
+    version_id = comment = None
+    if changed_instances:
+        preview_screenplay_instances(changed_instances)
+        if click.confirm(click.style("Do you want to proceed with creating and configuring the instance(s)?", fg="green"), default=True):
+            include_instances = True
+            version_id = str(uuid.uuid4())  # Generate a unique version ID
+            comment = click.prompt(click.style("Enter a comment for this version", fg="green"))
+
+    executor = ScreenplayExecutor(build_screenplay_tasks(resources, credentials, plan, include_instances), workers, dict(limits))
+    succeeded = executor.run()
+    executor.report()
+    record_screenplay_state(state, resources, executor)
+
+    if include_instances:
+        created = []
+        for name in names:
+            created.extend(plan[name].data.get('created', []))
+        if created:
+            save_screenplay_version(version_id, comment, created)
+    if not succeeded:
+        click.echo(click.style("Some screenplay resources failed. Check the report for details.", fg="red"))
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from xml.sax.saxutils import escape as xml_escape
+
+import click
+from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from cryptography.fernet import Fernet
+from tabulate import tabulate
+
+from ..aws_clients import get_client
+from ..common import (
+    BASE_DIR, JENKINS_CREDENTIALS_BUCKET, JENKINS_CREDENTIALS_FILE, JENKINS_KEY_FILE,
+    ensure_user_folder, load_aws_credentials
+)
+from ..http_client import http_post
+from ..jenkins_builds import SUCCESS, FollowedBuild, follow_builds
+from ..secret_cache import decrypt_file_cached, get_fernet, read_cached
+
+group = click.Group(name="jenkins", help="Jenkins job commands.")
+
+# The credentials object is cached locally, still encrypted, next to its ETag.
+# Within the TTL it is used without contacting S3; after that a conditional
+# get revalidates it, and only a changed object is downloaded again.
+JENKINS_CACHE_FILE = os.path.join(BASE_DIR, "jenkins_credentials.enc")
+JENKINS_CACHE_META = os.path.join(BASE_DIR, "jenkins_credentials.json")
+JENKINS_CACHE_TTL = 300  # seconds
+
+def generate_jenkins_key():
+    key = Fernet.generate_key()
+    with open(JENKINS_KEY_FILE, 'wb') as key_file:
+        key_file.write(key)
+    click.echo("Jenkins encryption key generated and saved.")
+
+def load_jenkins_key():
+    return read_cached(JENKINS_KEY_FILE)
+
+def encrypt_jenkins_data(data, key):
+    fernet = get_fernet(key)
+    encrypted = fernet.encrypt(data.encode())
+    return encrypted
+
+def decrypt_jenkins_data(encrypted_data, key):
+    fernet = get_fernet(key)
+    decrypted = fernet.decrypt(encrypted_data).decode()
+    return decrypted
+
+def save_jenkins_credentials_to_s3(url, job_name, username, api_token):
+    ensure_user_folder()
+    if not os.path.exists(JENKINS_KEY_FILE):
+        generate_jenkins_key()
+    key = load_jenkins_key()
+
+    credentials = {
+        'jenkins_url': url,
+        'job_name': job_name,
+        'username': username,
+        'api_token': api_token
+    }
+
+    encrypted_credentials = encrypt_jenkins_data(json.dumps(credentials), key)
+
+    try:
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials)
+        s3.create_bucket(Bucket=JENKINS_CREDENTIALS_BUCKET)
+        response = s3.put_object(Bucket=JENKINS_CREDENTIALS_BUCKET, Key=JENKINS_CREDENTIALS_FILE, Body=encrypted_credentials)
+        save_jenkins_cache(encrypted_credentials, response['ETag'])
+        click.echo(f"Jenkins credentials saved to S3 bucket {JENKINS_CREDENTIALS_BUCKET}.")
+    except (NoCredentialsError, PartialCredentialsError) as e:
+        click.echo(f"Error with AWS credentials: {e}")
+    except ClientError as e:
+        click.echo(f"Error saving credentials to S3: {e}")
+
+@group.command(name="configure-jenkins", help="Configure Jenkins credentials and save them to S3.")
+@click.option('--jenkins_url', required=True, help="Jenkins URL")
+@click.option('--job_name', required=True, help="Jenkins Job Name")
+@click.option('--username', required=True, help="Jenkins Username")
+@click.option('--api_token', required=True, hide_input=True, help="Jenkins API Token")
+def configure_jenkins(jenkins_url, job_name, username, api_token):
+    save_jenkins_credentials_to_s3(jenkins_url, job_name, username, api_token)
+
+def load_jenkins_cache_meta():
+    if not os.path.exists(JENKINS_CACHE_META) or not os.path.exists(JENKINS_CACHE_FILE):
+        return None
+    with open(JENKINS_CACHE_META) as meta_file:
+        return json.load(meta_file)
+
+def save_jenkins_cache_meta(etag):
+    tmp_path = f"{JENKINS_CACHE_META}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as meta_file:
+        json.dump({'etag': etag, 'fetched_at': time.time()}, meta_file)
+    os.replace(tmp_path, JENKINS_CACHE_META)
+
+def save_jenkins_cache(encrypted_credentials, etag):
+    ensure_user_folder()
+    tmp_path = f"{JENKINS_CACHE_FILE}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as cache_file:
+        cache_file.write(encrypted_credentials)
+    os.replace(tmp_path, JENKINS_CACHE_FILE)
+    save_jenkins_cache_meta(etag)
+
+def read_jenkins_cache():
+    return json.loads(decrypt_file_cached(JENKINS_CACHE_FILE, JENKINS_KEY_FILE))
+
+def load_jenkins_credentials_from_s3(refresh=False, ttl=JENKINS_CACHE_TTL):
+    """Return the Jenkins credentials, from the local cache while it is fresh.
+
+    A stale cache is revalidated with a conditional get on the object's ETag,
+    so S3 only sends the object again when it has changed.
+    """
+    meta = load_jenkins_cache_meta()
+    if meta and not refresh and time.time() - meta['fetched_at'] < ttl:
+        return read_jenkins_cache()
+    key = load_jenkins_key()
+    try:
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials)
+        request = {'Bucket': JENKINS_CREDENTIALS_BUCKET, 'Key': JENKINS_CREDENTIALS_FILE}
+        if meta:
+            request['IfNoneMatch'] = meta['etag']
+        try:
+            response = s3.get_object(**request)
+        except ClientError as e:
+            if meta and e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+                save_jenkins_cache_meta(meta['etag'])
+                return read_jenkins_cache()
+            raise
+        encrypted_credentials = response['Body'].read()
+        decrypted_credentials = decrypt_jenkins_data(encrypted_credentials, key)
+        save_jenkins_cache(encrypted_credentials, response['ETag'])
+        return json.loads(decrypted_credentials)
+    except (NoCredentialsError, PartialCredentialsError) as e:
+        click.echo(f"Error with AWS credentials: {e}")
+    except ClientError as e:
+        click.echo(f"Error loading credentials from S3: {e}")
+        return None
+
+JOB_CONFIG_TEMPLATE = """<?xml version='1.1' encoding='UTF-8'?>
+<flow-definition plugin="workflow-job@2.40">
+  <description></description>
+  <keepDependencies>false</keepDependencies>
+  <properties/>
+  <definition class="org.jenkinsci.plugins.workflow.cps.CpsFlowDefinition" plugin="workflow-cps@2.92">
+    <script>{script}</script>
+    <sandbox>true</sandbox>
+  </definition>
+  <triggers/>
+  <disabled>false</disabled>
+</flow-definition>"""
+
+def render_job_config(jenkinsfile_content):
+    """Render the flow-definition config.xml for a pipeline script."""
+    return JOB_CONFIG_TEMPLATE.format(script=xml_escape(jenkinsfile_content))
+
+def push_jenkins_job(credentials, job_name, job_config_xml, exists=False):
+    """Create ``job_name``, or update its config.xml if it already exists.
+
+    With ``exists`` the update is tried first.  Returns 'created', 'updated'
+    or 'failed', and the last response.
+    """
+    jenkins_url = credentials['jenkins_url']
+    auth = (credentials['username'], credentials['api_token'])
+    headers = {'Content-Type': 'application/xml'}
+    body = job_config_xml.encode('utf-8')
+
+    def update():
+        return http_post(f"{jenkins_url}/job/{quote(job_name)}/config.xml", data=body, headers=headers, auth=auth)
+
+    if exists:
+        response = update()
+        if response.status_code == 200:
+            return 'updated', response
+        if response.status_code != 404:
+            return 'failed', response
+    response = http_post(f"{jenkins_url}/createItem", params={'name': job_name}, data=body, headers=headers, auth=auth)
+    if response.status_code == 200:
+        return 'created', response
+    if response.status_code == 400 and not exists:
+        # Jenkins answers 400 when the job exists; replace its configuration instead.
+        response = update()
+        if response.status_code == 200:
+            return 'updated', response
+    return 'failed', response
+
+def create_jenkins_job(job_name, jenkinsfile_path):
+    jenkins_credentials = load_jenkins_credentials_from_s3()
+    if not jenkins_credentials:
+        click.echo("Failed to load Jenkins credentials.")
+        return
+
+    with open(jenkinsfile_path, 'r') as file:
+        jenkinsfile_content = file.read()
+
+    result, response = push_jenkins_job(jenkins_credentials, job_name, render_job_config(jenkinsfile_content))
+    if result == 'created':
+        return f"Job '{job_name}' created successfully."
+    elif result == 'updated':
+        return f"Job '{job_name}' already exists. Job updated."
+    else:
+        return f"Failed to create job '{job_name}'. Status code: {response.status_code}\n{response.text}"
+
+# What each job was last synced with, per Jenkins server, so an unchanged
+# Jenkinsfile costs a local hash and no request.
+JENKINS_SYNC_FILE = os.path.join(BASE_DIR, "jenkins_sync.json")
+JENKINS_SYNC_WORKERS = 8  # below the HTTP pool size, so connections are reused
+
+def find_jenkinsfiles(directory):
+    """Map job names to Jenkinsfiles under ``directory``.
+
+    ``<name>.Jenkinsfile`` is job ``<name>``; a file named ``Jenkinsfile`` is
+    named after its directory, nested directories joined with '-'.
+    """
+    jobs = {}
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            if filename == 'Jenkinsfile':
+                relative = os.path.relpath(root, directory)
+                job_name = os.path.basename(os.path.abspath(directory)) if relative == '.' else relative.replace(os.sep, '-')
+            elif filename.lower().endswith('.jenkinsfile'):
+                job_name = filename[:-len('.jenkinsfile')]
+            else:
+                continue
+            if job_name in jobs:
+                raise click.ClickException(f"Job '{job_name}' is defined by both {jobs[job_name]} and {path}.")
+            jobs[job_name] = path
+    return jobs
+
+def load_sync_record():
+    if not os.path.exists(JENKINS_SYNC_FILE):
+        return {}
+    with open(JENKINS_SYNC_FILE) as record_file:
+        return json.load(record_file)
+
+def save_sync_record(record):
+    ensure_user_folder()
+    tmp_path = f"{JENKINS_SYNC_FILE}.tmp"
+    with open(tmp_path, 'w') as record_file:
+        json.dump(record, record_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, JENKINS_SYNC_FILE)
+
+def config_hash(job_config_xml):
+    return hashlib.sha256(job_config_xml.encode('utf-8')).hexdigest()
+
+def queue_jenkins_build(credentials, job_name):
+    """Queue a build of ``job_name``; a 201 response's Location is the queue item."""
+    job_url = f"{credentials['jenkins_url']}/job/{quote(job_name)}/build"
+    return http_post(job_url, auth=(credentials['username'], credentials['api_token']))
+
+def trigger_jenkins_job(job_name):
+    credentials = load_jenkins_credentials_from_s3()
+    if not credentials:
+        click.echo("Failed to load Jenkins credentials.")
+        return
+
+    response = queue_jenkins_build(credentials, job_name)
+
+    if response.status_code == 201:
+        return f"Job '{job_name}' triggered successfully."
+    else:
+        return f"Failed to trigger job '{job_name}'. Status code: {response.status_code}\n{response.text}"
+
+@group.command(name="create-jenkins-job", help="Create a Jenkins job with a specified Jenkinsfile.")
+@click.argument('job_name')
+@click.argument('jenkinsfile_path', type=click.Path(exists=True))
+def create_jenkins_job_command(job_name, jenkinsfile_path):
+    result = create_jenkins_job(job_name, jenkinsfile_path)
+    click.echo(result)
+
+@group.command(name="trigger-jenkins-job", help="Trigger Jenkins jobs, optionally following them to their result.")
+@click.argument('job_names', nargs=-1, required=True)
+@click.option('--follow', is_flag=True, help="Stream console output and exit with the build result.")
+@click.pass_context
+def trigger_jenkins_job_command(ctx, job_names, follow):
+    if not follow:
+        for job_name in job_names:
+            click.echo(trigger_jenkins_job(job_name))
+        return
+
+    credentials = load_jenkins_credentials_from_s3()
+    if not credentials:
+        click.echo("Failed to load Jenkins credentials.")
+        ctx.exit(1)
+    builds, failed = [], 0
+    for job_name in job_names:
+        response = queue_jenkins_build(credentials, job_name)
+        if response.status_code != 201 or not response.headers.get('Location'):
+            click.echo(f"Failed to trigger job '{job_name}'. Status code: {response.status_code}\n{response.text}")
+            failed += 1
+            continue
+        build = FollowedBuild(credentials, job_name, response.headers['Location'], prefix=len(job_names) > 1)
+        if any(followed.queue_url == build.queue_url for followed in builds):
+            # Jenkins merges a request for a job that is still waiting in the queue.
+            click.echo(f"Job '{job_name}' is already queued; following the one build.")
+            continue
+        builds.append(build)
+    results = follow_builds(builds)
+    if len(job_names) > 1:
+        rows = [[build.label, results[build.queue_url]] for build in builds]
+        click.echo(tabulate(rows, headers=["Build", "Result"], tablefmt="grid"))
+    succeeded = not failed and all(result == SUCCESS for result in results.values())
+    ctx.exit(0 if succeeded else 1)
+
+@group.command(name="sync", help="Create or update Jenkins jobs from a directory of Jenkinsfiles.")
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', default=JENKINS_SYNC_WORKERS, show_default=True, help="Jobs pushed at once.")
+@click.option('--force', is_flag=True, help="Push every job, even those unchanged since the last sync.")
+@click.option('--dry-run', is_flag=True, help="Show what would be pushed without contacting Jenkins.")
+def sync_jenkins_jobs(directory, workers, force, dry_run):
+    jobs = find_jenkinsfiles(directory)
+    if not jobs:
+        click.echo(f"No Jenkinsfiles found in {directory}.")
+        return
+    credentials = load_jenkins_credentials_from_s3()
+    if not credentials:
+        click.echo("Failed to load Jenkins credentials.")
+        return
+
+    record = load_sync_record()
+    pushed = record.setdefault(credentials['jenkins_url'], {})
+    configs = {}
+    for job_name, path in jobs.items():
+        with open(path, 'r') as file:
+            configs[job_name] = render_job_config(file.read())
+    changed = [job_name for job_name, job_config_xml in configs.items()
+               if force or pushed.get(job_name) != config_hash(job_config_xml)]
+    unchanged = len(jobs) - len(changed)
+    if dry_run or not changed:
+        for job_name in changed:
+            click.echo(f"~ {job_name} ({jobs[job_name]})")
+        click.echo(f"{len(changed)} job(s) to push, {unchanged} unchanged.")
+        return
+
+    known = set(pushed)
+
+    def push(job_name):
+        return push_jenkins_job(credentials, job_name, configs[job_name], exists=job_name in known)
+
+    failures = []
+    counts = {'created': 0, 'updated': 0, 'failed': 0}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(changed)))) as executor:
+        for job_name, future in zip(changed, [executor.submit(push, job_name) for job_name in changed]):
+            try:
+                result, response = future.result()
+            except Exception as e:
+                result, response = 'failed', None
+                failures.append([job_name, jobs[job_name], str(e)])
+            else:
+                if result == 'failed':
+                    failures.append([job_name, jobs[job_name], f"HTTP {response.status_code}: {response.text[:200]}"])
+                else:
+                    pushed[job_name] = config_hash(configs[job_name])
+            counts[result] += 1
+    save_sync_record(record)
+    if failures:
+        click.echo(tabulate(failures, headers=["Job", "Jenkinsfile", "Error"], tablefmt="grid"))
+    click.echo(f"{counts['created']} created, {counts['updated']} updated, {counts['failed']} failed, {unchanged} unchanged.")
@@ -0,0 +1,270 @@
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+
+import click
+import paramiko
+from botocore.exceptions import ClientError
+from cryptography.fernet import Fernet
+from kubernetes import client, config
+from kubernetes.client.rest import ApiException
+
+from ..aws_clients import get_client
+from ..common import (
+    BASE_DIR, KEY_FILE, KUBECONFIG_KEY, KUBECONFIG_PATH, S3_BUCKET_NAME, S3_KUBECONFIG_KEY,
+    encrypt_data, ensure_private_folder, ensure_user_folder, generate_key, load_aws_credentials, load_key
+)
+from ..k8s_resources import PAGE_SIZE, ResourceListing, RowPrinter, resolve_resource
+from ..secret_cache import read_cached
+
+group = click.Group(name="k8s", help="Kubernetes commands.")
+
+# The kubeconfig written to KUBECONFIG_PATH is trusted for the TTL without
+# contacting S3.  After that it is revalidated with a conditional get on the
+# object's ETag, and the file is only rewritten when its content changed, so
+# the API client built from it can be reused for as long as the file is.
+KUBECONFIG_CACHE_META = os.path.join(BASE_DIR, "kubeconfig.json")
+KUBECONFIG_TTL = 300  # seconds
+
+_api_clients = {}
+_api_clients_lock = threading.Lock()
+
+# Function to generate and save the encryption key
+def generate_k8s_key():
+    key = Fernet.generate_key()
+    with open(KEY_FILE, 'wb') as key_file:
+        key_file.write(key)
+    click.echo("K8S encryption key generated and saved.")
+
+# Load the encryption key
+def load_k8s_key():
+    return read_cached(KEY_FILE)
+
+def kubeconfig_hash(kubeconfig_data):
+    return hashlib.sha256(kubeconfig_data.encode('utf-8')).hexdigest()
+
+def local_kubeconfig_hash():
+    if not os.path.exists(KUBECONFIG_PATH):
+        return None
+    with open(KUBECONFIG_PATH, 'r') as f:
+        return kubeconfig_hash(f.read())
+
+def load_kubeconfig_meta():
+    if not os.path.exists(KUBECONFIG_CACHE_META):
+        return None
+    with open(KUBECONFIG_CACHE_META) as meta_file:
+        return json.load(meta_file)
+
+def save_kubeconfig_meta(etag, content_hash):
+    ensure_user_folder()
+    tmp_path = f"{KUBECONFIG_CACHE_META}.tmp"
+    with open(tmp_path, 'w') as meta_file:
+        json.dump({'etag': etag, 'sha256': content_hash, 'fetched_at': time.time()}, meta_file)
+    os.replace(tmp_path, KUBECONFIG_CACHE_META)
+
+def load_kubeconfig_from_s3(refresh=False, ttl=KUBECONFIG_TTL):
+    """Make sure KUBECONFIG_PATH holds the kubeconfig from S3; returns its path.
+
+    Within the TTL the local file is used as is.  Past it, S3 is asked with
+    IfNoneMatch and the file is rewritten only if the content changed.  A
+    local file edited since it was written is replaced unconditionally.
+    Returns None if the kubeconfig could not be loaded.
+    """
+    meta = load_kubeconfig_meta()
+    local_hash = local_kubeconfig_hash()
+    if meta and local_hash != meta['sha256']:
+        meta = None
+    if meta and not refresh and time.time() - meta['fetched_at'] < ttl:
+        return KUBECONFIG_PATH
+    credentials = load_aws_credentials()
+    s3 = get_client('s3', credentials)
+    request = {'Bucket': S3_BUCKET_NAME, 'Key': S3_KUBECONFIG_KEY}
+    if meta:
+        request['IfNoneMatch'] = meta['etag']
+    try:
+        response = s3.get_object(**request)
+    except ClientError as e:
+        if meta and e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+            save_kubeconfig_meta(meta['etag'], meta['sha256'])
+            return KUBECONFIG_PATH
+        click.echo(f"Error loading kubeconfig from S3: {e}")
+        return None
+    kubeconfig_data = response['Body'].read().decode('utf-8')
+    content_hash = kubeconfig_hash(kubeconfig_data)
+    if content_hash != local_hash:
+        save_kubeconfig(kubeconfig_data)
+        click.echo("Kubeconfig loaded from S3 successfully.")
+    save_kubeconfig_meta(response['ETag'], content_hash)
+    return KUBECONFIG_PATH
+
+def get_api_client(kubeconfig_path=KUBECONFIG_PATH):
+    """Return an API client for ``kubeconfig_path``, parsed once per version of the file."""
+    st = os.stat(kubeconfig_path)
+    key = (kubeconfig_path, st.st_mtime_ns, st.st_ino, st.st_size)
+    with _api_clients_lock:
+        api_client = _api_clients.get(key)
+        if api_client is None:
+            api_client = config.new_client_from_config(config_file=kubeconfig_path)
+            for stale in [k for k in _api_clients if k[0] == kubeconfig_path]:
+                del _api_clients[stale]
+            _api_clients[key] = api_client
+    return api_client
+
+def get_core_api(kubeconfig_path=KUBECONFIG_PATH):
+    return client.CoreV1Api(get_api_client(kubeconfig_path))
+
+def save_kubeconfig(kubeconfig_data):
+    ensure_private_folder()
+    kubeconfig_dir = os.path.dirname(KUBECONFIG_PATH)
+    if not os.path.exists(kubeconfig_dir):
+        os.makedirs(kubeconfig_dir, mode=0o700, exist_ok=True)
+
+    with open(KUBECONFIG_PATH, 'w') as f:
+        f.write(kubeconfig_data)
+    os.chmod(KUBECONFIG_PATH, 0o600)
+
+@group.command(name="configure-k8s", help="Configure Kubernetes and save the kubeconfig locally and to S3.")
+@click.option('--k8s_vm_ip', prompt='K8S VM IP', help='The IP address of the K8S VM')
+@click.option('--k8s_user', prompt='K8S User', help='The username for K8S')
+@click.option('--k8s_key_path', prompt='K8S Key Path', help='The path to the key file for K8S')
+@click.option('--k8s_token', prompt='K8S Token', help='The token for K8S authentication')
+def configure_k8s(k8s_vm_ip, k8s_user, k8s_key_path, k8s_token):
+    try:
+        # Connect to the K8S VM and fetch the CA certificate
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh_client.connect(k8s_vm_ip, username=k8s_user, key_filename=k8s_key_path)
+        sftp_client = ssh_client.open_sftp()
+        ca_cert_path = "/etc/kubernetes/pki/ca.crt"
+        ca_cert = sftp_client.file(ca_cert_path).read().decode()
+        sftp_client.close()
+        ssh_client.close()
+
+        # Encode the CA certificate in base64
+        ca_cert_base64 = base64.b64encode(ca_cert.encode()).decode()
+
+        kubeconfig_data = f"""
+apiVersion: v1
+clusters:
+- cluster:
+    server: https://{k8s_vm_ip}:6443
+    certificate-authority-data: {ca_cert_base64}
+  name: kubernetes
+contexts:
+- context:
+    cluster: kubernetes
+    user: {k8s_user}
+  name: kubernetes
+current-context: kubernetes
+kind: Config
+preferences: {{}}
+users:
+- name: {k8s_user}
+  user:
+    token: {k8s_token}
+"""
+        save_kubeconfig(kubeconfig_data)
+        save_kubeconfig_to_s3(kubeconfig_data)
+        click.echo("Kubernetes configuration completed and saved.")
+    except Exception as e:
+        click.echo(f"Error configuring Kubernetes: {e}")
+
+@group.command(name='get')
+@click.argument('resource')
+@click.option('-n', '--namespace', default='default', show_default=True, help="Namespace to list in.")
+@click.option('-A', '--all-namespaces', is_flag=True, help="List across all namespaces.")
+@click.option('-l', '--selector', help="Label selector, e.g. app=web,tier!=cache.")
+@click.option('--field-selector', help="Field selector, e.g. status.phase=Running.")
+@click.option('--chunk-size', default=PAGE_SIZE, show_default=True, help="Objects fetched per request.")
+@click.option('-w', '--watch', is_flag=True, help="After listing, keep printing changes as they happen.")
+def get(resource, namespace, all_namespaces, selector, field_selector, chunk_size, watch):
+    """Get Kubernetes resources."""
+    resource_type = resolve_resource(resource)
+    kubeconfig_path = load_kubeconfig_from_s3()
+    if not kubeconfig_path:
+        return
+    listing = ResourceListing(get_api_client(kubeconfig_path), resource_type, namespace, all_namespaces,
+                              selector, field_selector, chunk_size)
+    printer = RowPrinter(listing.headers(watch))
+    try:
+        count, resource_version = listing.list(printer, event='ADDED' if watch else None)
+        if watch:
+            listing.watch(printer, resource_version)
+        elif not count:
+            click.echo("No resources found.")
+    except ApiException as e:
+        click.echo(f"Exception when calling the Kubernetes API: {e.status} {e.reason}")
+    except KeyboardInterrupt:
+        pass
+
+def load_kubeconfig():
+    """Load kubeconfig from S3 and save it locally, unless the local copy is current."""
+    return load_kubeconfig_from_s3()
+
+# Generic handler to run kubectl commands
+@group.command(name='kubectl', context_settings=dict(
+    ignore_unknown_options=True,
+    allow_extra_args=True,
+))
+@click.argument('kubectl_args', nargs=-1, type=click.UNPROCESSED)
+def kubectl(kubectl_args):
+    """Run any kubectl command."""
+    load_kubeconfig()
+    cmd = ['kubectl'] + list(kubectl_args)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.stdout:
+        click.echo(result.stdout)
+    if result.stderr:
+        click.echo(result.stderr)
+
+def fetch_kubeconfig(k8s_vm_ip, k8s_user, k8s_key_path):
+    key = paramiko.RSAKey.from_private_key_file(k8s_key_path)
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(hostname=k8s_vm_ip, username=k8s_user, pkey=key)
+    sftp = client.open_sftp()
+    remote_kubeconfig_path = '/etc/kubernetes/admin.conf'
+    kubeconfig_data = sftp.file(remote_kubeconfig_path).read().decode('utf-8')
+    sftp.close()
+    client.close()
+    return kubeconfig_data
+
+def configure_k8s_from_admin_conf(k8s_vm_ip, k8s_user, k8s_key_path):
+    try:
+        # Fetch the kubeconfig from the Kubernetes VM
+        kubeconfig_data = fetch_kubeconfig(k8s_vm_ip, k8s_user, k8s_key_path)
+
+        # Encrypt the kubeconfig data
+        if not os.path.exists(KEY_FILE):
+            generate_key()
+        key = load_key()
+        encrypted_kubeconfig = encrypt_data(kubeconfig_data, key)
+
+        # Save the encrypted kubeconfig to S3
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials)
+        s3.create_bucket(Bucket=S3_BUCKET_NAME)
+        s3.put_object(Bucket=S3_BUCKET_NAME, Key=KUBECONFIG_KEY, Body=encrypted_kubeconfig)
+
+        click.echo("Kubernetes configuration saved to S3 and encrypted successfully.")
+    except Exception as e:
+        click.echo(f"Error configuring Kubernetes: {e}")
+
+def save_kubeconfig_to_s3(kubeconfig_data):
+    credentials = load_aws_credentials()
+    if not credentials:
+        click.echo("No AWS credentials found. Please configure them first using 'dob configure-aws'.")
+        return
+
+    try:
+        s3 = get_client('s3', credentials)
+        response = s3.put_object(Bucket=S3_BUCKET_NAME, Key=KUBECONFIG_KEY, Body=kubeconfig_data)
+        if local_kubeconfig_hash() == kubeconfig_hash(kubeconfig_data):
+            save_kubeconfig_meta(response['ETag'], kubeconfig_hash(kubeconfig_data))
+        click.echo("Kubeconfig saved to S3 successfully.")
+    except ClientError as e:
+        click.echo(f"Error saving kubeconfig to S3: {e}")
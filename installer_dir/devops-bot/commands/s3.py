@@ -0,0 +1,378 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+import click
+import yaml
+from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from tabulate import tabulate
+
+from ..aws_clients import get_client
+from ..common import load_aws_credentials
+from ..output import OUTPUT_FORMATS, write_rows
+from ..plan import ScreenplayState, plan_buckets, print_plan
+from ..regions import resolve_regions
+
+group = click.Group(name="s3", help="S3 bucket and object commands.")
+
+def create_s3_bucket(bucket_name, region=None):
+    try:
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials, region_name=region)
+
+        create_bucket_config = {'LocationConstraint': region} if region and region != 'us-east-1' else None
+        s3.create_bucket(
+            Bucket=bucket_name,
+            CreateBucketConfiguration=create_bucket_config
+        ) if create_bucket_config else s3.create_bucket(Bucket=bucket_name)
+
+        click.echo(f"Bucket {bucket_name} created successfully in region {region}.")
+        return True
+    except (NoCredentialsError, PartialCredentialsError) as e:
+        click.echo(f"Error with AWS credentials: {e}")
+    except ClientError as e:
+        click.echo(f"Error creating bucket: {e}")
+    return False
+
+@group.command(name="create-s3-bucket", help="Create one or more S3 buckets.")
+@click.argument('bucket_names', nargs=-1)
+@click.option('--region', default=None, help='AWS region to create the bucket in.')
+@click.option('--count', default=1, help='Number of buckets to create.')
+def create_s3_bucket_cli(bucket_names, region, count):
+    for bucket_name in bucket_names:
+        for i in range(count):
+            unique_bucket_name = f"{bucket_name}-{i}" if count > 1 else bucket_name
+            if create_s3_bucket(unique_bucket_name, region):
+                click.echo(click.style(f"Bucket {unique_bucket_name} created successfully.", fg="green"))
+            else:
+                click.echo(click.style(f"Failed to create bucket {unique_bucket_name}.", fg="red"))
+
+@group.command(name="create-s3-bucket-dob", help="Create S3 buckets using dob-screenplay YAML file.")
+@click.argument('dob_screenplay', type=click.Path(exists=True))
+@click.option('--refresh', is_flag=True, help="Check every bucket against AWS instead of the cached state")
+@click.option('--plan-only', is_flag=True, help="Show the plan without applying it")
+def create_s3_bucket_dob(dob_screenplay, refresh, plan_only):
+    with open(dob_screenplay, 'r') as f:
+        dob_content = yaml.safe_load(f)
+
+    buckets = dob_content['resources']['s3_buckets']
+    state = ScreenplayState(dob_screenplay)
+    plan = plan_buckets(get_client('s3', load_aws_credentials()), state, buckets, refresh)
+    state.save()
+    print_plan(plan.values())
+    to_create = [resource for resource in buckets if plan[f"s3:{resource['name']}"].action == 'add']
+    if not to_create:
+        click.echo(click.style("No changes. All buckets already exist.", fg="green"))
+        return
+    if plan_only:
+        return
+
+    click.echo(click.style("\nStaging area: Creating S3 bucket(s) using dob-screenplay:", fg="green"))
+    for idx, resource in enumerate(to_create):
+        data = [
+            [click.style("+", fg="green"), "Bucket Name", resource['name']],
+            [click.style("+", fg="green"), "Region", resource['region']]
+        ]
+        table = tabulate(data, headers=["", "Attribute", "Value"], tablefmt="grid")
+        click.echo(table)
+
+    if click.confirm(click.style("Do you want to proceed with creating the bucket(s)?", fg="green"), default=True):
+        all_buckets_created = True
+        for resource in to_create:
+            if create_s3_bucket(resource['name'], resource['region']):
+                state.put(f"s3:{resource['name']}", {'exists': True})
+            else:
+                all_buckets_created = False
+        state.save()
+
+        if all_buckets_created:
+            click.echo(click.style("All buckets created successfully.", fg="green"))
+        else:
+            click.echo(click.style("Some buckets failed to create. Check the logs for details.", fg="red"))
+    else:
+        click.echo(click.style("Bucket creation aborted.", fg="yellow"))
+
+S3_COLUMNS = {
+    'name': "Bucket Name",
+    'created': "Creation Date",
+    'region': "Region",
+    'encryption': "Encryption",
+    'objects': "Number of Objects",
+    'size': "Size (Bytes)",
+}
+DEFAULT_S3_COLUMNS = 'name,created,encryption,objects'
+COUNT_MODES = ['first-page', 'metrics', 'exact']
+ENRICH_WORKERS = 16
+
+def parse_s3_columns(value):
+    columns = [column.strip() for column in value.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in S3_COLUMNS]
+    if unknown:
+        raise click.BadParameter(f"Unknown column(s) {', '.join(unknown)}. Choose from {', '.join(S3_COLUMNS)}.")
+    return columns
+
+def get_bucket_region(s3, bucket_name):
+    # get_bucket_location reports us-east-1 as None.
+    return s3.get_bucket_location(Bucket=bucket_name).get('LocationConstraint') or 'us-east-1'
+
+def count_bucket_objects(s3, bucket_name):
+    """Return (object count, total size) by paging through every key."""
+    count = size = 0
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket_name):
+        count += page.get('KeyCount', 0)
+        size += sum(obj['Size'] for obj in page.get('Contents', []))
+    return count, size
+
+def bucket_metrics(credentials, bucket_name, region):
+    """Return (object count, total size) from the daily CloudWatch storage metrics.
+
+    S3 publishes BucketSizeBytes once per storage class (StandardStorage,
+    StandardIAStorage, GlacierStorage, ...); the size is their sum.  The
+    metrics are up to a day old but cost two API calls regardless of the
+    bucket size.  Returns None when the bucket has not published them yet.
+    """
+    cloudwatch = get_client('cloudwatch', credentials, region_name=region)
+    bucket = {'Name': 'BucketName', 'Value': bucket_name}
+    size_metrics = cloudwatch.list_metrics(Namespace='AWS/S3', MetricName='BucketSizeBytes', Dimensions=[bucket])['Metrics']
+    count_metric = {
+        'Namespace': 'AWS/S3',
+        'MetricName': 'NumberOfObjects',
+        'Dimensions': [bucket, {'Name': 'StorageType', 'Value': 'AllStorageTypes'}]
+    }
+    end = datetime.now(timezone.utc)
+    results = cloudwatch.get_metric_data(
+        MetricDataQueries=[
+            {'Id': f"m{index}", 'MetricStat': {'Metric': metric, 'Period': 86400, 'Stat': 'Average'}}
+            for index, metric in enumerate([count_metric] + size_metrics)
+        ],
+        StartTime=end - timedelta(days=2),
+        EndTime=end,
+        ScanBy='TimestampDescending'
+    )['MetricDataResults']
+    latest = {result['Id']: result['Values'][0] for result in results if result['Values']}
+    if 'm0' not in latest:
+        return None
+    return int(latest.pop('m0')), int(sum(latest.values()))
+
+def enrich_bucket(credentials, bucket, columns, count_mode, regions=None):
+    """Build the row for one bucket, calling only the APIs the columns need.
+
+    With ``regions`` set, buckets outside those regions return None before any
+    further calls, and the rest are queried through a client in their own
+    region to avoid a redirect per request.
+    """
+    s3 = get_client('s3', credentials)
+    bucket_name = bucket['Name']
+    row = {
+        S3_COLUMNS['name']: bucket_name,
+        S3_COLUMNS['created']: bucket['CreationDate'].strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+    region = None
+    if regions or 'region' in columns or (count_mode == 'metrics' and {'objects', 'size'} & set(columns)):
+        try:
+            region = get_bucket_region(s3, bucket_name)
+        except ClientError:
+            region = 'Unknown'
+        row[S3_COLUMNS['region']] = region
+        if regions and region not in regions:
+            return None
+        if region != 'Unknown':
+            s3 = get_client('s3', credentials, region_name=region)
+
+    if 'encryption' in columns:
+        try:
+            s3.get_bucket_encryption(Bucket=bucket_name)
+            row[S3_COLUMNS['encryption']] = 'Enabled'
+        except ClientError:
+            row[S3_COLUMNS['encryption']] = 'None'
+
+    if {'objects', 'size'} & set(columns):
+        try:
+            totals = None
+            if count_mode == 'metrics' and region != 'Unknown':
+                totals = bucket_metrics(credentials, bucket_name, region)
+            elif count_mode == 'first-page':
+                page = s3.list_objects_v2(Bucket=bucket_name)
+                totals = page['KeyCount'], sum(obj['Size'] for obj in page.get('Contents', []))
+                if page.get('IsTruncated'):
+                    # Only the first 1000 keys were seen; show the totals as lower bounds.
+                    totals = tuple(f"{total}+" for total in totals)
+            if totals is None:
+                totals = count_bucket_objects(s3, bucket_name)
+            row[S3_COLUMNS['objects']], row[S3_COLUMNS['size']] = totals
+        except ClientError:
+            row[S3_COLUMNS['objects']] = row[S3_COLUMNS['size']] = 'Unknown'
+    return row
+
+def iter_bucket_rows(credentials, buckets, columns, count_mode, workers=ENRICH_WORKERS, regions=None):
+    """Enrich buckets on a bounded thread pool, yielding rows in listing order."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        rows = executor.map(lambda bucket: enrich_bucket(credentials, bucket, columns, count_mode, regions), buckets)
+        yield from (row for row in rows if row is not None)
+
+# List S3 buckets command
+@group.command(name="list-s3", help="List S3 buckets in a table format.")
+@click.option('--columns', default=DEFAULT_S3_COLUMNS, show_default=True,
+              help=f"Comma-separated columns to show: {', '.join(S3_COLUMNS)}")
+@click.option('--count-mode', type=click.Choice(COUNT_MODES), default='first-page', show_default=True,
+              help="How to fill the objects and size columns: first-page reads one page of keys (1000+ when there are "
+                   "more), metrics reads the daily CloudWatch storage metrics summed over all storage classes, exact "
+                   "pages through every key")
+@click.option('--workers', default=ENRICH_WORKERS, show_default=True, type=click.IntRange(1, 64),
+              help="Buckets enriched in parallel")
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='table', help="Output format")
+@click.option('--regions', default=None, help="Only buckets in these regions: 'all' or a comma-separated list")
+def list_s3_buckets(columns, count_mode, workers, output, regions):
+    columns = parse_s3_columns(columns)
+    credentials = load_aws_credentials()
+    s3 = get_client('s3', credentials)
+    try:
+        region_names = None
+        if regions:
+            # Buckets are listed globally; the region is resolved per bucket
+            # on the enrichment pool and used to filter and tag each row.
+            region_names = None if regions.strip() == 'all' else set(resolve_regions(regions, credentials))
+            if 'region' not in columns:
+                columns.insert(1, 'region')
+        buckets = s3.list_buckets()['Buckets']
+        rows = iter_bucket_rows(credentials, buckets, columns, count_mode, workers, region_names)
+        write_rows(rows, output, [S3_COLUMNS[column] for column in columns])
+    except ClientError as e:
+        click.echo(click.style(f"Failed to list buckets: {e}", fg="red"))
+
+# List objects in a specific S3 bucket command
+@group.command(name="list-objects", help="List objects in a specific S3 bucket in a table format.")
+@click.argument('bucket_name')
+def list_s3_objects(bucket_name):
+    credentials = load_aws_credentials()
+    s3 = get_client('s3', credentials)
+    try:
+        response = s3.list_objects_v2(Bucket=bucket_name)
+        if 'Contents' not in response:
+            click.echo(click.style(f"No objects found in bucket {bucket_name}.", fg="yellow"))
+            return
+
+        objects = []
+        for obj in response['Contents']:
+            key = obj['Key']
+            size = obj['Size']
+            last_modified = obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S')
+            storage_class = obj['StorageClass']
+            objects.append([
+                key, size, last_modified, storage_class
+            ])
+
+        headers = ["Object Key", "Size (Bytes)", "Last Modified", "Storage Class"]
+        click.echo(tabulate(objects, headers, tablefmt="grid"))
+    except ClientError as e:
+        click.echo(click.style(f"Failed to list objects in bucket {bucket_name}: {e}", fg="red"))
+
+@group.command(name="delete-object", help="Delete an object from an S3 bucket.")
+@click.argument('bucket_name')
+@click.argument('object_key')
+def delete_object(bucket_name, object_key):
+    click.echo(click.style("Warning: This action is irreversible and you will not be able to recreate the object. No version information will be saved.", fg="red"))
+    if click.confirm(click.style("Do you want to proceed with deleting the object?", fg="red"), default=False):
+        comment = click.prompt(click.style("Enter a comment for this deletion", fg="red"))
+        try:
+            credentials = load_aws_credentials()
+            s3 = get_client('s3', credentials)
+            s3.delete_object(Bucket=bucket_name, Key=object_key)
+            click.echo(click.style(f"Object '{object_key}' deleted successfully from bucket '{bucket_name}'.", fg="green"))
+        except ClientError as e:
+            click.echo(click.style(f"Failed to delete object: {e}", fg="red"))
+    else:
+        click.echo(click.style("Object deletion aborted.", fg="yellow"))
+
+DELETE_BATCH_SIZE = 1000
+DELETE_WORKERS = 8
+
+def iter_delete_batches(s3, bucket_name):
+    """Yield lists of up to 1,000 object identifiers covering the whole bucket.
+
+    Versioned buckets (including suspended ones) are walked with
+    list_object_versions so every version and delete marker is removed.
+    """
+    versioning = s3.get_bucket_versioning(Bucket=bucket_name).get('Status')
+    batch = []
+    if versioning:
+        pages = s3.get_paginator('list_object_versions').paginate(Bucket=bucket_name)
+        entries = ((entry['Key'], entry['VersionId'])
+                   for page in pages
+                   for entry in page.get('Versions', []) + page.get('DeleteMarkers', []))
+    else:
+        pages = s3.get_paginator('list_objects_v2').paginate(Bucket=bucket_name)
+        entries = ((obj['Key'], None) for page in pages for obj in page.get('Contents', []))
+    for key, version_id in entries:
+        batch.append({'Key': key, 'VersionId': version_id} if version_id else {'Key': key})
+        if len(batch) == DELETE_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def delete_batch(s3, bucket_name, batch):
+    """Delete one batch and return (deleted count, per-key errors)."""
+    try:
+        response = s3.delete_objects(Bucket=bucket_name, Delete={'Objects': batch, 'Quiet': True})
+    except ClientError as e:
+        return 0, [{'Key': obj['Key'], 'Message': str(e)} for obj in batch]
+    errors = response.get('Errors', [])
+    return len(batch) - len(errors), errors
+
+def empty_bucket(s3, bucket_name, workers=DELETE_WORKERS):
+    """Delete every object, version and delete marker in a bucket.
+
+    Batches of 1,000 keys are deleted by a pool of workers while the listing
+    continues, with at most two batches per worker in flight.  Per-key
+    failures are collected rather than stopping the run.  Returns
+    (deleted count, errors).
+    """
+    deleted = 0
+    errors = []
+    start = time.monotonic()
+    in_flight = set()
+
+    def collect(done):
+        nonlocal deleted
+        for future in done:
+            count, batch_errors = future.result()
+            deleted += count
+            errors.extend(batch_errors)
+        rate = deleted / max(time.monotonic() - start, 1e-6)
+        click.echo(f"\rDeleted {deleted} objects ({rate:.0f} objects/s, {len(errors)} errors)", nl=False, err=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in iter_delete_batches(s3, bucket_name):
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(executor.submit(delete_batch, s3, bucket_name, batch))
+        collect(in_flight)
+    click.echo(err=True)
+    return deleted, errors
+
+@group.command(name="delete-bucket", help="Delete an S3 bucket.")
+@click.argument('bucket_name')
+@click.option('--workers', default=DELETE_WORKERS, show_default=True, type=click.IntRange(1, 64),
+              help="Concurrent delete_objects batches")
+def delete_bucket(bucket_name, workers):
+    click.echo(click.style("Warning: This action is irreversible and you will not be able to recreate the bucket or its contents. No version information will be saved.", fg="red"))
+    if click.confirm(click.style("Do you want to proceed with deleting the bucket?", fg="red"), default=False):
+        try:
+            credentials = load_aws_credentials()
+            s3 = get_client('s3', credentials)
+            # Empty the bucket before deleting
+            deleted, errors = empty_bucket(s3, bucket_name, workers)
+            if errors:
+                click.echo(click.style(f"Failed to delete {len(errors)} object(s) from '{bucket_name}'; the bucket was kept.", fg="red"))
+                for error in errors[:10]:
+                    click.echo(click.style(f"  {error['Key']}: {error.get('Message', error.get('Code'))}", fg="red"))
+                return
+            s3.delete_bucket(Bucket=bucket_name)
+            click.echo(click.style(f"Bucket '{bucket_name}' and all its {deleted} objects deleted successfully.", fg="green"))
+        except ClientError as e:
+            click.echo(click.style(f"Failed to delete bucket: {e}", fg="red"))
+    else:
+        click.echo(click.style("Bucket deletion aborted.", fg="yellow"))
@@ -0,0 +1,21 @@
+import click
+
+group = click.Group(name="vault", help="Vault commands for sensitive information.")
+
+@group.command(name="vault-setup", help="Setup the vault for sensitive information.")
+@click.option('--password', prompt=True, hide_input=True, confirmation_prompt=True, help='Password for encryption')
+def setup(password):
+    setup_vault(password)
+    click.echo("Vault has been set up.")
+
+@group.command(name="vault-encrypt", help="Encrypt files in the vault.")
+@click.option('--password', prompt=True, hide_input=True, help='Password for encryption')
+def encrypt(password):
+    encrypt_vault(password)
+    click.echo("Files in the vault have been encrypted.")
+
+@group.command(name="vault-decrypt", help="Decrypt files in the vault.")
+@click.option('--password', prompt=True, hide_input=True, help='Password for decryption')
+def decrypt(password):
+    decrypt_vault(password)
+    click.echo("Files in the vault have been decrypted.")
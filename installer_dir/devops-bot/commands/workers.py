@@ -0,0 +1,351 @@
+import json
+import os
+
+import boto3
+import click
+from botocore.exceptions import ClientError
+from requests.exceptions import RequestException
+
+from ..aws_clients import get_client
+from ..common import MASTER_INFO_FILE, ensure_private_folder, load_aws_credentials
+from ..http_client import http_get, http_post, http_put
+from ..master import HEARTBEAT_TTL, MASTER_THREADS, WorkerRegistry, create_app, serve
+from ..regions import RegionFanOut, resolve_regions
+from ..worker import HEARTBEAT_INTERVAL, WORKER_PARALLELISM, Heartbeat, TaskQueue, create_worker_app
+from ..waiter import get_instance_waiter
+from .ec2 import iter_ec2_instances, load_inventory
+
+group = click.Group(name="workers", help="Master and worker node commands.")
+
+PUBLIC_IP_TIMEOUT = 200  # seconds
+ASSIGN_ECHO_LIMIT = 20  # larger batches only print a summary
+METADATA_TIMEOUT = 2  # seconds; the metadata service is link-local
+
+def save_master_info(instance_id, public_ip, security_group, key_pair):
+    """Save master instance information to a file."""
+    ensure_private_folder()
+    master_info = {
+        'instance_id': instance_id,
+        'public_ip': public_ip,
+        'security_group': security_group,
+        'key_pair': key_pair
+    }
+    with open(MASTER_INFO_FILE, 'w') as f:
+        json.dump(master_info, f)
+    os.chmod(MASTER_INFO_FILE, 0o600)  # rw-------
+
+def get_instance_metadata():
+    """Fetch instance metadata from AWS metadata service."""
+    metadata_url = "http://169.254.169.254/latest/meta-data/"
+    token_url = "http://169.254.169.254/latest/api/token"
+
+    try:
+        # Fetch IMDSv2 token
+        token_response = http_put(token_url, headers={"X-aws-ec2-metadata-token-ttl-seconds": "21600"}, timeout=METADATA_TIMEOUT)
+        token_response.raise_for_status()
+        token = token_response.text
+
+        headers = {"X-aws-ec2-metadata-token": token}
+        endpoints = ["instance-id", "public-ipv4", "security-groups", "public-keys/0/openssh-key"]
+
+        metadata = {}
+        for endpoint in endpoints:
+            response = http_get(metadata_url + endpoint, headers=headers, timeout=METADATA_TIMEOUT)
+            response.raise_for_status()
+            if endpoint == "public-keys/0/openssh-key":
+                metadata[endpoint] = response.text.split()[2]
+            else:
+                metadata[endpoint] = response.text
+
+        return metadata["instance-id"], metadata["public-ipv4"], metadata["security-groups"], metadata["public-keys/0/openssh-key"]
+    except RequestException as e:
+        raise Exception(f"Error fetching metadata: {e}")
+
+@group.command(name="master-setup", help="Setup master instance information.")
+def setup_master():
+    """Setup master instance information."""
+    try:
+        instance_id, public_ip, security_group, key_pair = get_instance_metadata()
+        save_master_info(instance_id, public_ip, security_group, key_pair)
+        click.echo(f"Master setup complete with instance ID: {instance_id}, public IP: {public_ip}, security group: {security_group}, key pair: {key_pair}")
+    except Exception as e:
+        click.echo(f"Failed to setup master: {e}")
+
+@group.command(name="delete-worker", help="Delete a worker instance.")
+@click.option('--worker_id', required=True, help='Unique ID for the worker node')
+def delete_worker(worker_id):
+    """Delete a worker instance."""
+    aws_credentials = load_aws_credentials()
+    if not aws_credentials:
+        click.echo("No AWS credentials found. Please configure them first using 'devops-bot configure-aws'.")
+        return
+
+    try:
+        ec2 = get_client('ec2', aws_credentials)
+        response = ec2.terminate_instances(InstanceIds=[worker_id])
+        click.echo(f"Worker instance {worker_id} deleted successfully.")
+    except boto3.exceptions.Boto3Error as e:
+        click.echo(f"Error deleting worker instance: {e}")
+
+@group.command(name="stop-worker", help="Stop a worker instance.")
+@click.option('--worker_id', required=True, help='Unique ID for the worker node')
+def stop_worker(worker_id):
+    """Stop a worker instance."""
+    aws_credentials = load_aws_credentials()
+    if not aws_credentials:
+        click.echo("No AWS credentials found. Please configure them first using 'devops-bot configure-aws'.")
+        return
+
+    try:
+        ec2 = get_client('ec2', aws_credentials)
+        response = ec2.stop_instances(InstanceIds=[worker_id])
+        click.echo(f"Worker instance {worker_id} stopped successfully.")
+    except boto3.exceptions.Boto3Error as e:
+        click.echo(f"Error stopping worker instance: {e}")
+
+WORKER_STATES = ['pending', 'running', 'shutting-down', 'stopping', 'stopped']
+WORKER_FILTERS = [
+    {'Name': 'tag:Role', 'Values': ['worker']},
+    {'Name': 'instance-state-name', 'Values': WORKER_STATES}
+]
+
+def worker_row(instance):
+    return {
+        'Worker ID': instance['InstanceId'],
+        'AMI': instance['ImageId'],
+        'IP Address': instance.get('PublicIpAddress', 'N/A'),
+        'CPU': instance['InstanceType'],
+        'Created At': instance['LaunchTime'].strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def format_bytes(value):
+    if value is None:
+        return 'N/A'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024:
+            return f"{value:.0f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+def telemetry_row(worker):
+    """Row for a worker as reported by its heartbeats to the master."""
+    memory = 'N/A'
+    if worker.get('memory_percent') is not None:
+        memory = f"{worker['memory_percent']}% used, {format_bytes(worker.get('memory_available'))} free"
+    return {
+        'Worker ID': worker['worker_id'],
+        'URL': worker['worker_url'],
+        'Status': worker['status'],
+        'CPU Load': worker.get('cpu_load', 'N/A'),
+        'Memory': memory,
+        'Free Space': format_bytes(worker.get('disk_free')),
+        'Running': worker.get('running', 'N/A'),
+        'Queued': worker.get('queued', 'N/A'),
+        'Task': worker.get('current_task') or 'N/A',
+        'Last Seen': f"{worker['age']}s ago"
+    }
+
+def echo_workers(workers):
+    """Print each worker as it arrives and return how many were printed."""
+    count = 0
+    for worker in workers:
+        for key, value in worker.items():
+            click.echo(f"{key}: {value}")
+        click.echo('-' * 40)
+        count += 1
+    return count
+
+@group.command(name="list-workers", help="List all registered workers with detailed information.")
+@click.option('--regions', default=None, help="Regions to query concurrently: 'all' or a comma-separated list")
+@click.option('--cached', is_flag=True, help="Answer from the local inventory, refreshing it when stale")
+@click.option('--master_url', default=None, help="Read live worker telemetry from this master in one request")
+def list_workers(regions, cached, master_url):
+    """List all registered workers."""
+    if master_url:
+        try:
+            response = http_get(f"{master_url}/workers")
+            response.raise_for_status()
+        except RequestException as e:
+            click.echo(f"Error listing workers: {e}")
+            return
+        if not echo_workers(telemetry_row(worker) for worker in response.json()['workers']):
+            click.echo("No workers found.")
+        return
+
+    aws_credentials = load_aws_credentials()
+    if not aws_credentials:
+        click.echo("No AWS credentials found. Please configure them first using 'devops-bot configure-aws'.")
+        return
+
+    def fetch(region):
+        if cached:
+            inventory, region = load_inventory(aws_credentials, region)
+            instances = inventory.query(region, states=WORKER_STATES, role='worker')
+        else:
+            ec2 = get_client('ec2', aws_credentials, region_name=region)
+            instances = iter_ec2_instances(ec2, filters=WORKER_FILTERS)
+        return (worker_row(instance) for instance in instances)
+
+    try:
+        if regions:
+            fan_out = RegionFanOut(resolve_regions(regions, aws_credentials), fetch)
+            count = echo_workers(fan_out)
+            fan_out.report()
+        else:
+            count = echo_workers(fetch(None))
+        if not count:
+            click.echo("No workers found.")
+    except (boto3.exceptions.Boto3Error, ClientError) as e:
+        click.echo(f"Error listing workers: {e}")
+
+def default_master_url():
+    master_info = load_master_info()
+    return f"http://{master_info['public_ip']}:5001" if master_info else None
+
+@group.command(name="assign-task", help="Assign tasks to workers through the master.")
+@click.option('--worker_id', default=None, help='Worker to run the tasks on; the least-loaded healthy worker if omitted')
+@click.option('--task', 'tasks', multiple=True, help='Task command to be executed by the worker (repeatable)')
+@click.option('--tasks-file', type=click.File('r'), help='File with one task command per line, dispatched as one batch')
+@click.option('--master_url', default=None, help='URL of the master node; defaults to the master saved by master-setup')
+def assign_task(worker_id, tasks, tasks_file, master_url):
+    """Dispatch tasks through the master, which routes them by worker load."""
+    commands = list(tasks)
+    if tasks_file:
+        commands.extend(line.strip() for line in tasks_file if line.strip())
+    if not commands:
+        click.echo("No task given. Use --task or --tasks-file.")
+        return
+    master_url = master_url or default_master_url()
+    if not master_url:
+        click.echo("No master information found. Please run 'devops-bot master-setup' first or pass --master_url.")
+        return
+
+    payload = {'tasks': [{'command': command, 'worker_id': worker_id} if worker_id else {'command': command}
+                         for command in commands]}
+    try:
+        response = http_post(f"{master_url}/dispatch", json=payload)
+    except RequestException as e:
+        click.echo(f"Error assigning task: {e}")
+        return
+    if not response.ok:
+        click.echo(f"Failed to assign task. Error: {response.text}")
+        return
+
+    body = response.json()
+    if len(commands) <= ASSIGN_ECHO_LIMIT:
+        for command, result in zip(commands, body['results']):
+            if 'error' in result:
+                click.echo(click.style(f"Failed to assign '{command}': {result['error']}", fg="red"))
+            else:
+                click.echo(f"Task '{command}' assigned to worker {result['worker_id']} successfully. Job ID: {result['job_id']}")
+    else:
+        errors = sorted({result['error'] for result in body['results'] if 'error' in result})
+        for error in errors:
+            click.echo(click.style(error, fg="red"))
+    click.echo(f"{body['dispatched']} task(s) dispatched, {body['failed']} failed.")
+
+@group.command(name="create-worker", help="Create a worker instance and register it with the master.")
+@click.option('--master_url', required=True, help='URL of the master node')
+@click.option('--worker_id', required=True, help='Unique ID for the worker node')
+@click.option('--params', required=True, help='Parameters for the AWS instance (e.g., "image_id=ami-0abcdef1234567890 instance_type=t2.micro")')
+def create_worker(master_url, worker_id, params):
+    """Create a worker instance and register it with the master."""
+    aws_credentials = load_aws_credentials()
+    if not aws_credentials:
+        click.echo("No AWS credentials found. Please configure them first using 'devops-bot configure-aws'.")
+        return
+
+    master_info = load_master_info()
+    if not master_info:
+        click.echo("No master information found. Please run 'devops-bot master-setup' first.")
+        return
+
+    params_dict = dict(param.split('=') for param in params.split())
+    try:
+        ec2 = get_client('ec2', aws_credentials)
+        response = ec2.run_instances(
+            ImageId=params_dict.get('image_id'),
+            InstanceType=params_dict.get('instance_type'),
+            MinCount=1,
+            MaxCount=1,
+            SecurityGroupIds=[master_info['security_group']],
+            KeyName=master_info['key_pair'],
+            TagSpecifications=[
+                {
+                    'ResourceType': 'instance',
+                    'Tags': [
+                        {'Key': 'Role', 'Value': 'worker'},
+                        {'Key': 'WorkerID', 'Value': worker_id}
+                    ]
+                }
+            ]
+        )
+        instance_id = response['Instances'][0]['InstanceId']
+        click.echo(f"Worker instance created successfully: {instance_id}")
+
+        try:
+            public_ip = get_instance_public_ip(ec2, instance_id)
+            click.echo(f"Public IP for instance {instance_id} is {public_ip}")
+        except Exception as e:
+            click.echo(f"Error: {e}")
+            return
+
+        worker_url = f"http://{public_ip}:5001"
+        click.echo(f"Worker URL: {worker_url}")
+
+        register_worker(master_url, worker_id, worker_url)
+
+    except boto3.exceptions.Boto3Error as e:
+        click.echo(f"Error creating worker instance: {e}")
+
+def get_instance_public_ip(ec2, instance_id):
+    """Wait for an instance to be running with a public IP and return the IP."""
+    future = get_instance_waiter(ec2).submit(instance_id, require_public_ip=True, timeout=PUBLIC_IP_TIMEOUT)
+    return future.result()['PublicIpAddress']
+
+def register_worker(master_url, worker_id, worker_url):
+    """Register a worker with the master node."""
+    response = http_post(f"{master_url}/register_worker", json={
+        "worker_id": worker_id,
+        "worker_url": worker_url
+    })
+    if response.status_code == 200:
+        click.echo(f"Worker {worker_id} registered successfully with master.")
+    else:
+        click.echo(f"Failed to register worker {worker_id} with master. Error: {response.text}")
+
+def load_master_info():
+    """Load master instance information from a file."""
+    try:
+        with open(MASTER_INFO_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+@group.command(name="start-master", help="Start the master server.")
+@click.option('--host', default='0.0.0.0', help='Host to bind the server')
+@click.option('--port', default=5001, help='Port to bind the server')
+@click.option('--threads', default=MASTER_THREADS, show_default=True, help='Request handler threads')
+@click.option('--heartbeat-ttl', default=HEARTBEAT_TTL, show_default=True, help='Seconds without a heartbeat before a worker is unhealthy')
+def start_master(host, port, threads, heartbeat_ttl):
+    serve(lambda: create_app(WorkerRegistry(heartbeat_ttl=heartbeat_ttl)), host, port, threads)
+
+@group.command(name="start-worker", help="Start worker node.")
+@click.option('--master_url', required=True, help='URL of the master node')
+@click.option('--worker_id', required=True, help='Unique ID for the worker node')
+@click.option('--host', default='0.0.0.0', help='Host to run the worker node on')
+@click.option('--port', default=5001, help='Port to run the worker node on')
+@click.option('--parallelism', default=WORKER_PARALLELISM, show_default=True, help='Tasks to run at the same time')
+@click.option('--heartbeat-interval', default=HEARTBEAT_INTERVAL, show_default=True, help='Seconds between heartbeats to the master')
+def start_worker(master_url, worker_id, host, port, parallelism, heartbeat_interval):
+    def app_factory():
+        tasks = TaskQueue(parallelism)
+        registration = {
+            "worker_id": worker_id,
+            "worker_url": f"http://{host}:{port}",
+            "parallelism": parallelism
+        }
+        Heartbeat(master_url, registration, tasks, heartbeat_interval).start()
+        return create_worker_app(tasks)
+
+    serve(app_factory, host, port)
@@ -0,0 +1,82 @@
+"""Paths, encryption helpers and credential loading shared by every command group.
+
+Nothing here imports the cloud SDKs, so loading it costs next to nothing.
+"""
+import json
+import os
+
+import click
+
+from .secret_cache import decrypt_file_cached, get_fernet, read_cached
+
+API_BASE_URL = "https://devopsbot-testserver.online"
+
+
+KUBECONFIG_KEY = "kubeconfig"
+JENKINS_CREDENTIALS_BUCKET = 'jenkins-credentials.dob'
+JENKINS_CREDENTIALS_FILE = 'jenkins_credentials.enc'
+JENKINS_KEY_FILE = 'jenkins_key.key'
+BASE_DIR = os.path.expanduser("~/.etc/devops-bot")
+VERSION_DIR = os.path.join(BASE_DIR, "version")
+AWS_CREDENTIALS_FILE = os.path.join(BASE_DIR, "aws_credentials.enc")
+KEY_FILE = os.path.join(BASE_DIR, "key.key")
+VERSION_BUCKET_NAME = "devops-bot-version-bucket"
+DEVOPS_BOT_TOKEN_FILE = os.path.join(BASE_DIR, "devops_bot_token")
+DOB_SCREENPLAY_FILE = os.path.join(BASE_DIR, "dob_screenplay.yaml")
+KUBECONFIG_PATH = os.path.expanduser('~/.kube/config')
+S3_BUCKET_NAME = "dob-k8s-config"
+S3_KUBECONFIG_KEY = "kubeconfig"
+MASTER_INFO_FILE = os.path.expanduser("~/.devops_master_info")
+
+
+def ensure_private_folder():
+    """Ensure the private folder for storing master info exists with restricted permissions."""
+    private_folder = os.path.dirname(MASTER_INFO_FILE)
+    if not os.path.exists(private_folder):
+        os.makedirs(private_folder, mode=0o700, exist_ok=True)  # rwx------ permissions
+
+# Ensure user folder
+def ensure_user_folder():
+    if not os.path.exists(BASE_DIR):
+        os.makedirs(BASE_DIR, mode=0o700, exist_ok=True)
+
+# Ensure version folder
+def ensure_version_folder():
+    if not os.path.exists(VERSION_DIR):
+        os.makedirs(VERSION_DIR, mode=0o700, exist_ok=True)
+
+# Generate encryption key
+def generate_key():
+    from cryptography.fernet import Fernet
+
+    key = Fernet.generate_key()
+    with open(KEY_FILE, 'wb') as key_file:
+        key_file.write(key)
+    click.echo("Encryption key generated and saved.")
+
+# Load encryption key
+def load_key():
+    return read_cached(KEY_FILE)
+
+# Encrypt data
+def encrypt_data(data, key):
+    fernet = get_fernet(key)
+    encrypted = fernet.encrypt(data.encode())
+    return encrypted
+
+# Decrypt data
+def decrypt_data(encrypted_data, key):
+    fernet = get_fernet(key)
+    decrypted = fernet.decrypt(encrypted_data).decode()
+    return decrypted
+
+# Load AWS credentials and decrypt them
+def load_aws_credentials():
+    credentials = None
+    try:
+        if os.path.exists(AWS_CREDENTIALS_FILE):
+            decrypted_credentials = decrypt_file_cached(AWS_CREDENTIALS_FILE, KEY_FILE)
+            credentials = json.loads(decrypted_credentials)
+    except FileNotFoundError:
+        pass
+    return credentials
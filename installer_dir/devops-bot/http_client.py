@@ -0,0 +1,125 @@
+"""Process-wide pooled HTTP sessions for every outbound call.
+
+Module-level ``requests.get``/``post`` open a new TCP (and TLS) connection per
+call and wait forever by default.  Calls made through here share one session
+per host, whose connection pool keeps connections alive between calls, and
+always carry a timeout.  Idempotent methods are retried with exponential
+backoff on connection errors and on 429/502/503/504; POSTs are never resent.
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+CONNECT_TIMEOUT = 5  # seconds
+READ_TIMEOUT = float(os.environ.get('DOB_HTTP_TIMEOUT', 30))  # seconds
+POOL_MAXSIZE = 20  # connections kept alive per host
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class HttpClientRegistry:
+    """Lazily built, thread-safe cache of one requests session per host."""
+
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_maxsize=POOL_MAXSIZE, retries=RETRIES):
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._requests = {}
+
+    def _retry(self):
+        from urllib3.util.retry import Retry
+
+        options = dict(total=self.retries, backoff_factor=BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES,
+                       raise_on_status=False)
+        # Only idempotent methods are retried.  urllib3 1.26 renamed
+        # method_whitelist to allowed_methods and 2.0 dropped the old name;
+        # requests 2.25 still accepts urllib3 releases older than 1.26.
+        if hasattr(Retry, 'DEFAULT_ALLOWED_METHODS'):
+            return Retry(allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, **options)
+        return Retry(method_whitelist=Retry.DEFAULT_METHOD_WHITELIST, **options)
+
+    def _new_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=self._retry())
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get_session(self, url):
+        """Return the shared session for the scheme and host of ``url``."""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(key)
+        if session is not None:
+            return key, session
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._new_session()
+                self._requests[key] = 0
+        return key, session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        key, session = self.get_session(url)
+        with self._lock:
+            self._requests[key] += 1
+        return session.request(method, url, **kwargs)
+
+    def stats(self):
+        """Return per-host request and connection counts.
+
+        ``connections`` counts connections opened; the gap to ``requests`` is
+        the number of handshakes saved by keep-alive.
+        """
+        with self._lock:
+            sessions = dict(self._sessions)
+            requests_made = dict(self._requests)
+        stats = {}
+        for key, session in sessions.items():
+            connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                connections += sum(pools[pool_key].num_connections for pool_key in pools.keys())
+            stats[key] = {'requests': requests_made[key], 'connections': connections}
+        return stats
+
+    def clear(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._requests.clear()
+
+
+_registry = HttpClientRegistry()
+
+
+def http_request(method, url, **kwargs):
+    return _registry.request(method, url, **kwargs)
+
+
+def http_get(url, **kwargs):
+    return _registry.request('GET', url, **kwargs)
+
+
+def http_post(url, **kwargs):
+    return _registry.request('POST', url, **kwargs)
+
+
+def http_put(url, **kwargs):
+    return _registry.request('PUT', url, **kwargs)
+
+
+def http_stats():
+    return _registry.stats()
+
+
+def clear_http_sessions():
+    _registry.clear()
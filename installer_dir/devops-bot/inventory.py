@@ -0,0 +1,149 @@
+"""Local EC2 inventory cache.
+
+Instances are stored per region in a SQLite database under BASE_DIR, indexed
+by instance ID, state, role and tags, so `--cached` listings and worker
+lookups are answered locally in milliseconds.  A region is refreshed from the
+API when its snapshot is older than the TTL or when a refresh is requested.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+
+from .common import BASE_DIR, ensure_user_folder
+
+INVENTORY_DB = os.path.join(BASE_DIR, "inventory.sqlite3")
+INVENTORY_TTL = 300  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    region TEXT NOT NULL,
+    state TEXT NOT NULL,
+    role TEXT,
+    instance_type TEXT,
+    public_ip TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS instances_region_state ON instances (region, state);
+CREATE INDEX IF NOT EXISTS instances_role ON instances (role);
+CREATE TABLE IF NOT EXISTS tags (
+    instance_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_key_value ON tags (key, value);
+CREATE INDEX IF NOT EXISTS tags_instance ON tags (instance_id);
+CREATE TABLE IF NOT EXISTS snapshots (
+    region TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+def _decode(data):
+    instance = json.loads(data)
+    if 'LaunchTime' in instance:
+        instance['LaunchTime'] = datetime.fromisoformat(instance['LaunchTime'])
+    return instance
+
+
+class Inventory:
+    def __init__(self, path=INVENTORY_DB):
+        self.path = path
+        if path == INVENTORY_DB:
+            ensure_user_folder()
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per call keeps the cache safe to use from
+        # the region fan-out threads.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def age(self, region):
+        """Seconds since ``region`` was refreshed, or None if it never was."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT refreshed_at FROM snapshots WHERE region = ?", (region,)).fetchone()
+        return time.time() - row[0] if row else None
+
+    def is_fresh(self, region, ttl=INVENTORY_TTL):
+        age = self.age(region)
+        return age is not None and age < ttl
+
+    def replace_region(self, region, instances):
+        """Replace the snapshot of ``region`` with ``instances`` in one transaction."""
+        count = 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM tags WHERE instance_id IN (SELECT instance_id FROM instances WHERE region = ?)", (region,))
+            conn.execute("DELETE FROM instances WHERE region = ?", (region,))
+            for instance in instances:
+                tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                conn.execute(
+                    "INSERT OR REPLACE INTO instances VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (instance['InstanceId'], region, instance['State']['Name'], tags.get('Role'),
+                     instance.get('InstanceType'), instance.get('PublicIpAddress'),
+                     json.dumps(instance, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value)))
+                )
+                conn.executemany(
+                    "INSERT INTO tags VALUES (?, ?, ?)",
+                    [(instance['InstanceId'], key, value) for key, value in tags.items()]
+                )
+                count += 1
+            conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?)", (region, time.time()))
+        return count
+
+    def set_state(self, instance_ids, state):
+        """Record a state change made by this tool without a full refresh."""
+        with closing(self._connect()) as conn, conn:
+            for instance_id in instance_ids:
+                row = conn.execute("SELECT data FROM instances WHERE instance_id = ?", (instance_id,)).fetchone()
+                if not row:
+                    continue
+                data = json.loads(row[0])
+                data['State'] = {'Name': state}
+                conn.execute("UPDATE instances SET state = ?, data = ? WHERE instance_id = ?",
+                             (state, json.dumps(data), instance_id))
+
+    def get(self, instance_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM instances WHERE instance_id = ?", (instance_id,)).fetchone()
+        return _decode(row[0]) if row else None
+
+    def query(self, region=None, instance_ids=(), states=(), instance_types=(), tags=(), role=None):
+        """Yield cached instances matching every given filter.
+
+        Tags use the same KEY=VALUE or KEY form as the list-ec2 --tag option.
+        Lists of IDs, states and types are matched through temporary tables,
+        so any number of values stays within SQLite's bound-parameter limit.
+        """
+        with closing(self._connect()) as conn:
+            clauses, params = [], []
+            if region:
+                clauses.append("region = ?")
+                params.append(region)
+            for column, values in (('instance_id', instance_ids), ('state', states), ('instance_type', instance_types)):
+                if values:
+                    table = f"query_{column}"
+                    conn.execute(f"CREATE TEMP TABLE {table} (value TEXT PRIMARY KEY)")
+                    conn.executemany(f"INSERT OR IGNORE INTO {table} VALUES (?)", [(value,) for value in values])
+                    clauses.append(f"{column} IN (SELECT value FROM {table})")
+            if role:
+                clauses.append("role = ?")
+                params.append(role)
+            for tag in tags:
+                key, _, value = tag.partition('=')
+                if value:
+                    clauses.append("instance_id IN (SELECT instance_id FROM tags WHERE key = ? AND value = ?)")
+                    params.extend([key, value])
+                else:
+                    clauses.append("instance_id IN (SELECT instance_id FROM tags WHERE key = ?)")
+                    params.append(key)
+            sql = "SELECT data FROM instances"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY instance_id"
+            for (data,) in conn.execute(sql, params):
+                yield _decode(data)
@@ -0,0 +1,138 @@
+"""Follow triggered Jenkins builds from queue item to result.
+
+Each build is first tracked through its queue item until Jenkins assigns a
+build number, then its console is read with the progressive-text API: every
+poll asks only for the bytes after the last offset.  A build that produced
+output is polled again soon; an idle one backs off up to a ceiling.
+
+Any number of builds are followed by one loop that polls whichever build is
+due next, so following many builds needs no thread per build.  With more
+than one build each console line is prefixed with the job and build number.
+"""
+import codecs
+import heapq
+import time
+
+import click
+
+MIN_POLL_INTERVAL = 0.5  # seconds
+MAX_POLL_INTERVAL = 10  # seconds
+POLL_BACKOFF = 1.5
+MAX_POLL_ERRORS = 5  # consecutive failed polls before a build is given up on
+
+SUCCESS = 'SUCCESS'
+
+
+class FollowedBuild:
+    def __init__(self, credentials, job_name, queue_url, prefix=False):
+        self.jenkins_url = credentials['jenkins_url'].rstrip('/')
+        self.auth = (credentials['username'], credentials['api_token'])
+        self.job_name = job_name
+        self.queue_url = queue_url.rstrip('/') + '/'
+        self.prefix = prefix
+        self.state = 'queued'
+        self.number = None
+        self.build_url = None
+        self.offset = 0
+        self.result = None
+        self.interval = MIN_POLL_INTERVAL
+        self.errors = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ''
+
+    @property
+    def label(self):
+        return f"{self.job_name} #{self.number}" if self.number else self.job_name
+
+    def _get(self, url, **kwargs):
+        from .http_client import http_get
+
+        response = http_get(url, auth=self.auth, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _write(self, data, final=False):
+        text = self._decoder.decode(data, final)
+        if not self.prefix:
+            if text:
+                click.echo(text, nl=False)
+            return
+        lines = (self._partial + text).split('\n')
+        self._partial = '' if final else lines.pop()
+        for line in lines:
+            if line or not final:
+                click.echo(f"[{self.label}] {line}")
+
+    def _poll_queue(self):
+        item = self._get(f"{self.queue_url}api/json").json()
+        if item.get('cancelled'):
+            self.result = 'CANCELLED'
+            click.echo(f"{self.label}: cancelled while queued.")
+            return True
+        executable = item.get('executable')
+        if not executable:
+            return False
+        self.number = executable['number']
+        self.build_url = (executable.get('url') or f"{self.jenkins_url}/job/{self.job_name}/{self.number}").rstrip('/') + '/'
+        self.state = 'running'
+        click.echo(f"{self.label}: started {self.build_url}")
+        return True
+
+    def _poll_console(self):
+        response = self._get(f"{self.build_url}logText/progressiveText", params={'start': self.offset})
+        progressed = bool(response.content)
+        if progressed:
+            self._write(response.content)
+        self.offset = int(response.headers.get('X-Text-Size', self.offset + len(response.content)))
+        if response.headers.get('X-More-Data', '').lower() != 'true':
+            self._write(b'', final=True)
+            self.state = 'finishing'
+        return progressed
+
+    def _poll_result(self):
+        build = self._get(f"{self.build_url}api/json", params={'tree': 'result,building'}).json()
+        if build.get('building') or not build.get('result'):
+            return False
+        self.result = build['result']
+        click.echo(f"{self.label}: {self.result}")
+        return True
+
+    def poll(self):
+        """Advance the build by one request; returns True if anything changed."""
+        if self.state == 'queued':
+            return self._poll_queue()
+        if self.state == 'running':
+            return self._poll_console()
+        return self._poll_result()
+
+    def next_interval(self, progressed):
+        # Come back quickly while output is flowing, back off while idle.
+        self.interval = MIN_POLL_INTERVAL if progressed else min(self.interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+        return self.interval
+
+
+def follow_builds(builds):
+    """Follow ``builds`` until each has a result; returns {queue URL: result}.
+
+    Results are keyed by queue item rather than label: the same job can be
+    followed more than once, and a build cancelled while queued has no number.
+    """
+    from requests.exceptions import RequestException
+
+    heap = [(time.monotonic(), index) for index in range(len(builds))]
+    while heap:
+        due, index = heapq.heappop(heap)
+        time.sleep(max(0.0, due - time.monotonic()))
+        build = builds[index]
+        try:
+            progressed = build.poll()
+            build.errors = 0
+        except (RequestException, ValueError) as e:
+            build.errors += 1
+            progressed = False
+            if build.errors >= MAX_POLL_ERRORS:
+                build.result = 'UNKNOWN'
+                click.echo(f"{build.label}: giving up after {build.errors} failed polls: {e}", err=True)
+        if build.result is None:
+            heapq.heappush(heap, (time.monotonic() + build.next_interval(progressed), index))
+    return {build.queue_url: build.result for build in builds}
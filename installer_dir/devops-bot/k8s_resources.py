@@ -0,0 +1,244 @@
+"""Typed, paginated listing and watching of Kubernetes resources.
+
+Each supported resource type names the typed client API and list method that
+serve it and the columns shown for it.  Listing asks the API server for one
+page at a time with ``limit`` and ``_continue``, label and field selectors are
+applied by the server, and each page is printed as soon as it arrives, so
+memory use is bounded by the page size however many objects there are.
+
+Watching starts from the resourceVersion of the listing and resumes from the
+last version seen whenever a watch request ends.  Only when the server no
+longer has that version (410 Gone) is the resource listed again.
+"""
+from datetime import datetime, timezone
+
+import click
+
+PAGE_SIZE = 500  # objects per list request
+WATCH_TIMEOUT = 300  # seconds per watch request before it is resumed
+HTTP_GONE = 410
+
+
+def format_age(timestamp):
+    if timestamp is None:
+        return '<unknown>'
+    seconds = int((datetime.now(timezone.utc) - timestamp).total_seconds())
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{max(seconds, 0)}s"
+
+
+def _pod_ready(pod):
+    statuses = pod.status.container_statuses or []
+    return f"{sum(1 for status in statuses if status.ready)}/{len(pod.spec.containers)}"
+
+
+def _pod_status(pod):
+    if pod.metadata.deletion_timestamp:
+        return 'Terminating'
+    for status in pod.status.container_statuses or []:
+        if status.state and status.state.waiting and status.state.waiting.reason:
+            return status.state.waiting.reason
+    return pod.status.reason or pod.status.phase
+
+
+def _pod_restarts(pod):
+    return sum(status.restart_count for status in pod.status.container_statuses or [])
+
+
+def _node_status(node):
+    ready = next((condition.status for condition in node.status.conditions or [] if condition.type == 'Ready'), None)
+    status = 'Ready' if ready == 'True' else 'NotReady'
+    return f"{status},SchedulingDisabled" if node.spec.unschedulable else status
+
+
+def _service_ports(service):
+    return ','.join(f"{port.port}/{port.protocol}" for port in service.spec.ports or []) or '<none>'
+
+
+def _replicas(obj):
+    return f"{obj.status.ready_replicas or 0}/{obj.spec.replicas or 0}"
+
+
+def _storage(capacity):
+    return (capacity or {}).get('storage', '')
+
+
+class ResourceType:
+    """One listable resource: the client API serving it and its columns.
+
+    ``kind`` is the snake_case suffix of the client's list methods, e.g.
+    ``pod`` for ``list_namespaced_pod`` and ``list_pod_for_all_namespaces``.
+    """
+
+    def __init__(self, name, api, kind, namespaced=True, columns=(), aliases=()):
+        self.name = name
+        self.api = api
+        self.kind = kind
+        self.namespaced = namespaced
+        self.columns = list(columns)
+        self.aliases = aliases
+
+    def list_function(self, api_client, namespace, all_namespaces):
+        """Return the list method to call and the keyword arguments it needs."""
+        from kubernetes import client
+
+        api = getattr(client, self.api)(api_client)
+        if not self.namespaced:
+            return getattr(api, f"list_{self.kind}"), {}
+        if all_namespaces:
+            return getattr(api, f"list_{self.kind}_for_all_namespaces"), {}
+        return getattr(api, f"list_namespaced_{self.kind}"), {'namespace': namespace}
+
+
+RESOURCE_TYPES = [
+    ResourceType('pods', 'CoreV1Api', 'pod', aliases=('pod', 'po'), columns=[
+        ('READY', _pod_ready), ('STATUS', _pod_status), ('RESTARTS', _pod_restarts),
+        ('NODE', lambda pod: pod.spec.node_name or '<none>'),
+    ]),
+    ResourceType('services', 'CoreV1Api', 'service', aliases=('service', 'svc'), columns=[
+        ('TYPE', lambda svc: svc.spec.type), ('CLUSTER-IP', lambda svc: svc.spec.cluster_ip), ('PORTS', _service_ports),
+    ]),
+    ResourceType('nodes', 'CoreV1Api', 'node', namespaced=False, aliases=('node', 'no'), columns=[
+        ('STATUS', _node_status), ('VERSION', lambda node: node.status.node_info.kubelet_version if node.status.node_info else ''),
+    ]),
+    ResourceType('namespaces', 'CoreV1Api', 'namespace', namespaced=False, aliases=('namespace', 'ns'), columns=[
+        ('STATUS', lambda ns: ns.status.phase),
+    ]),
+    ResourceType('configmaps', 'CoreV1Api', 'config_map', aliases=('configmap', 'cm'), columns=[
+        ('DATA', lambda cm: len(cm.data or {}) + len(cm.binary_data or {})),
+    ]),
+    ResourceType('secrets', 'CoreV1Api', 'secret', aliases=('secret',), columns=[
+        ('TYPE', lambda secret: secret.type), ('DATA', lambda secret: len(secret.data or {})),
+    ]),
+    ResourceType('serviceaccounts', 'CoreV1Api', 'service_account', aliases=('serviceaccount', 'sa')),
+    ResourceType('endpoints', 'CoreV1Api', 'endpoints', aliases=('ep',)),
+    ResourceType('events', 'CoreV1Api', 'event', aliases=('event', 'ev'), columns=[
+        ('TYPE', lambda event: event.type), ('REASON', lambda event: event.reason),
+        ('OBJECT', lambda event: f"{(event.involved_object.kind or '').lower()}/{event.involved_object.name}"),
+        ('MESSAGE', lambda event: (event.message or '').strip()),
+    ]),
+    ResourceType('persistentvolumeclaims', 'CoreV1Api', 'persistent_volume_claim', aliases=('persistentvolumeclaim', 'pvc'), columns=[
+        ('STATUS', lambda pvc: pvc.status.phase), ('VOLUME', lambda pvc: pvc.spec.volume_name or ''),
+        ('CAPACITY', lambda pvc: _storage(pvc.status.capacity)),
+    ]),
+    ResourceType('persistentvolumes', 'CoreV1Api', 'persistent_volume', namespaced=False, aliases=('persistentvolume', 'pv'), columns=[
+        ('CAPACITY', lambda pv: _storage(pv.spec.capacity)), ('STATUS', lambda pv: pv.status.phase),
+        ('CLAIM', lambda pv: f"{pv.spec.claim_ref.namespace}/{pv.spec.claim_ref.name}" if pv.spec.claim_ref else ''),
+    ]),
+    ResourceType('deployments', 'AppsV1Api', 'deployment', aliases=('deployment', 'deploy'), columns=[
+        ('READY', _replicas), ('UP-TO-DATE', lambda d: d.status.updated_replicas or 0),
+        ('AVAILABLE', lambda d: d.status.available_replicas or 0),
+    ]),
+    ResourceType('replicasets', 'AppsV1Api', 'replica_set', aliases=('replicaset', 'rs'), columns=[
+        ('DESIRED', lambda rs: rs.spec.replicas or 0), ('CURRENT', lambda rs: rs.status.replicas or 0),
+        ('READY', lambda rs: rs.status.ready_replicas or 0),
+    ]),
+    ResourceType('statefulsets', 'AppsV1Api', 'stateful_set', aliases=('statefulset', 'sts'), columns=[
+        ('READY', _replicas),
+    ]),
+    ResourceType('daemonsets', 'AppsV1Api', 'daemon_set', aliases=('daemonset', 'ds'), columns=[
+        ('DESIRED', lambda ds: ds.status.desired_number_scheduled), ('CURRENT', lambda ds: ds.status.current_number_scheduled),
+        ('READY', lambda ds: ds.status.number_ready),
+    ]),
+]
+
+
+def resolve_resource(name):
+    name = name.lower()
+    for resource_type in RESOURCE_TYPES:
+        if name == resource_type.name or name in resource_type.aliases:
+            return resource_type
+    known = ', '.join(resource_type.name for resource_type in RESOURCE_TYPES)
+    raise click.ClickException(f"Unknown resource type '{name}'. Supported: {known}.")
+
+
+class RowPrinter:
+    """Print rows as they arrive.
+
+    Column widths come from the first batch and only ever grow, so a wider
+    value in a later batch shifts the columns after it from then on.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.widths = None
+
+    def print_rows(self, rows):
+        if not rows:
+            return
+        widths = [max(len(str(value)) for value in column) for column in zip(self.headers, *rows)]
+        if self.widths is None:
+            self.widths = widths
+            self._echo(self.headers)
+        else:
+            self.widths = [max(old, new) for old, new in zip(self.widths, widths)]
+        for row in rows:
+            self._echo(row)
+
+    def _echo(self, row):
+        click.echo('   '.join(str(value).ljust(width) for value, width in zip(row, self.widths)).rstrip())
+
+
+class ResourceListing:
+    def __init__(self, api_client, resource_type, namespace='default', all_namespaces=False,
+                 label_selector=None, field_selector=None, page_size=PAGE_SIZE):
+        self.resource_type = resource_type
+        self.all_namespaces = all_namespaces and resource_type.namespaced
+        self.list_function, self.kwargs = resource_type.list_function(api_client, namespace, self.all_namespaces)
+        if label_selector:
+            self.kwargs['label_selector'] = label_selector
+        if field_selector:
+            self.kwargs['field_selector'] = field_selector
+        self.page_size = page_size
+
+    def headers(self, watch=False):
+        headers = (['EVENT'] if watch else []) + (['NAMESPACE'] if self.all_namespaces else []) + ['NAME']
+        return headers + [header for header, _ in self.resource_type.columns] + ['AGE']
+
+    def row(self, obj, event=None):
+        row = ([event] if event else []) + ([obj.metadata.namespace] if self.all_namespaces else []) + [obj.metadata.name]
+        return row + [value(obj) for _, value in self.resource_type.columns] + [format_age(obj.metadata.creation_timestamp)]
+
+    def pages(self):
+        """Yield (items, resourceVersion) one page at a time."""
+        token = None
+        while True:
+            params = dict(self.kwargs, limit=self.page_size)
+            if token:
+                params['_continue'] = token
+            page = self.list_function(**params)
+            yield page.items, page.metadata.resource_version
+            token = page.metadata._continue
+            if not token:
+                return
+
+    def list(self, printer, event=None):
+        """Print every object page by page; returns the count and the list's resourceVersion."""
+        count, resource_version = 0, None
+        for items, resource_version in self.pages():
+            printer.print_rows([self.row(obj, event) for obj in items])
+            count += len(items)
+        return count, resource_version
+
+    def watch(self, printer, resource_version):
+        """Print changes after ``resource_version`` until interrupted."""
+        from kubernetes import watch
+        from kubernetes.client.rest import ApiException
+
+        while True:
+            stream = watch.Watch()
+            try:
+                for event in stream.stream(self.list_function, resource_version=resource_version,
+                                           timeout_seconds=WATCH_TIMEOUT, allow_watch_bookmarks=True, **self.kwargs):
+                    if event['type'] != 'BOOKMARK':
+                        printer.print_rows([self.row(event['object'], event['type'])])
+                    resource_version = stream.resource_version or resource_version
+            except ApiException as e:
+                if e.status != HTTP_GONE:
+                    raise
+                # The version is too old to resume from; list again and watch from there.
+                _, resource_version = self.list(printer, event='ADDED')
+            else:
+                resource_version = stream.resource_version or resource_version
@@ -0,0 +1,111 @@
+"""Coalesce EC2 launches with identical specs into few run_instances calls.
+
+Instances that share AMI, type, key, security groups, tags and user data are
+launched together with MinCount/MaxCount instead of one call each.  A group
+larger than the chunk size is split into several calls, and the calls for
+distinct groups and chunks run concurrently.  Each request gets back its own
+share of the launched instances, in request order.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+LAUNCH_CHUNK = 100  # instances per run_instances call
+LAUNCH_WORKERS = 4
+
+
+def launch_spec(instance_type, ami_id, key_name=None, security_group_ids=(), tags=None, user_data=None):
+    """Build the run_instances arguments, other than the counts, for one spec."""
+    spec = {'InstanceType': instance_type, 'ImageId': ami_id}
+    if key_name:
+        spec['KeyName'] = key_name
+    if security_group_ids:
+        spec['SecurityGroupIds'] = sorted(security_group_ids)
+    if tags:
+        # RunInstances rejects a tag specification without tags.
+        spec['TagSpecifications'] = [{
+            'ResourceType': 'instance',
+            'Tags': [{'Key': key, 'Value': value} for key, value in sorted(tags.items())]
+        }]
+    if user_data:
+        spec['UserData'] = user_data
+    return spec
+
+
+def spec_key(spec):
+    return json.dumps(spec, sort_keys=True)
+
+
+def launch_instances(ec2, requests, chunk_size=LAUNCH_CHUNK, workers=LAUNCH_WORKERS):
+    """Launch ``requests``, a list of (spec, count), and return one instance list per request.
+
+    If any call fails the others still finish, and the raised exception names
+    the instances that were launched so they are not lost track of.
+    """
+    groups = {}
+    for idx, (spec, count) in enumerate(requests):
+        groups.setdefault(spec_key(spec), (spec, []))[1].append((idx, count))
+
+    calls = []
+    for key, (spec, members) in groups.items():
+        total = sum(count for _, count in members)
+        for start in range(0, total, chunk_size):
+            calls.append((key, spec, min(chunk_size, total - start)))
+    if not calls:
+        return [[] for _ in requests]
+
+    def run(call):
+        _, spec, count = call
+        return ec2.run_instances(MinCount=count, MaxCount=count, **spec)['Instances']
+
+    launched, errors = {}, []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(calls)))) as executor:
+        futures = [executor.submit(run, call) for call in calls]
+        for call, future in zip(calls, futures):
+            try:
+                launched.setdefault(call[0], []).extend(future.result())
+            except Exception as e:
+                errors.append(e)
+    if errors:
+        instance_ids = [instance['InstanceId'] for instances in launched.values() for instance in instances]
+        message = f"{len(errors)} of {len(calls)} launch call(s) failed: {errors[0]}"
+        if instance_ids:
+            message += f" (launched: {', '.join(instance_ids)})"
+        raise Exception(message)
+
+    results = [None] * len(requests)
+    for key, (_, members) in groups.items():
+        pool = launched.get(key, [])
+        offset = 0
+        for idx, count in members:
+            results[idx] = pool[offset:offset + count]
+            offset += count
+    return results
+
+
+class SharedLaunch:
+    """One coalesced launch whose members are claimed by separate callers.
+
+    The first member to call ``take`` launches every member's instances in one
+    go; the others get their share without another API call.
+    """
+
+    def __init__(self, ec2, spec, counts):
+        self.ec2 = ec2
+        self.spec = spec
+        self.counts = dict(counts)
+        self._lock = threading.Lock()
+        self._results = None
+        self._error = None
+
+    def take(self, member):
+        with self._lock:
+            if self._results is None and self._error is None:
+                try:
+                    results = launch_instances(self.ec2, [(self.spec, count) for count in self.counts.values()])
+                    self._results = dict(zip(self.counts, results))
+                except Exception as e:
+                    self._error = e
+        if self._error is not None:
+            raise self._error
+        return self._results[member]
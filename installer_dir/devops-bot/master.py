@@ -0,0 +1,336 @@
+"""Master server: worker registration, heartbeats, bulk listing and dispatch.
+
+The registry lives in memory, keyed by worker ID, so registering, heartbeating
+and looking up a worker are dictionary operations under a short lock.  A
+worker counts as healthy while its last registration or heartbeat is younger
+than the heartbeat TTL; workers silent for much longer are dropped.
+
+Tasks are dispatched from this directory without any AWS calls: each goes to
+the named worker or to the healthy worker with the lowest queue depth per
+slot, and the tasks bound for one worker are forwarded in one request, with
+all workers contacted concurrently.
+
+The app is served by gunicorn with a single process and a thread pool, see
+gunicorn_master_config.py.  One process is deliberate: more processes would
+each hold a different registry.
+"""
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from .http_client import http_get, http_post
+
+HEARTBEAT_TTL = 30  # seconds without a heartbeat before a worker is unhealthy
+PURGE_AFTER = 600  # seconds without a heartbeat before a worker is forgotten
+MASTER_THREADS = 64
+DISPATCH_WORKERS = 16  # workers contacted concurrently
+DISPATCH_CHUNK = 500  # tasks per forwarded request
+LOAD_REFRESH_INTERVAL = 10  # seconds between background load refreshes
+WORKER_TIMEOUT = 10  # seconds
+
+# What a worker may report about itself, and the types accepted.  Everything
+# else in a worker's entry (its URL, timestamps, load_reported_at) is set by
+# the registry and never taken from a request.
+NUMBER = (int, float)
+WORKER_FIELDS = {
+    'parallelism': NUMBER,
+    'queued': NUMBER,
+    'running': NUMBER,
+    'current_task': (str, type(None)),
+    'cpu_load': NUMBER,
+    'memory_percent': NUMBER,
+    'memory_available': NUMBER,
+    'disk_free': NUMBER,
+}
+
+
+def worker_fields(data):
+    """Return the known worker fields of a request body, dropping any other key or ill-typed value."""
+    return {key: data[key] for key, kinds in WORKER_FIELDS.items()
+            if key in data and isinstance(data[key], kinds) and not isinstance(data[key], bool)}
+
+
+class WorkerRegistry:
+    def __init__(self, heartbeat_ttl=HEARTBEAT_TTL, purge_after=PURGE_AFTER):
+        self.heartbeat_ttl = heartbeat_ttl
+        self.purge_after = purge_after
+        self._lock = threading.Lock()
+        self._workers = {}
+
+    def register(self, worker_id, worker_url, **info):
+        now = time.time()
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                worker = self._workers[worker_id] = {'worker_id': worker_id, 'registered_at': now}
+            worker.update(info, worker_url=worker_url, last_seen=now)
+        return worker
+
+    def heartbeat(self, worker_id, **info):
+        """Record a heartbeat; returns False for a worker that must re-register."""
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                return False
+            worker.update(info, last_seen=time.time())
+        return True
+
+    def report_load(self, worker_id, queued, running, **info):
+        """Record a worker's queue depth, as reported by the worker itself."""
+        return self.heartbeat(worker_id, queued=queued, running=running, load_reported_at=time.time(), **info)
+
+    def remove(self, worker_id):
+        with self._lock:
+            return self._workers.pop(worker_id, None) is not None
+
+    def _view(self, worker, now):
+        view = dict(worker)
+        view['age'] = round(now - worker['last_seen'], 1)
+        view['status'] = 'healthy' if view['age'] < self.heartbeat_ttl else 'expired'
+        return view
+
+    def get(self, worker_id):
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            return self._view(worker, time.time()) if worker else None
+
+    def list(self, status=None):
+        """Return a snapshot of every worker, optionally only 'healthy' or 'expired' ones."""
+        now = time.time()
+        with self._lock:
+            for worker_id in [worker_id for worker_id, worker in self._workers.items()
+                              if now - worker['last_seen'] > self.purge_after]:
+                del self._workers[worker_id]
+            views = [self._view(worker, now) for worker in self._workers.values()]
+        if status:
+            views = [view for view in views if view['status'] == status]
+        return views
+
+
+class Dispatcher:
+    """Route tasks to workers by reported queue depth.
+
+    Tasks sent to a worker since its last load report are counted on top of
+    that report, so one large batch spreads across workers instead of piling
+    onto whichever looked idle.
+    """
+
+    def __init__(self, registry, workers=DISPATCH_WORKERS, chunk_size=DISPATCH_CHUNK):
+        self.registry = registry
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._sent = {}  # worker_id -> (load_reported_at, tasks sent since)
+
+    def _depth(self, worker):
+        reported_at, sent = self._sent.get(worker['worker_id'], (None, 0))
+        if reported_at != worker.get('load_reported_at'):
+            sent = 0
+        return worker.get('queued', 0) + worker.get('running', 0) + sent
+
+    def assign(self, tasks):
+        """Return a worker ID, or an error, for each task in order."""
+        healthy = {worker['worker_id']: worker for worker in self.registry.list('healthy')}
+        assignments = []
+        with self._lock:
+            heap = [(self._depth(worker) / max(worker.get('parallelism', 1), 1), worker_id)
+                    for worker_id, worker in healthy.items()]
+            heapq.heapify(heap)
+            for task in tasks:
+                worker_id = task.get('worker_id')
+                if worker_id and worker_id not in healthy:
+                    assignments.append({'error': f"Worker {worker_id} is not registered or not healthy"})
+                    continue
+                if not worker_id:
+                    if not heap:
+                        assignments.append({'error': "No healthy workers available"})
+                        continue
+                    score, worker_id = heapq.heappop(heap)
+                    heapq.heappush(heap, (score + 1 / max(healthy[worker_id].get('parallelism', 1), 1), worker_id))
+                worker = healthy[worker_id]
+                reported_at, sent = self._sent.get(worker_id, (None, 0))
+                if reported_at != worker.get('load_reported_at'):
+                    reported_at, sent = worker.get('load_reported_at'), 0
+                self._sent[worker_id] = (reported_at, sent + 1)
+                assignments.append({'worker_id': worker_id})
+        return assignments, healthy
+
+    def dispatch(self, tasks):
+        """Assign and forward ``tasks`` (dicts with ``command`` and optional ``worker_id``)."""
+        assignments, healthy = self.assign(tasks)
+        batches = {}
+        for index, (task, assignment) in enumerate(zip(tasks, assignments)):
+            if 'worker_id' in assignment:
+                batches.setdefault(assignment['worker_id'], []).append(index)
+        calls = [(worker_id, indexes[start:start + self.chunk_size])
+                 for worker_id, indexes in batches.items()
+                 for start in range(0, len(indexes), self.chunk_size)]
+
+        def forward(call):
+            worker_id, indexes = call
+            response = http_post(f"{healthy[worker_id]['worker_url']}/execute_tasks",
+                                 json={'commands': [tasks[index]['command'] for index in indexes]},
+                                 timeout=WORKER_TIMEOUT)
+            response.raise_for_status()
+            return response.json()['job_ids']
+
+        if calls:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(calls))) as executor:
+                futures = [executor.submit(forward, call) for call in calls]
+                for (worker_id, indexes), future in zip(calls, futures):
+                    try:
+                        job_ids = future.result()
+                    except Exception as e:
+                        for index in indexes:
+                            assignments[index]['error'] = f"Failed to reach worker {worker_id}: {e}"
+                        continue
+                    for index, job_id in zip(indexes, job_ids):
+                        assignments[index]['job_id'] = job_id
+        return assignments
+
+    def refresh_loads(self, max_age=LOAD_REFRESH_INTERVAL):
+        """Ask healthy workers whose load report is older than ``max_age`` for their queue depth."""
+        now = time.time()
+        stale = [worker for worker in self.registry.list('healthy')
+                 if now - worker.get('load_reported_at', 0) > max_age]
+
+        def refresh(worker):
+            response = http_get(f"{worker['worker_url']}/tasks", params={'limit': 0}, timeout=WORKER_TIMEOUT)
+            response.raise_for_status()
+            counts = response.json()['counts']
+            self.registry.report_load(worker['worker_id'], counts['queued'], counts['running'])
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(stale))) as executor:
+                for future in [executor.submit(refresh, worker) for worker in stale]:
+                    try:
+                        future.result()
+                    except Exception:
+                        pass  # the worker's heartbeats decide whether it is healthy
+
+    def start_refresher(self, interval=LOAD_REFRESH_INTERVAL):
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.refresh_loads(interval)
+
+        threading.Thread(target=loop, daemon=True).start()
+
+
+def create_app(registry=None, dispatcher=None):
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+    registry = registry or WorkerRegistry()
+    if dispatcher is None:
+        dispatcher = Dispatcher(registry)
+        dispatcher.start_refresher()
+    app.config['REGISTRY'] = registry
+    app.config['DISPATCHER'] = dispatcher
+
+    def registration(data):
+        data = data if isinstance(data, dict) else {}
+        worker_id = data.get('worker_id')
+        worker_url = data.get('worker_url')
+        if not worker_id or not isinstance(worker_id, str) or not worker_url or not isinstance(worker_url, str):
+            return None
+        data = worker_fields(data)
+        parts = urlsplit(worker_url)
+        if parts.hostname in ('0.0.0.0', '::', '') and request.remote_addr:
+            # A worker bound to all interfaces is reached at the address it registered from.
+            netloc = f"{request.remote_addr}:{parts.port}" if parts.port else request.remote_addr
+            worker_url = urlunsplit(parts._replace(netloc=netloc))
+        if 'queued' in data and 'running' in data:
+            data['load_reported_at'] = time.time()
+        return registry.register(worker_id, worker_url, **data)
+
+    @app.route('/register_worker', methods=['POST'])
+    def register_worker():
+        worker = registration(request.get_json(silent=True))
+        if worker is None:
+            return jsonify({"error": "worker_id and worker_url are required"}), 400
+        return jsonify({"status": "registered", "worker_id": worker['worker_id'], "heartbeat_ttl": registry.heartbeat_ttl})
+
+    @app.route('/register_workers', methods=['POST'])
+    def register_workers():
+        workers = (request.get_json(silent=True) or {}).get('workers', [])
+        registered = sum(1 for data in workers if registration(data) is not None)
+        return jsonify({"registered": registered, "rejected": len(workers) - registered})
+
+    @app.route('/heartbeat', methods=['POST'])
+    def heartbeat():
+        data = request.get_json(silent=True)
+        data = data if isinstance(data, dict) else {}
+        worker_id = data.get('worker_id')
+        if not worker_id or not isinstance(worker_id, str):
+            return jsonify({"error": "worker_id is required"}), 400
+        data = worker_fields(data)
+        if 'queued' in data and 'running' in data:
+            known = registry.report_load(worker_id, **data)
+        else:
+            known = registry.heartbeat(worker_id, **data)
+        if not known:
+            return jsonify({"error": f"Worker {worker_id} is not registered"}), 404
+        return jsonify({"status": "ok"})
+
+    @app.route('/workers', methods=['GET'])
+    def list_workers():
+        return jsonify({"workers": registry.list(request.args.get('status'))})
+
+    @app.route('/workers/<worker_id>', methods=['GET'])
+    def get_worker(worker_id):
+        worker = registry.get(worker_id)
+        if worker is None:
+            return jsonify({"error": f"Worker {worker_id} is not registered"}), 404
+        return jsonify(worker)
+
+    @app.route('/workers/<worker_id>', methods=['DELETE'])
+    def remove_worker(worker_id):
+        if not registry.remove(worker_id):
+            return jsonify({"error": f"Worker {worker_id} is not registered"}), 404
+        return jsonify({"status": "removed", "worker_id": worker_id})
+
+    @app.route('/dispatch', methods=['POST'])
+    def dispatch():
+        data = request.get_json(silent=True) or {}
+        tasks = data['tasks'] if 'tasks' in data else [data]
+        if not tasks or not all(isinstance(task, dict) and task.get('command') for task in tasks):
+            return jsonify({"error": "every task needs a command"}), 400
+        results = dispatcher.dispatch(tasks)
+        failed = sum(1 for result in results if 'error' in result)
+        return jsonify({"results": results, "dispatched": len(results) - failed, "failed": failed})
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        return jsonify({"status": "ok", "workers": len(registry.list())})
+
+    return app
+
+
+def serve(app_factory, host, port, threads=MASTER_THREADS):
+    """Serve the app built by ``app_factory`` with gunicorn, or Flask's threaded server.
+
+    The app is built inside the gunicorn worker process, after the fork, so
+    the background threads it starts are alive where requests are handled.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # gunicorn does not run on Windows.
+        app_factory().run(host=host, port=port, threaded=True)
+        return
+
+    class MasterApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', 1)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', threads)
+            self.cfg.set('timeout', 120)
+
+        def load(self):
+            return app_factory()
+
+    MasterApplication().run()
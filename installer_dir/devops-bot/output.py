@@ -0,0 +1,44 @@
+"""Row writers shared by the inventory commands.
+
+Rows are dicts keyed by column name.  The ``jsonl`` and ``csv`` modes write
+each row as soon as it is produced, so listings of any size keep memory flat
+and show the first rows while later pages are still being fetched.  The
+``table`` mode needs every row to size its columns and collects them first.
+"""
+import csv
+import json
+
+import click
+
+OUTPUT_FORMATS = ['table', 'jsonl', 'csv']
+
+
+def write_rows(rows, output, columns, table_row=None):
+    """Write ``rows`` in ``output`` format and return the number written.
+
+    ``table_row`` optionally restyles a row for the table view only, e.g. to
+    colour a state column without putting escape codes in jsonl/csv output.
+    """
+    count = 0
+    if output == 'jsonl':
+        for row in rows:
+            click.echo(json.dumps({column: row.get(column) for column in columns}, default=str))
+            count += 1
+    elif output == 'csv':
+        stream = click.get_text_stream('stdout')
+        writer = csv.DictWriter(stream, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            stream.flush()
+            count += 1
+    else:
+        from tabulate import tabulate
+
+        table = []
+        for row in rows:
+            row = table_row(row) if table_row else row
+            table.append([row.get(column, '') for column in columns])
+        count = len(table)
+        click.echo(tabulate(table, columns, tablefmt="grid"))
+    return count
@@ -0,0 +1,112 @@
+"""Plan screenplay runs against a cached state snapshot.
+
+The resources a screenplay created are recorded per screenplay file under
+BASE_DIR, with a hash of each resource's spec and the IDs it owns.  Planning
+compares the screenplay with that record and sorts every resource into add,
+change or no-op, so a rerun only applies the delta.  Records younger than the
+TTL are trusted as they are; older ones are refreshed with one batched call
+per service covering only the resources in the screenplay.
+"""
+import hashlib
+import json
+import os
+import time
+
+import click
+from tabulate import tabulate
+
+from .common import BASE_DIR, ensure_user_folder
+
+STATE_FILE = os.path.join(BASE_DIR, "screenplay_state.json")
+STATE_TTL = 300  # seconds
+
+ACTION_SYMBOLS = {
+    'add': click.style('+', fg='green'),
+    'change': click.style('~', fg='yellow'),
+    'no-op': '=',
+}
+
+
+def spec_hash(spec):
+    """Hash the fields of a resource that decide what gets created."""
+    spec = {key: value for key, value in spec.items() if key != 'depends_on'}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class PlanEntry:
+    """What a run will do to one resource.
+
+    ``result`` is what a dependent sees for a no-op resource, and ``data``
+    holds whatever the apply step needs to carry out a change.
+    """
+
+    def __init__(self, name, service, action, detail='', result=None, data=None):
+        self.name = name
+        self.service = service
+        self.action = action
+        self.detail = detail
+        self.result = result
+        self.data = data or {}
+
+
+class ScreenplayState:
+    def __init__(self, screenplay_path, path=STATE_FILE):
+        self.path = path
+        self.key = os.path.abspath(screenplay_path)
+        self._all = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self._all = json.load(f)
+        self.records = self._all.setdefault(self.key, {})
+
+    def get(self, name):
+        return self.records.get(name)
+
+    def put(self, name, record):
+        self.records[name] = dict(record, refreshed_at=time.time())
+
+    def remove(self, name):
+        self.records.pop(name, None)
+
+    def is_fresh(self, name, ttl=STATE_TTL):
+        record = self.records.get(name)
+        return record is not None and time.time() - record['refreshed_at'] < ttl
+
+    def save(self):
+        if self.path == STATE_FILE:
+            ensure_user_folder()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._all, f)
+        os.replace(tmp_path, self.path)
+
+
+def plan_buckets(s3, state, buckets, refresh=False, ttl=STATE_TTL):
+    """Plan s3_buckets entries; stale records cost one list_buckets call in total."""
+    stale = [bucket['name'] for bucket in buckets if refresh or not state.is_fresh(f"s3:{bucket['name']}", ttl)]
+    if stale:
+        existing = {bucket['Name'] for bucket in s3.list_buckets()['Buckets']}
+        for name in stale:
+            if name in existing:
+                state.put(f"s3:{name}", {'exists': True})
+            else:
+                state.remove(f"s3:{name}")
+
+    entries = {}
+    for bucket in buckets:
+        name = f"s3:{bucket['name']}"
+        if state.get(name):
+            entries[name] = PlanEntry(name, 's3', 'no-op', "bucket exists")
+        else:
+            entries[name] = PlanEntry(name, 's3', 'add', f"create bucket in {bucket.get('region') or 'default region'}")
+    return entries
+
+
+def print_plan(entries):
+    counts = {'add': 0, 'change': 0, 'no-op': 0}
+    table = []
+    for entry in entries:
+        counts[entry.action] += 1
+        table.append([ACTION_SYMBOLS[entry.action], entry.name, entry.action, entry.detail])
+    click.echo(tabulate(table, ["", "Resource", "Action", "Detail"], tablefmt="grid"))
+    click.echo(f"Plan: {counts['add']} to add, {counts['change']} to change, {counts['no-op']} unchanged.")
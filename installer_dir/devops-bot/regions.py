@@ -0,0 +1,102 @@
+"""Run one inventory query per AWS region concurrently and merge the results.
+
+Each region's rows are tagged with a ``Region`` column and streamed to the
+caller as they arrive.  A region that fails is recorded in the report instead
+of aborting the listing, so one throttled or disabled region does not hide
+the other seven.
+"""
+import queue
+import threading
+import time
+
+import click
+
+from .aws_clients import get_client
+
+REGION_COLUMN = "Region"
+REGION_WORKERS = 8
+
+_DONE = object()
+
+
+def resolve_regions(value, credentials):
+    """Turn a --regions value into a list of region names.
+
+    ``None`` means the region saved with the credentials, ``all`` means every
+    region enabled for the account, anything else is a comma-separated list.
+    """
+    if not value:
+        return [(credentials or {}).get('region_name') or 'us-east-1']
+    if value.strip() == 'all':
+        ec2 = get_client('ec2', credentials)
+        response = ec2.describe_regions()
+        return sorted(region['RegionName'] for region in response['Regions'])
+    return [region.strip() for region in value.split(',') if region.strip()]
+
+
+class RegionFanOut:
+    """Iterate rows from ``fetch(region)`` for several regions at once.
+
+    ``fetch`` returns an iterable of row dicts for one region.  Iterating the
+    fan-out yields rows from all regions in arrival order; ``results`` holds
+    each region's row count, latency and error once iteration finishes.
+    """
+
+    def __init__(self, regions, fetch, workers=REGION_WORKERS):
+        self.regions = list(regions)
+        self.fetch = fetch
+        self.workers = max(1, min(workers, len(self.regions)))
+        self.results = {}
+
+    def _run(self, pending, rows):
+        while True:
+            try:
+                region = pending.get_nowait()
+            except queue.Empty:
+                return
+            start = time.monotonic()
+            result = {'rows': 0, 'seconds': 0.0, 'error': None}
+            try:
+                for row in self.fetch(region):
+                    row[REGION_COLUMN] = region
+                    rows.put(row)
+                    result['rows'] += 1
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['seconds'] = time.monotonic() - start
+            self.results[region] = result
+            rows.put(_DONE)
+
+    def __iter__(self):
+        pending = queue.Queue()
+        for region in self.regions:
+            pending.put(region)
+        # Bounded so a fast region cannot buffer unlimited rows ahead of the writer.
+        rows = queue.Queue(maxsize=1000)
+        threads = [threading.Thread(target=self._run, args=(pending, rows), daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        remaining = len(self.regions)
+        while remaining:
+            row = rows.get()
+            if row is _DONE:
+                remaining -= 1
+            else:
+                yield row
+        for thread in threads:
+            thread.join()
+
+    def failed(self):
+        return {region: result['error'] for region, result in self.results.items() if result['error']}
+
+    def report(self):
+        """Print per-region latency and errors to stderr."""
+        for region in self.regions:
+            result = self.results.get(region)
+            if result is None:
+                continue
+            line = f"{region}: {result['rows']} rows in {result['seconds']:.2f}s"
+            if result['error']:
+                click.echo(click.style(f"{line} - failed: {result['error']}", fg="red"), err=True)
+            else:
+                click.echo(line, err=True)
@@ -0,0 +1,166 @@
+"""Dependency-aware executor for dob-screenplay resources.
+
+A screenplay is turned into tasks, one per resource, each naming the tasks it
+depends on.  Tasks whose dependencies have finished run concurrently on a
+bounded thread pool, with a separate in-flight limit per service so a large
+screenplay cannot flood one API.  A task whose dependency failed is skipped.
+Every task records its start and end time, and the report shows them as a
+timeline together with the critical path.
+"""
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import click
+from tabulate import tabulate
+
+SCREENPLAY_WORKERS = 16
+SERVICE_LIMITS = {'ec2': 4, 's3': 8, 'ebs': 4}
+
+
+class ScreenplayTask:
+    """One screenplay resource.
+
+    ``run`` receives a dict mapping each dependency name to that task's result
+    and returns this task's result.
+    """
+
+    def __init__(self, name, service, run, depends_on=()):
+        self.name = name
+        self.service = service
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.status = 'pending'
+        self.result = None
+        self.error = None
+        self.start = None
+        self.end = None
+
+
+class ScreenplayExecutor:
+    def __init__(self, tasks, workers=SCREENPLAY_WORKERS, limits=None):
+        self.tasks = {}
+        for task in tasks:
+            if task.name in self.tasks:
+                raise click.ClickException(f"Duplicate screenplay resource '{task.name}'.")
+            self.tasks[task.name] = task
+        self.workers = max(1, workers)
+        self.limits = dict(SERVICE_LIMITS, **(limits or {}))
+        for service, limit in self.limits.items():
+            if limit < 1:
+                raise click.ClickException(f"Concurrency limit for {service} must be at least 1, got {limit}.")
+        self.started = None
+        self._check_graph()
+
+    def _check_graph(self):
+        for task in self.tasks.values():
+            for dependency in task.depends_on:
+                if dependency not in self.tasks:
+                    raise click.ClickException(f"Resource '{task.name}' depends on unknown resource '{dependency}'.")
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visited:
+                return
+            if name in visiting:
+                cycle = path[path.index(name):] + [name]
+                raise click.ClickException(f"Screenplay dependency cycle: {' -> '.join(cycle)}")
+            visiting.add(name)
+            for dependency in self.tasks[name].depends_on:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.tasks:
+            visit(name, [])
+
+    def _execute(self, task):
+        task.start = time.monotonic() - self.started
+        try:
+            return task.run({dependency: self.tasks[dependency].result for dependency in task.depends_on})
+        finally:
+            task.end = time.monotonic() - self.started
+
+    def _skip_blocked(self, pending):
+        """Skip pending tasks with a failed or skipped dependency, down the whole chain."""
+        changed = True
+        while changed:
+            changed = False
+            for task in list(pending.values()):
+                blocked = next((self.tasks[name] for name in task.depends_on
+                                if self.tasks[name].status in ('failed', 'skipped')), None)
+                if blocked:
+                    task.status = 'skipped'
+                    task.error = f"dependency {blocked.name} {blocked.status}"
+                    del pending[task.name]
+                    click.echo(click.style(f"Skipping {task.name}: {task.error}", fg="yellow"))
+                    changed = True
+
+    def run(self):
+        """Run every task and return True if all of them succeeded."""
+        self.started = time.monotonic()
+        # Tasks can be handed in already done (unchanged resources) or skipped.
+        pending = {name: task for name, task in self.tasks.items() if task.status == 'pending'}
+        running = {}
+        in_flight = Counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                self._skip_blocked(pending)
+                for task in list(pending.values()):
+                    dependencies = [self.tasks[name] for name in task.depends_on]
+                    if len(running) >= self.workers or in_flight[task.service] >= self.limits.get(task.service, self.workers):
+                        continue
+                    if all(dep.status == 'done' for dep in dependencies):
+                        task.status = 'running'
+                        in_flight[task.service] += 1
+                        running[executor.submit(self._execute, task)] = task
+                        del pending[task.name]
+                if not running:
+                    if pending:
+                        # Nothing in flight can unblock the rest; waiting would spin forever.
+                        raise click.ClickException(f"No screenplay resource can start: {', '.join(sorted(pending))}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    in_flight[task.service] -= 1
+                    try:
+                        task.result = future.result()
+                        task.status = 'done'
+                    except Exception as e:
+                        task.error = str(e)
+                        task.status = 'failed'
+                        click.echo(click.style(f"{task.name} failed: {e}", fg="red"))
+        return all(task.status == 'done' for task in self.tasks.values())
+
+    def critical_path(self):
+        """Return the chain of tasks that determined the total run time."""
+        finished = [task for task in self.tasks.values() if task.end is not None]
+        if not finished:
+            return []
+        task = max(finished, key=lambda t: t.end)
+        path = [task]
+        while True:
+            dependencies = [self.tasks[name] for name in task.depends_on if self.tasks[name].end is not None]
+            if not dependencies:
+                break
+            task = max(dependencies, key=lambda t: t.end)
+            path.append(task)
+        return list(reversed(path))
+
+    def report(self):
+        """Print the per-resource timeline and the critical path."""
+        critical = {task.name for task in self.critical_path()}
+        ordered = sorted(self.tasks.values(), key=lambda t: (t.start is None, t.start or 0, t.name))
+        table = []
+        for task in ordered:
+            started = f"{task.start:.2f}" if task.start is not None else '-'
+            duration = f"{task.end - task.start:.2f}" if task.end is not None else '-'
+            status = 'unchanged' if task.status == 'done' and task.start is None else task.status
+            if task.error:
+                status = f"{status}: {task.error}"
+            table.append(['*' if task.name in critical else '', task.name, task.service, started, duration, status])
+        click.echo(tabulate(table, ["", "Resource", "Service", "Start (s)", "Duration (s)", "Status"], tablefmt="grid"))
+        path = self.critical_path()
+        if path:
+            click.echo(f"Critical path ({path[-1].end:.2f}s): {' -> '.join(task.name for task in path)}")
@@ -0,0 +1,113 @@
+"""In-process cache of encryption keys, Fernet ciphers and decrypted files.
+
+Entries are keyed by the files they were read from and invalidated when any
+of those files changes mtime, inode or size, so a re-run of ``configure-aws``
+or a regenerated key is picked up without restarting the process.  A cached
+lookup costs one ``stat`` per file and no reads or crypto work.
+"""
+import os
+import threading
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SecretCache:
+    """Counts one hit or miss per public call, under the lock.
+
+    Loaders build their values with the uncounted ``_cipher`` and
+    ``_read_file`` so a miss on ``decrypt`` is not also counted as the reads
+    and cipher lookup it needed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._ciphers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, name, paths, loader):
+        signature = tuple(_signature(path) for path in paths)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            value = loader()
+            self._entries[name] = (signature, value)
+        return value
+
+    def _cipher(self, key):
+        from cryptography.fernet import Fernet
+
+        with self._lock:
+            cipher = self._ciphers.get(key)
+            if cipher is None:
+                cipher = self._ciphers[key] = Fernet(key)
+        return cipher
+
+    def fernet(self, key):
+        """Return a ready-made Fernet cipher for raw key bytes."""
+        with self._lock:
+            if key in self._ciphers:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return self._cipher(key)
+
+    def read(self, path):
+        """Return the bytes of ``path``, re-reading only when it changed."""
+        return self._lookup(('read', path), (path,), lambda: _read_file(path))
+
+    def decrypt(self, path, key_path):
+        """Return the decrypted text of ``path`` using the key in ``key_path``."""
+        def loader():
+            return self._cipher(_read_file(key_path)).decrypt(_read_file(path)).decode()
+        return self._lookup(('decrypt', path, key_path), (path, key_path), loader)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._ciphers.clear()
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+_cache = SecretCache()
+
+
+def get_fernet(key):
+    return _cache.fernet(key)
+
+
+def read_cached(path):
+    return _cache.read(path)
+
+
+def decrypt_file_cached(path, key_path):
+    return _cache.decrypt(path, key_path)
+
+
+def invalidate_secrets():
+    _cache.invalidate()
+
+
+def secret_cache_stats():
+    return _cache.stats()
@@ -0,0 +1,78 @@
+"""Shared fixtures: import the package as ``devops_bot`` with a throwaway HOME.
+
+The source directory is named ``devops-bot``, which is not importable, so it
+is registered under its installed name before any test module imports it.
+HOME is pointed at a temporary directory first because BASE_DIR and the
+other paths in ``common`` are resolved at import time.
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['HOME'] = tempfile.mkdtemp(prefix='devops-bot-tests-')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SECURITY_TOKEN', 'AWS_SESSION_TOKEN'):
+    os.environ[name] = 'testing'
+
+if 'devops_bot' not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        'devops_bot', os.path.join(PACKAGE_DIR, '__init__.py'), submodule_search_locations=[PACKAGE_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['devops_bot'] = module
+    spec.loader.exec_module(module)
+
+
+@pytest.fixture(autouse=True)
+def clean_base_dir():
+    """Leave BASE_DIR empty for the next test; its paths are fixed at import."""
+    yield
+    from devops_bot import common
+
+    shutil.rmtree(common.BASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def aws():
+    """Start moto and return a function building clients for it."""
+    moto = pytest.importorskip('moto')
+    import boto3
+
+    from devops_bot.aws_clients import clear_clients
+
+    with moto.mock_aws():
+        clear_clients()
+        yield lambda service: boto3.client(service, region_name='us-east-1')
+    clear_clients()
+
+
+@pytest.fixture
+def key():
+    """Make sure the local encryption key exists and return it."""
+    from devops_bot import common
+
+    os.makedirs(common.BASE_DIR, exist_ok=True)
+    if not os.path.exists(common.KEY_FILE):
+        common.generate_key()
+    return common.load_key()
+
+
+@pytest.fixture
+def aws_credentials(aws, key):
+    """Save fake AWS credentials the way ``configure-aws`` does."""
+    from devops_bot import common
+    from devops_bot.commands import aws as aws_commands
+
+    aws_commands.save_aws_credentials('testing', 'testing', 'us-east-1')
+    return common.load_aws_credentials()
+
+
+@pytest.fixture
+def ami_id(aws):
+    """An image moto ships by default; describe_images would load all of them."""
+    return 'ami-12c6146b'
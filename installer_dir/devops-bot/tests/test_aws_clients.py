@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from devops_bot import aws_clients
+from devops_bot.aws_clients import ClientRegistry
+
+ALICE = {'aws_access_key_id': 'AKIAALICE', 'aws_secret_access_key': 'alice-secret', 'region_name': 'us-east-1'}
+BOB = {'aws_access_key_id': 'AKIABOB', 'aws_secret_access_key': 'bob-secret', 'region_name': 'us-east-1'}
+
+
+def test_clients_are_shared_per_service_region_and_credentials():
+    registry = ClientRegistry()
+    s3 = registry.get_client('s3', ALICE)
+
+    assert registry.get_client('s3', dict(ALICE)) is s3
+    assert registry.get_client('s3', ALICE, region_name='us-east-1') is s3
+    assert registry.get_client('ec2', ALICE) is not s3
+    assert registry.get_client('s3', ALICE, region_name='eu-west-1') is not s3
+    assert registry.get_client('s3', BOB) is not s3
+    assert registry.get_client('s3', dict(ALICE, aws_session_token='token')) is not s3
+    assert registry.get_client('s3', ALICE, region_name='eu-west-1').meta.region_name == 'eu-west-1'
+    assert s3.meta.config.max_pool_connections == aws_clients.MAX_POOL_CONNECTIONS
+
+
+def test_sessions_are_shared_per_credentials_and_region():
+    registry = ClientRegistry()
+    session = registry.get_session(ALICE)
+    assert registry.get_session(ALICE, 'us-east-1') is session
+    assert registry.get_session(ALICE, 'eu-west-1') is not session
+    assert registry.get_session(BOB) is not session
+
+
+def test_keys_do_not_hold_secrets():
+    registry = ClientRegistry()
+    registry.get_client('s3', ALICE)
+    assert 'alice-secret' not in repr(list(registry._clients)) + repr(list(registry._sessions))
+    assert aws_clients._credential_key(None) is None
+
+
+def test_concurrent_callers_get_one_client():
+    registry = ClientRegistry()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        clients = list(executor.map(lambda _: registry.get_client('ec2', ALICE), range(64)))
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_shared_clients_talk_to_moto_and_can_be_cleared(aws):
+    aws('s3').create_bucket(Bucket='shared-client')
+    s3 = aws_clients.get_client('s3', ALICE)
+    assert [bucket['Name'] for bucket in s3.list_buckets()['Buckets']] == ['shared-client']
+
+    aws_clients.clear_clients()
+    assert aws_clients.get_client('s3', ALICE) is not s3
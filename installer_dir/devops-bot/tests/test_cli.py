@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from devops_bot.cli import COMMANDS, GROUPS, cli
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_top_level_commands_route_to_their_groups():
+    ctx = click.Context(cli)
+    for name, (group_name, short_help) in COMMANDS.items():
+        command = cli.get_command(ctx, name)
+        assert command is cli.get_command(ctx, group_name).commands[name]
+        # The listing repeats each command's help so it can be shown without importing anything.
+        assert command.get_short_help_str(200) == short_help, name
+    assert cli.get_command(ctx, 'no-such-command') is None
+
+
+@pytest.mark.parametrize('name', sorted(COMMANDS) + sorted(GROUPS))
+def test_help_works_for_every_lazy_command(name):
+    result = CliRunner().invoke(cli, [name, '--help'])
+    assert result.exit_code == 0, result.output
+    assert 'Usage:' in result.output
+
+
+def test_group_commands_run_through_the_group():
+    result = CliRunner().invoke(cli, ['jenkins', 'sync', '--help'])
+    assert result.exit_code == 0, result.output
+    assert '--dry-run' in result.output
+
+
+def test_listing_shows_groups_and_commands():
+    result = CliRunner().invoke(cli, ['--help'])
+    assert result.exit_code == 0
+    assert 'Command groups:' in result.output
+    assert 'list-ec2' in result.output and COMMANDS['list-ec2'][1] in result.output
+    assert CliRunner().invoke(cli, ['no-such-command']).exit_code == 2
+
+
+def test_top_level_help_imports_no_command_module():
+    script = f"""
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location(
+    'devops_bot', {os.path.join(PACKAGE_DIR, '__init__.py')!r}, submodule_search_locations=[{PACKAGE_DIR!r}])
+sys.modules['devops_bot'] = module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+from devops_bot.cli import cli
+try:
+    cli(['--help'])
+except SystemExit:
+    pass
+print(sorted(name for name in sys.modules if name.split('.')[0] in {{'boto3', 'kubernetes', 'paramiko', 'flask'}}
+             or name.startswith('devops_bot.commands.')))
+"""
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import urllib3.util.retry
+
+from devops_bot.http_client import HttpClientRegistry
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections alive
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self.server.calls.append((self.command, self.path))
+        status = 503 if self.server.failures.get(self.path, 0) > 0 else 200
+        if status == 503:
+            self.server.failures[self.path] -= 1
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.calls, server.failures = [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_share_one_connection_per_host(server):
+    _, url = server
+    registry = HttpClientRegistry()
+    for index in range(10):
+        assert registry.request('GET', f"{url}/item/{index}").status_code == 200
+    assert registry.stats() == {url: {'requests': 10, 'connections': 1}}
+    registry.clear()
+    assert registry.stats() == {}
+
+
+def test_get_is_retried_but_post_is_not(server, monkeypatch):
+    monkeypatch.setattr('devops_bot.http_client.BACKOFF_FACTOR', 0)
+    httpd, url = server
+    registry = HttpClientRegistry()
+    httpd.failures.update({'/get': 2, '/post': 2})
+
+    assert registry.request('GET', f"{url}/get").status_code == 200
+    assert registry.request('POST', f"{url}/post").status_code == 503
+    assert httpd.calls.count(('GET', '/get')) == 3
+    assert httpd.calls.count(('POST', '/post')) == 1
+
+
+def test_retry_falls_back_to_method_whitelist(monkeypatch):
+    class OldRetry:
+        DEFAULT_METHOD_WHITELIST = frozenset(['GET'])
+
+        def __init__(self, method_whitelist, **options):
+            self.method_whitelist = method_whitelist
+            self.options = options
+
+    monkeypatch.setattr(urllib3.util.retry, 'Retry', OldRetry)
+    retry = HttpClientRegistry()._retry()
+    assert retry.method_whitelist == frozenset(['GET'])
+    assert retry.options['total'] == 3
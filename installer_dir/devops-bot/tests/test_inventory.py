@@ -0,0 +1,51 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from devops_bot.inventory import Inventory
+
+
+def make_instance(index, state='running', role=None):
+    instance = {
+        'InstanceId': f"i-{index:05d}",
+        'State': {'Name': state},
+        'InstanceType': 't2.micro' if index % 2 else 't3.small',
+        'LaunchTime': datetime(2024, 7, 25, tzinfo=timezone.utc),
+        'Tags': [{'Key': 'Role', 'Value': role}] if role else [],
+    }
+    return instance
+
+
+def test_query_accepts_more_ids_than_sqlite_parameters(tmp_path, monkeypatch):
+    if not hasattr(sqlite3.Connection, 'setlimit'):
+        pytest.skip("needs Python 3.11 to lower the parameter limit")
+    connect = Inventory._connect
+
+    def limited_connect(self):
+        conn = connect(self)
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)  # the default before SQLite 3.32
+        return conn
+
+    monkeypatch.setattr(Inventory, '_connect', limited_connect)
+    inventory = Inventory(str(tmp_path / 'inventory.sqlite3'))
+    inventory.replace_region('us-east-1', [make_instance(index, 'running' if index % 3 else 'stopped')
+                                           for index in range(3000)])
+    wanted = [f"i-{index:05d}" for index in range(0, 3000, 2)] + ['i-missing']
+
+    found = list(inventory.query(instance_ids=wanted, states=['running']))
+    expected = [f"i-{index:05d}" for index in range(0, 3000, 2) if index % 3]
+    assert [instance['InstanceId'] for instance in found] == expected
+    assert found[0]['LaunchTime'] == datetime(2024, 7, 25, tzinfo=timezone.utc)
+
+
+def test_query_combines_filters(tmp_path):
+    inventory = Inventory(str(tmp_path / 'inventory.sqlite3'))
+    inventory.replace_region('us-east-1', [make_instance(1, role='worker'), make_instance(2, role='master')])
+    inventory.replace_region('eu-west-1', [make_instance(3, role='worker')])
+
+    assert [i['InstanceId'] for i in inventory.query(role='worker')] == ['i-00001', 'i-00003']
+    assert [i['InstanceId'] for i in inventory.query(region='us-east-1', tags=['Role=worker'])] == ['i-00001']
+    assert [i['InstanceId'] for i in inventory.query(instance_types=['t3.small'], tags=['Role'])] == ['i-00002']
+    inventory.set_state(['i-00001'], 'stopped')
+    assert [i['InstanceId'] for i in inventory.query(states=['stopped'])] == ['i-00001']
@@ -0,0 +1,170 @@
+import threading
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from devops_bot.aws_clients import get_client
+from devops_bot.commands import jenkins
+from devops_bot.common import JENKINS_CREDENTIALS_BUCKET, JENKINS_CREDENTIALS_FILE, load_aws_credentials
+
+
+@pytest.fixture
+def jenkins_home(tmp_path, monkeypatch):
+    # The Jenkins key file lives in the working directory.
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def s3_gets(aws_credentials, jenkins_home):
+    """Count GetObject calls and their status codes on the shared S3 client."""
+    statuses = []
+    s3 = get_client('s3', load_aws_credentials())
+    s3.meta.events.register('after-call.s3.GetObject',
+                            lambda http_response, **kwargs: statuses.append(http_response.status_code))
+    return statuses
+
+
+def configure(url='https://ci.example.com', token='token-1'):
+    jenkins.save_jenkins_credentials_to_s3(url, 'build', 'admin', token)
+
+
+def test_fresh_cache_needs_no_s3_call(s3_gets):
+    configure()
+    for _ in range(5):
+        assert jenkins.load_jenkins_credentials_from_s3()['api_token'] == 'token-1'
+    assert s3_gets == []
+
+
+def test_stale_cache_is_revalidated(s3_gets):
+    configure()
+    assert jenkins.load_jenkins_credentials_from_s3(ttl=0)['api_token'] == 'token-1'
+    assert s3_gets == [304]
+    assert jenkins.load_jenkins_credentials_from_s3()['api_token'] == 'token-1'
+    assert s3_gets == [304]  # the revalidation restarted the TTL
+
+
+def test_changed_object_is_downloaded_again(s3_gets, aws):
+    configure()
+    # Another machine rewrites the credentials with the same key.
+    encrypted = jenkins.encrypt_jenkins_data('{"jenkins_url": "https://ci.example.com", "job_name": "build", '
+                                             '"username": "admin", "api_token": "token-2"}', jenkins.load_jenkins_key())
+    aws('s3').put_object(Bucket=JENKINS_CREDENTIALS_BUCKET, Key=JENKINS_CREDENTIALS_FILE, Body=encrypted)
+
+    assert jenkins.load_jenkins_credentials_from_s3()['api_token'] == 'token-1'
+    assert jenkins.load_jenkins_credentials_from_s3(refresh=True)['api_token'] == 'token-2'
+    assert jenkins.load_jenkins_credentials_from_s3()['api_token'] == 'token-2'
+    assert s3_gets == [200]
+
+
+def test_missing_credentials_object_reports_an_error(s3_gets, capsys):
+    jenkins.generate_jenkins_key()
+    assert jenkins.load_jenkins_credentials_from_s3() is None
+    assert 'Error loading credentials from S3' in capsys.readouterr().out
+
+
+class FakeJobsApi:
+    """Answer createItem and config.xml posts; jobs in ``broken`` get a 500."""
+
+    def __init__(self, existing=(), broken=()):
+        self.jobs = set(existing)
+        self.broken = set(broken)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def post(self, url, params=None, data=None, headers=None, auth=None):
+        if url.endswith('/createItem'):
+            job_name, action = params['name'], 'create'
+        else:
+            job_name, action = url.split('/job/')[1].split('/')[0], 'update'
+        with self._lock:
+            self.calls.append((action, job_name))
+        if job_name in self.broken:
+            return FakeResponse(500, 'boom')
+        if action == 'create':
+            if job_name in self.jobs:
+                return FakeResponse(400, 'A job already exists with the name')
+            self.jobs.add(job_name)
+            return FakeResponse(200)
+        return FakeResponse(200 if job_name in self.jobs else 404)
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+@pytest.fixture
+def jobs_api(monkeypatch, jenkins_home):
+    api = FakeJobsApi()
+    monkeypatch.setattr(jenkins, 'http_post', api.post)
+    monkeypatch.setattr(jenkins, 'load_jenkins_credentials_from_s3',
+                        lambda: {'jenkins_url': 'https://ci.example.com', 'username': 'admin', 'api_token': 'token-1'})
+    return api
+
+
+@pytest.fixture
+def pipelines(tmp_path):
+    directory = tmp_path / 'pipelines'
+    (directory / 'services' / 'api').mkdir(parents=True)
+    (directory / 'Jenkinsfile').write_text("pipeline { stages { stage('root') {} } }")
+    (directory / 'services' / 'api' / 'Jenkinsfile').write_text("pipeline { stages { stage('api') {} } }")
+    (directory / 'deploy.Jenkinsfile').write_text("pipeline { stages { stage('deploy') {} } }")
+    (directory / 'README.md').write_text("not a pipeline")
+    return directory
+
+
+def sync(*args):
+    result = CliRunner().invoke(jenkins.sync_jenkins_jobs, [str(arg) for arg in args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_jenkinsfiles_are_named_after_their_location(pipelines):
+    jobs = jenkins.find_jenkinsfiles(str(pipelines))
+    assert sorted(jobs) == ['deploy', 'pipelines', 'services-api']
+
+    (pipelines / 'services-api.Jenkinsfile').write_text("pipeline {}")
+    with pytest.raises(click.ClickException, match="Job 'services-api' is defined by both"):
+        jenkins.find_jenkinsfiles(str(pipelines))
+
+
+def test_sync_pushes_only_changed_jobs(jobs_api, pipelines):
+    jobs_api.jobs.add('deploy')  # created by hand, unknown to the sync record
+    assert sync(pipelines).endswith("2 created, 1 updated, 0 failed, 0 unchanged.\n")
+    assert sorted(jobs_api.calls) == [('create', 'deploy'), ('create', 'pipelines'),
+                                      ('create', 'services-api'), ('update', 'deploy')]
+
+    jobs_api.calls.clear()
+    assert sync(pipelines).endswith("0 job(s) to push, 3 unchanged.\n")
+    assert jobs_api.calls == []
+
+    (pipelines / 'deploy.Jenkinsfile').write_text("pipeline { stages { stage('deploy v2') {} } }")
+    assert sync(pipelines).endswith("0 created, 1 updated, 0 failed, 2 unchanged.\n")
+    assert jobs_api.calls == [('update', 'deploy')]  # a synced job is updated without trying createItem
+
+
+def test_dry_run_contacts_nobody(jobs_api, pipelines):
+    output = sync(pipelines, '--dry-run')
+    assert '~ services-api (' in output
+    assert output.endswith("3 job(s) to push, 0 unchanged.\n")
+    assert jobs_api.calls == []
+
+
+def test_failed_jobs_are_reported_and_retried(jobs_api, pipelines):
+    jobs_api.broken.add('deploy')
+    output = sync(pipelines)
+    assert 'HTTP 500: boom' in output
+    assert output.endswith("2 created, 0 updated, 1 failed, 0 unchanged.\n")
+
+    jobs_api.broken.clear()
+    jobs_api.calls.clear()
+    assert sync(pipelines).endswith("1 created, 0 updated, 0 failed, 2 unchanged.\n")
+    assert jobs_api.calls == [('create', 'deploy')]
+
+
+def test_force_pushes_everything(jobs_api, pipelines):
+    sync(pipelines)
+    assert sync(pipelines, '--force').endswith("0 created, 3 updated, 0 failed, 0 unchanged.\n")
@@ -0,0 +1,140 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from click.testing import CliRunner
+
+from devops_bot import jenkins_builds
+from devops_bot.commands import jenkins
+
+CONSOLE = ['Started\n', 'Building ✓\n', 'Finished\n']
+
+
+class FakeJenkins(BaseHTTPRequestHandler):
+    """Queues each build request, starts it on the second queue poll and
+    serves its console one chunk per progressive-text request."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+        job_name = self.path.split('/')[2]
+        if job_name == 'broken':
+            return self.reply(500, b'boom')
+        if job_name == 'merged' and job_name in state['queued']:
+            queue_id = state['queued'][job_name]
+        else:
+            queue_id = len(state['queue']) + 1
+            state['queue'][queue_id] = {'job': job_name, 'polls': 0, 'number': None}
+            state['queued'][job_name] = queue_id
+        self.reply(201, headers={'Location': f"{self.server.url}/queue/item/{queue_id}/"})
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[0] == 'queue':
+            item = state['queue'][int(parts[2])]
+            if item['job'] == 'flaky':
+                return self.reply(500)
+            if item['job'] == 'cancelled':
+                return self.reply(200, b'{"cancelled": true}')
+            item['polls'] += 1
+            if item['polls'] < 2:
+                return self.reply(200, b'{}')
+            if item['number'] is None:
+                state['numbers'][item['job']] = item['number'] = state['numbers'].get(item['job'], 0) + 1
+            build_url = f"{self.server.url}/job/{item['job']}/{item['number']}/"
+            return self.reply(200, json.dumps({'executable': {'number': item['number'], 'url': build_url}}).encode())
+        job_name, number = parts[1], parts[2]
+        if parts[3] == 'logText':
+            console = ''.join(f"{job_name}#{number} {line}" for line in CONSOLE).encode()
+            start = int(parse_qs(url.query)['start'][0])
+            end = min(len(console), start + 12)
+            headers = {'X-Text-Size': str(end)}
+            if end < len(console):
+                headers['X-More-Data'] = 'true'
+            state['console_bytes'] += end - start
+            return self.reply(200, console[start:end], headers)
+        result = 'FAILURE' if job_name == 'bad' else 'SUCCESS'
+        return self.reply(200, json.dumps({'building': False, 'result': result}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def jenkins_server(monkeypatch):
+    monkeypatch.setattr(jenkins_builds, 'MIN_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(jenkins_builds, 'MAX_POLL_INTERVAL', 0.05)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeJenkins)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.state = {'queue': {}, 'queued': {}, 'numbers': {}, 'console_bytes': 0}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    credentials = {'jenkins_url': server.url, 'username': 'admin', 'api_token': 'token'}
+    monkeypatch.setattr(jenkins, 'load_jenkins_credentials_from_s3', lambda *args, **kwargs: credentials)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def follow(*job_names):
+    return CliRunner().invoke(jenkins.trigger_jenkins_job_command, ['--follow', *job_names])
+
+
+def test_follow_streams_console_once(jenkins_server):
+    result = follow('app')
+    assert result.exit_code == 0, result.output
+    console = ''.join(f"app#1 {line}" for line in CONSOLE)
+    assert console in result.output
+    assert jenkins_server.state['console_bytes'] == len(console.encode())
+    assert 'app #1: SUCCESS' in result.output
+
+
+def test_same_job_followed_twice_keeps_both_results(jenkins_server):
+    result = follow('app', 'app', 'bad')
+    assert result.exit_code == 1, result.output
+    rows = [line for line in result.output.splitlines() if line.startswith('| ') and '#' in line]
+    assert [[cell.strip() for cell in row.split('|')[1:3]] for row in rows] == [
+        ['app #1', 'SUCCESS'], ['app #2', 'SUCCESS'], ['bad #1', 'FAILURE']
+    ]
+    assert '[app #2] app#2 Finished' in result.output
+
+
+def test_builds_without_numbers_keep_separate_results(jenkins_server):
+    result = follow('cancelled', 'cancelled')
+    assert result.exit_code == 1
+    rows = [line for line in result.output.splitlines() if line.startswith('| cancelled')]
+    assert [[cell.strip() for cell in row.split('|')[1:3]] for row in rows] == [['cancelled', 'CANCELLED']] * 2
+
+
+def test_merged_queue_item_is_followed_once(jenkins_server):
+    result = follow('merged', 'merged')
+    assert result.exit_code == 0, result.output
+    assert "Job 'merged' is already queued" in result.output
+    assert result.output.count('merged #1: SUCCESS') == 1
+
+
+def test_trigger_failure_fails_the_command(jenkins_server):
+    result = follow('app', 'broken')
+    assert result.exit_code == 1
+    assert "Failed to trigger job 'broken'. Status code: 500" in result.output
+    assert 'app #1: SUCCESS' in result.output
+
+
+def test_build_is_given_up_after_repeated_poll_errors(jenkins_server, monkeypatch):
+    monkeypatch.setattr(jenkins_builds, 'MAX_POLL_ERRORS', 3)
+    result = follow('flaky')
+    assert result.exit_code == 1
+    assert 'flaky: giving up after 3 failed polls' in result.output
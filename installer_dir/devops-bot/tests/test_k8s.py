@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from devops_bot.aws_clients import get_client
+from devops_bot.commands import k8s
+from devops_bot.common import KUBECONFIG_PATH, S3_BUCKET_NAME, S3_KUBECONFIG_KEY, load_aws_credentials
+
+KUBECONFIG = """apiVersion: v1
+kind: Config
+clusters:
+- name: dob
+  cluster: {{server: "https://{host}:6443", insecure-skip-tls-verify: true}}
+users:
+- name: admin
+  user: {{token: secret}}
+contexts:
+- name: dob
+  context: {{cluster: dob, user: admin}}
+current-context: dob
+"""
+
+
+@pytest.fixture
+def kubeconfig_bucket(aws, aws_credentials):
+    """Serve KUBECONFIG from S3 and record the status of every get."""
+    aws('s3').create_bucket(Bucket=S3_BUCKET_NAME)
+
+    def upload(host):
+        aws('s3').put_object(Bucket=S3_BUCKET_NAME, Key=S3_KUBECONFIG_KEY, Body=KUBECONFIG.format(host=host))
+
+    upload('10.0.0.1')
+    statuses = []
+    get_client('s3', load_aws_credentials()).meta.events.register(
+        'after-call.s3.GetObject', lambda http_response, **kwargs: statuses.append(http_response.status_code))
+    yield upload, statuses
+    if os.path.exists(KUBECONFIG_PATH):
+        os.remove(KUBECONFIG_PATH)
+    k8s._api_clients.clear()
+
+
+def test_kubeconfig_is_trusted_within_the_ttl(kubeconfig_bucket):
+    _, statuses = kubeconfig_bucket
+    for _ in range(3):
+        assert k8s.load_kubeconfig_from_s3() == KUBECONFIG_PATH
+    assert statuses == [200]
+    assert '10.0.0.1' in open(KUBECONFIG_PATH).read()
+
+
+def test_unchanged_kubeconfig_is_not_rewritten(kubeconfig_bucket):
+    _, statuses = kubeconfig_bucket
+    k8s.load_kubeconfig_from_s3()
+    written = os.stat(KUBECONFIG_PATH).st_mtime_ns
+    assert k8s.load_kubeconfig_from_s3(ttl=0) == KUBECONFIG_PATH
+    assert statuses == [200, 304]
+    assert os.stat(KUBECONFIG_PATH).st_mtime_ns == written
+
+
+def test_changed_and_edited_kubeconfigs_are_replaced(kubeconfig_bucket):
+    upload, statuses = kubeconfig_bucket
+    k8s.load_kubeconfig_from_s3()
+    upload('10.0.0.2')
+    k8s.load_kubeconfig_from_s3(refresh=True)
+    assert '10.0.0.2' in open(KUBECONFIG_PATH).read()
+
+    with open(KUBECONFIG_PATH, 'a') as kubeconfig:
+        kubeconfig.write('# edited by hand\n')
+    k8s.load_kubeconfig_from_s3()
+    assert 'edited by hand' not in open(KUBECONFIG_PATH).read()
+    assert statuses == [200, 200, 200]  # the edit invalidated the cache, so no IfNoneMatch
+
+
+def test_missing_kubeconfig_reports_an_error(aws, aws_credentials, capsys):
+    assert k8s.load_kubeconfig_from_s3() is None
+    assert 'Error loading kubeconfig from S3' in capsys.readouterr().out
+
+
+def test_api_client_is_reused_until_the_file_changes(kubeconfig_bucket):
+    upload, _ = kubeconfig_bucket
+    path = k8s.load_kubeconfig_from_s3()
+    api_client = k8s.get_api_client(path)
+    assert k8s.get_api_client(path) is api_client
+
+    upload('10.0.0.20')
+    k8s.load_kubeconfig_from_s3(refresh=True)
+    replaced = k8s.get_api_client(path)
+    assert replaced is not api_client
+    assert replaced.configuration.host == 'https://10.0.0.20:6443'
+    assert [key[0] for key in k8s._api_clients] == [path]  # the stale client was dropped
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import click
+import pytest
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+
+from devops_bot.k8s_resources import RESOURCE_TYPES, ResourceListing, ResourceType, RowPrinter, resolve_resource
+
+THINGS = ResourceType('things', 'CoreV1Api', 'pod', columns=[('SIZE', lambda obj: obj.size)])
+
+
+def thing(name, size=1):
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, namespace='default', creation_timestamp=None), size=size)
+
+
+class FakeList:
+    """Serve ``objects`` in pages of ``limit``; the continue token is the next offset."""
+
+    def __init__(self, objects, resource_version='100'):
+        self.objects = objects
+        self.resource_version = resource_version
+        self.calls = []
+
+    def __call__(self, limit, _continue=None, **kwargs):
+        self.calls.append(dict(kwargs, limit=limit, _continue=_continue))
+        start = int(_continue or 0)
+        end = start + limit
+        token = str(end) if end < len(self.objects) else None
+        return SimpleNamespace(items=self.objects[start:end],
+                               metadata=SimpleNamespace(resource_version=self.resource_version, _continue=token))
+
+
+def listing(objects, **kwargs):
+    listing = ResourceListing(client.ApiClient(), THINGS, **kwargs)
+    listing.list_function = FakeList(objects)
+    return listing
+
+
+def test_listing_is_fetched_page_by_page():
+    things = listing([thing(f"t{index}") for index in range(5)], page_size=2, label_selector='app=web')
+    pages = list(things.pages())
+
+    assert [[obj.metadata.name for obj in items] for items, _ in pages] == [['t0', 't1'], ['t2', 't3'], ['t4']]
+    assert [call['_continue'] for call in things.list_function.calls] == [None, '2', '4']
+    assert all(call['limit'] == 2 and call['label_selector'] == 'app=web' and call['namespace'] == 'default'
+               for call in things.list_function.calls)
+
+
+def test_list_prints_each_page_and_returns_its_version(capsys):
+    things = listing([thing('a'), thing('b', size=123456)], page_size=1)
+    assert things.list(RowPrinter(things.headers())) == (2, '100')
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[:2] for line in lines] == [['NAME', 'SIZE'], ['a', '1'], ['b', '123456']]
+
+
+def test_column_widths_only_grow(capsys):
+    printer = RowPrinter(['NAME', 'AGE'])
+    printer.print_rows([['long-name', '1d']])
+    printer.print_rows([['x', '2d']])
+    assert printer.widths == [9, 3]
+    printer.print_rows([['a-much-longer-name', '3d']])
+    assert printer.widths == [18, 3]
+    printer.print_rows([])
+    assert capsys.readouterr().out.splitlines()[2] == 'x           2d'
+
+
+def test_resource_names_and_aliases():
+    assert resolve_resource('Pods') is RESOURCE_TYPES[0]
+    assert resolve_resource('svc').name == 'services'
+    assert resolve_resource('deploy').api == 'AppsV1Api'
+    with pytest.raises(click.ClickException, match="Unknown resource type 'widgets'"):
+        resolve_resource('widgets')
+
+
+class StopWatching(Exception):
+    pass
+
+
+class FakeWatch:
+    """Replay one scripted round per watch request: events, or an exception to raise."""
+
+    rounds = []
+    requests = []
+
+    def __init__(self):
+        self.resource_version = None
+
+    def stream(self, list_function, resource_version, **kwargs):
+        FakeWatch.requests.append(resource_version)
+        if not FakeWatch.rounds:
+            raise StopWatching()
+        events = FakeWatch.rounds.pop(0)
+        if isinstance(events, Exception):
+            raise events
+        for event_type, name, version in events:
+            self.resource_version = version
+            yield {'type': event_type, 'object': thing(name)}
+
+
+@pytest.fixture
+def fake_watch(monkeypatch):
+    monkeypatch.setattr(watch, 'Watch', FakeWatch)
+    FakeWatch.requests = []
+    return FakeWatch
+
+
+def test_watch_resumes_from_the_last_version(fake_watch, capsys):
+    things = listing([thing('a')])
+    fake_watch.rounds = [[('ADDED', 'b', '101'), ('BOOKMARK', 'ignored', '105')], [('DELETED', 'a', '106')]]
+    with pytest.raises(StopWatching):
+        things.watch(RowPrinter(things.headers(watch=True)), '100')
+
+    assert fake_watch.requests == ['100', '105', '106']
+    assert [line.split()[:2] for line in capsys.readouterr().out.splitlines()[1:]] == [['ADDED', 'b'], ['DELETED', 'a']]
+
+
+def test_watch_lists_again_when_its_version_is_gone(fake_watch, capsys):
+    things = listing([thing('a'), thing('b')])
+    things.list_function.resource_version = '200'
+    fake_watch.rounds = [ApiException(status=410, reason='Gone'), [('MODIFIED', 'a', '201')]]
+    with pytest.raises(StopWatching):
+        things.watch(RowPrinter(things.headers(watch=True)), '100')
+
+    assert fake_watch.requests == ['100', '200', '201']
+    rows = [line.split()[:2] for line in capsys.readouterr().out.splitlines()[1:]]
+    assert rows == [['ADDED', 'a'], ['ADDED', 'b'], ['MODIFIED', 'a']]
+
+
+def test_other_watch_errors_are_raised(fake_watch):
+    things = listing([])
+    fake_watch.rounds = [ApiException(status=403, reason='Forbidden')]
+    with pytest.raises(ApiException):
+        things.watch(RowPrinter(things.headers(watch=True)), '100')
@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from devops_bot.launch import SharedLaunch, launch_instances, launch_spec
+
+
+class FakeEC2:
+    def __init__(self, fail_types=()):
+        self.calls = []
+        self.fail_types = fail_types
+        self._lock = threading.Lock()
+
+    def run_instances(self, MinCount, MaxCount, **spec):
+        assert MinCount == MaxCount
+        with self._lock:
+            self.calls.append((spec['InstanceType'], MinCount))
+            start = sum(count for _, count in self.calls[:-1])
+        if spec['InstanceType'] in self.fail_types:
+            raise RuntimeError(f"no capacity for {spec['InstanceType']}")
+        return {'Instances': [{'InstanceId': f"i-{start + index}", 'InstanceType': spec['InstanceType']}
+                              for index in range(MinCount)]}
+
+
+def test_identical_specs_share_calls(aws, ami_id):
+    ec2 = aws('ec2')
+    small = launch_spec('t2.micro', ami_id, tags={'Role': 'web'})
+    large = launch_spec('t3.large', ami_id)
+    results = launch_instances(ec2, [(small, 2), (large, 1), (launch_spec('t2.micro', ami_id, tags={'Role': 'web'}), 3)])
+
+    assert [len(instances) for instances in results] == [2, 1, 3]
+    assert {instance['InstanceType'] for instance in results[0] + results[2]} == {'t2.micro'}
+    assert len({instance['InstanceId'] for instances in results for instance in instances}) == 6
+    reservations = ec2.describe_instances()['Reservations']
+    assert len(reservations) == 2
+
+
+def test_large_groups_are_chunked():
+    ec2 = FakeEC2()
+    spec = launch_spec('t2.micro', 'ami-1')
+    results = launch_instances(ec2, [(spec, 150), (spec, 70)], chunk_size=100)
+
+    assert sorted(count for _, count in ec2.calls) == [20, 100, 100]
+    assert [len(instances) for instances in results] == [150, 70]
+    assert len({instance['InstanceId'] for instances in results for instance in instances}) == 220
+
+
+def test_failure_names_the_instances_that_were_launched():
+    ec2 = FakeEC2(fail_types=('t3.large',))
+    with pytest.raises(Exception) as raised:
+        launch_instances(ec2, [(launch_spec('t2.micro', 'ami-1'), 2), (launch_spec('t3.large', 'ami-1'), 1)])
+    message = str(raised.value)
+    assert message.startswith("1 of 2 launch call(s) failed: no capacity for t3.large")
+    assert 'launched: i-' in message
+
+
+def test_shared_launch_calls_once_for_every_member():
+    ec2 = FakeEC2()
+    shared = SharedLaunch(ec2, launch_spec('t2.micro', 'ami-1'), {'ec2:a': 2, 'ec2:b': 1, 'ec2:c': 3})
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = dict(zip('abc', executor.map(shared.take, ['ec2:a', 'ec2:b', 'ec2:c'])))
+    assert ec2.calls == [('t2.micro', 6)]
+    assert [len(results[name]) for name in 'abc'] == [2, 1, 3]
+
+
+def test_shared_launch_failure_reaches_every_member():
+    ec2 = FakeEC2(fail_types=('t2.micro',))
+    shared = SharedLaunch(ec2, launch_spec('t2.micro', 'ami-1'), {'ec2:a': 1, 'ec2:b': 1})
+    for member in ('ec2:a', 'ec2:b'):
+        with pytest.raises(Exception, match='no capacity'):
+            shared.take(member)
+    assert len(ec2.calls) == 1
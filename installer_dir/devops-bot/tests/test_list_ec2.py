@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from devops_bot.aws_clients import get_client
+from devops_bot.commands import ec2 as ec2_commands
+from devops_bot.common import load_aws_credentials
+
+
+@pytest.fixture
+def fleet(aws_credentials, aws, ami_id):
+    """Twelve instances: web ones in two types, two db ones stopped."""
+    ec2 = aws('ec2')
+
+    def launch(count, instance_type, role):
+        instances = ec2.run_instances(ImageId=ami_id, InstanceType=instance_type, MinCount=count, MaxCount=count,
+                                      TagSpecifications=[{'ResourceType': 'instance',
+                                                          'Tags': [{'Key': 'Role', 'Value': role}]}])['Instances']
+        return [instance['InstanceId'] for instance in instances]
+
+    web = launch(6, 't2.micro', 'web') + launch(4, 't3.small', 'web')
+    db = launch(2, 't3.small', 'db')
+    ec2.stop_instances(InstanceIds=db)
+    return {'web': web, 'db': db}
+
+
+@pytest.fixture
+def describe_calls(fleet):
+    calls = []
+    get_client('ec2', load_aws_credentials()).meta.events.register(
+        'before-parameter-build.ec2.DescribeInstances', lambda params, **kwargs: calls.append(dict(params)))
+    return calls
+
+
+def list_ec2(*args):
+    result = CliRunner().invoke(ec2_commands.list_ec2_instances, ['--output', 'jsonl', *args])
+    assert result.exit_code == 0, result.output
+    return [json.loads(line) for line in result.output.splitlines()]
+
+
+def test_filters_are_built_for_the_server():
+    assert ec2_commands.build_instance_filters(['running'], ['Role=web', 'Owner'], ['t2.micro']) == [
+        {'Name': 'instance-state-name', 'Values': ['running']},
+        {'Name': 'instance-type', 'Values': ['t2.micro']},
+        {'Name': 'tag:Role', 'Values': ['web']},
+        {'Name': 'tag-key', 'Values': ['Owner']},
+    ]
+
+
+def test_pages_are_requested_at_the_page_size(fleet, describe_calls):
+    ec2 = get_client('ec2', load_aws_credentials())
+    instance_ids = [instance['InstanceId'] for instance in ec2_commands.iter_ec2_instances(ec2, page_size=1)]
+
+    assert sorted(instance_ids) == sorted(fleet['web'] + fleet['db'])
+    assert len(describe_calls) > 1
+    assert {call['MaxResults'] for call in describe_calls} == {1}
+    assert all('NextToken' in call for call in describe_calls[1:])
+
+
+def test_filters_are_applied_by_describe_instances(fleet, describe_calls):
+    rows = list_ec2('--state', 'running', '--tag', 'Role=web', '--instance-type', 't3.small')
+    assert sorted(row['Instance ID'] for row in rows) == sorted(fleet['web'][6:])
+    assert {row['State'] for row in rows} == {'running'}
+    assert describe_calls[0]['Filters'][0] == {'Name': 'instance-state-name', 'Values': ['running']}
+
+    assert sorted(row['Instance ID'] for row in list_ec2('--state', 'stopped')) == sorted(fleet['db'])
+    assert len(list_ec2('--tag', 'Role')) == 12
+
+
+def test_instance_ids_are_not_combined_with_a_page_size(fleet, describe_calls):
+    rows = list_ec2('--instance-ids', fleet['db'][0], '--page-size', '5')
+    assert [row['Instance ID'] for row in rows] == fleet['db'][:1]
+    assert 'MaxResults' not in describe_calls[0]
+
+
+def test_api_errors_are_reported(fleet):
+    result = CliRunner().invoke(ec2_commands.list_ec2_instances, ['--instance-ids', 'i-0123456789abcdef0'])
+    assert result.exit_code == 0
+    assert 'Failed to list instances' in result.output
+
+
+def test_table_and_csv_outputs(fleet):
+    table = CliRunner().invoke(ec2_commands.list_ec2_instances, ['--state', 'stopped'])
+    assert table.output.count('i-') == 2 and 'Instance ID' in table.output
+    csv_output = CliRunner().invoke(ec2_commands.list_ec2_instances, ['--state', 'stopped', '--output', 'csv']).output
+    assert csv_output.splitlines()[0] == ','.join(ec2_commands.EC2_COLUMNS)
+    assert len(csv_output.splitlines()) == 3
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from devops_bot import master
+from devops_bot.master import Dispatcher, WorkerRegistry, create_app
+
+
+@pytest.fixture
+def registry():
+    return WorkerRegistry(heartbeat_ttl=30, purge_after=600)
+
+
+@pytest.fixture
+def client(registry):
+    app = create_app(registry, Dispatcher(registry))
+    return app.test_client()
+
+
+def age(registry, worker_id, seconds):
+    registry._workers[worker_id]['last_seen'] = time.time() - seconds
+
+
+def test_workers_expire_and_are_purged(registry):
+    registry.register('w1', 'http://w1:5001')
+    registry.register('w2', 'http://w2:5001')
+    registry.register('w3', 'http://w3:5001')
+    age(registry, 'w2', 60)
+    age(registry, 'w3', 700)
+
+    assert {worker['worker_id']: worker['status'] for worker in registry.list()} == {'w1': 'healthy', 'w2': 'expired'}
+    assert [worker['worker_id'] for worker in registry.list('healthy')] == ['w1']
+    assert registry.heartbeat('w2', cpu_load=0.5)
+    assert registry.get('w2')['status'] == 'healthy'
+    assert not registry.heartbeat('w3')
+
+
+def test_register_heartbeat_and_remove(client):
+    response = client.post('/register_worker', json={'worker_id': 'w1', 'worker_url': 'http://0.0.0.0:5001', 'parallelism': 4})
+    assert response.status_code == 200
+    worker = client.get('/workers/w1').get_json()
+    assert worker['worker_url'] == 'http://127.0.0.1:5001'  # the address it registered from
+    assert worker['parallelism'] == 4
+
+    assert client.post('/heartbeat', json={'worker_id': 'w1', 'queued': 2, 'running': 1}).status_code == 200
+    assert client.get('/workers/w1').get_json()['queued'] == 2
+    assert client.post('/heartbeat', json={'worker_id': 'ghost'}).status_code == 404
+    assert client.post('/heartbeat', json={}).status_code == 400
+
+    assert client.delete('/workers/w1').status_code == 200
+    assert client.delete('/workers/w1').status_code == 404
+    assert client.get('/health').get_json() == {'status': 'ok', 'workers': 0}
+
+
+def test_bulk_registration_rejects_incomplete_entries(client):
+    workers = [{'worker_id': f"w{index}", 'worker_url': f"http://w{index}:5001"} for index in range(50)]
+    response = client.post('/register_workers', json={'workers': workers + [{'worker_id': 'no-url'}]})
+    assert response.get_json() == {'registered': 50, 'rejected': 1}
+    assert len(client.get('/workers?status=healthy').get_json()['workers']) == 50
+    assert client.post('/register_worker', json={'worker_id': 'w1'}).status_code == 400
+
+
+def test_workers_cannot_overwrite_registry_fields(client, registry):
+    client.post('/register_worker', json={'worker_id': 'w1', 'worker_url': 'http://w1:5001',
+                                          'registered_at': 0, 'last_seen': 0, 'status': 'expired'})
+    registered = registry.get('w1')
+    assert registered['registered_at'] > 0 and registered['status'] == 'healthy'
+
+    hostile = {'worker_id': 'w1', 'queued': 0, 'running': 0, 'load_reported_at': 0, 'worker_url': 'http://evil',
+               'registered_at': 0, 'last_seen': 0, 'cpu_load': 'high', 'current_task': 'build', 'extra': 'x' * 100}
+    response = client.post('/heartbeat', json=hostile)
+    assert response.status_code == 200
+    worker = registry.get('w1')
+    assert worker['worker_url'] == 'http://w1:5001'
+    assert worker['registered_at'] == registered['registered_at']
+    assert worker['load_reported_at'] > 0 and worker['last_seen'] > 0
+    assert worker['current_task'] == 'build'
+    assert 'extra' not in worker and 'cpu_load' not in worker
+    assert client.post('/heartbeat', json=['w1']).status_code == 400
+    assert client.post('/heartbeat', json={'worker_id': ['w1']}).status_code == 400
+
+
+class FakeWorkers:
+    """Answer the master's HTTP calls as the workers would; ``down`` ones refuse."""
+
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def post(self, url, json, timeout):
+        worker_url = url.rsplit('/', 1)[0]
+        if worker_url in self.down:
+            raise ConnectionError(f"{worker_url} refused the connection")
+        with self._lock:
+            self.batches.append((worker_url, len(json['commands'])))
+        return FakeResponse({'job_ids': [f"{worker_url}/job{index}" for index in range(len(json['commands']))]})
+
+    def get(self, url, params, timeout):
+        return FakeResponse({'counts': {'queued': 7, 'running': 1}})
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    fake = FakeWorkers()
+    monkeypatch.setattr(master, 'http_post', fake.post)
+    monkeypatch.setattr(master, 'http_get', fake.get)
+    return fake
+
+
+def test_tasks_go_to_the_least_loaded_slots(registry):
+    registry.register('w1', 'http://w1', parallelism=1)
+    registry.register('w2', 'http://w2', parallelism=4)
+    registry.register('w3', 'http://w3', parallelism=1)
+    registry.report_load('w1', 0, 0)
+    registry.report_load('w2', 0, 0)
+    registry.report_load('w3', 10, 1)
+
+    assignments, _ = Dispatcher(registry).assign([{'command': 'true'}] * 10)
+    counts = Counter(assignment['worker_id'] for assignment in assignments)
+    assert counts == {'w2': 8, 'w1': 2}
+
+
+def test_sent_tasks_count_until_the_next_load_report(registry):
+    registry.register('w1', 'http://w1')
+    registry.register('w2', 'http://w2')
+    dispatcher = Dispatcher(registry)
+
+    first, _ = dispatcher.assign([{'command': 'true'}] * 3)
+    second, _ = dispatcher.assign([{'command': 'true'}])
+    assert Counter(assignment['worker_id'] for assignment in first + second) == {'w1': 2, 'w2': 2}
+
+
+def test_named_and_missing_workers(registry):
+    registry.register('w1', 'http://w1')
+    registry.register('old', 'http://old')
+    age(registry, 'old', 60)
+    dispatcher = Dispatcher(registry)
+
+    assignments, _ = dispatcher.assign([{'command': 'a', 'worker_id': 'w1'}, {'command': 'b', 'worker_id': 'old'}])
+    assert assignments[0] == {'worker_id': 'w1'}
+    assert assignments[1] == {'error': "Worker old is not registered or not healthy"}
+    assert Dispatcher(WorkerRegistry()).assign([{'command': 'a'}])[0] == [{'error': "No healthy workers available"}]
+
+
+def test_dispatch_batches_per_worker_and_reports_unreachable_ones(registry, workers):
+    registry.register('w1', 'http://w1')
+    registry.register('w2', 'http://w2')
+    workers.down.add('http://w2')
+
+    results = Dispatcher(registry, chunk_size=3).dispatch([{'command': 'true'}] * 10)
+    assert sorted(workers.batches) == [('http://w1', 2), ('http://w1', 3)]
+    for result in results:
+        if result['worker_id'] == 'w1':
+            assert result['job_id'].startswith('http://w1/job')
+        else:
+            assert result['error'].startswith("Failed to reach worker w2: http://w2 refused")
+
+
+def test_dispatch_endpoint(client, registry, workers):
+    registry.register('w1', 'http://w1')
+    response = client.post('/dispatch', json={'tasks': [{'command': 'true'}, {'command': 'x', 'worker_id': 'nope'}]})
+    assert response.get_json()['dispatched'] == 1
+    assert response.get_json()['failed'] == 1
+    assert client.post('/dispatch', json={'command': 'true'}).get_json()['dispatched'] == 1
+    assert client.post('/dispatch', json={'tasks': [{}]}).status_code == 400
+
+
+def test_stale_loads_are_refreshed_from_the_workers(registry, workers):
+    registry.register('w1', 'http://w1')
+    Dispatcher(registry).refresh_loads(max_age=0)
+    worker = registry.get('w1')
+    assert (worker['queued'], worker['running']) == (7, 1)
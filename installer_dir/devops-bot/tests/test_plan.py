@@ -0,0 +1,127 @@
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from devops_bot.commands import ec2 as ec2_commands
+from devops_bot.plan import ScreenplayState, plan_buckets
+
+
+class NoCalls:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected {name} call")
+
+
+@pytest.fixture
+def screenplay_instance(aws, ami_id):
+    ec2 = aws('ec2')
+    ec2.create_key_pair(KeyName='deploy')
+    group_id = ec2.create_security_group(GroupName='web', Description='web')['GroupId']
+    return {'name': 'web', 'instance_type': 't2.micro', 'ami_id': ami_id, 'key_name': 'deploy',
+            'security_group': group_id, 'count': 2, 'tags': {'Role': 'web'}}
+
+
+def test_state_is_kept_per_screenplay(tmp_path):
+    path = str(tmp_path / 'state.json')
+    state = ScreenplayState('first.yaml', path)
+    state.put('s3:logs', {'exists': True})
+    state.save()
+    ScreenplayState('second.yaml', path).save()
+
+    assert ScreenplayState('first.yaml', path).get('s3:logs')['exists']
+    assert ScreenplayState('second.yaml', path).get('s3:logs') is None
+    assert state.is_fresh('s3:logs') and not state.is_fresh('s3:logs', ttl=0)
+
+
+def test_fresh_bucket_records_are_trusted(tmp_path):
+    state = ScreenplayState('play.yaml', str(tmp_path / 'state.json'))
+    state.put('s3:logs', {'exists': True})
+
+    plan = plan_buckets(NoCalls(), state, [{'name': 'logs'}])
+    assert plan['s3:logs'].action == 'no-op'
+
+
+def test_stale_bucket_records_are_checked_in_one_call(tmp_path, aws):
+    s3 = aws('s3')
+    s3.create_bucket(Bucket='kept')
+    state = ScreenplayState('play.yaml', str(tmp_path / 'state.json'))
+    state.put('s3:kept', {'exists': True})
+    state.put('s3:deleted', {'exists': True})
+
+    plan = plan_buckets(s3, state, [{'name': 'kept'}, {'name': 'deleted'}, {'name': 'new'}], ttl=0)
+    assert {name: entry.action for name, entry in plan.items()} == {
+        's3:kept': 'no-op', 's3:deleted': 'add', 's3:new': 'add'
+    }
+    assert state.get('s3:deleted') is None
+
+
+def test_instance_plan_actions(tmp_path, aws, screenplay_instance):
+    ec2 = aws('ec2')
+    resource = screenplay_instance
+    instance_ids = [instance['InstanceId'] for instance in ec2.run_instances(
+        ImageId=resource['ami_id'], InstanceType='t2.micro', MinCount=3, MaxCount=3)['Instances']]
+    state = ScreenplayState('play.yaml', str(tmp_path / 'state.json'))
+
+    def plan_for(resource, recorded, **changes):
+        state.put('ec2:web', {'hash': ec2_commands.instance_spec_hash(dict(resource, **changes)), 'instance_ids': recorded})
+        return ec2_commands.plan_screenplay_instances(NoCalls(), state, [resource])['ec2:web']
+
+    assert ec2_commands.plan_screenplay_instances(NoCalls(), state, [resource])['ec2:web'].action == 'add'
+    assert plan_for(resource, instance_ids[:2]).action == 'no-op'
+    assert plan_for(resource, instance_ids[:1]).data == {'launch': 1, 'keep': instance_ids[:1], 'terminate': []}
+    assert plan_for(resource, instance_ids).data == {'launch': 0, 'keep': instance_ids[:2], 'terminate': instance_ids[2:]}
+    changed = plan_for(resource, instance_ids[:2], instance_type='t3.micro')
+    assert (changed.action, changed.data['terminate']) == ('change', instance_ids[:2])
+
+    # A stale record is refreshed and instances terminated since are dropped.
+    ec2.terminate_instances(InstanceIds=instance_ids[:1])
+    state.put('ec2:web', {'hash': ec2_commands.instance_spec_hash(resource), 'instance_ids': instance_ids[:2]})
+    entry = ec2_commands.plan_screenplay_instances(ec2, state, [resource], ttl=0)['ec2:web']
+    assert entry.data == {'launch': 1, 'keep': instance_ids[1:2], 'terminate': []}
+
+
+def test_unnamed_entries_keep_their_records_when_reordered(tmp_path, capsys):
+    first = {'instance_type': 't2.micro', 'ami_id': 'ami-1', 'key_name': 'deploy', 'security_group': 'sg-1'}
+    second = dict(first, instance_type='t3.micro')
+    twin = dict(first)
+    state = ScreenplayState('play.yaml', str(tmp_path / 'state.json'))
+    for name, resource, instance_ids in zip(ec2_commands.screenplay_instance_names([first, second, twin]),
+                                            [first, second, twin], [['i-1'], ['i-2'], ['i-3']]):
+        state.put(name, {'hash': ec2_commands.instance_spec_hash(resource), 'instance_ids': instance_ids})
+
+    # A new entry in front and the rest reordered: only the new one is added.
+    inserted = dict(first, instance_type='m5.large')
+    plan = ec2_commands.plan_screenplay_instances(NoCalls(), state, [inserted, second, twin, first])
+    assert sorted(entry.action for entry in plan.values()) == ['add', 'no-op', 'no-op', 'no-op']
+    assert not any(entry.data.get('terminate') for entry in plan.values())
+
+    # A removed or edited entry is forgotten, and its instances are left alone.
+    plan = ec2_commands.plan_screenplay_instances(NoCalls(), state, [first, dict(second, key_name='other')])
+    assert sorted(entry.action for entry in plan.values()) == ['add', 'no-op']
+    output = capsys.readouterr().out
+    assert 'instances are left running: i-2' in output and 'instances are left running: i-3' in output
+    assert len([name for name in state.records if name.startswith('ec2:')]) == 1
+
+
+def test_rerun_applies_only_the_delta(tmp_path, aws_credentials, screenplay_instance):
+    screenplay = tmp_path / 'play.yaml'
+    resources = {'ec2_instances': [screenplay_instance], 's3_buckets': [{'name': 'play-logs'}]}
+    screenplay.write_text(yaml.safe_dump({'resources': resources}))
+
+    def run():
+        result = CliRunner().invoke(ec2_commands.create_ec2_dob, [str(screenplay)], input='y\nfirst\nn\n')
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    output = run()
+    assert 'Plan: 2 to add, 0 to change, 0 unchanged.' in output
+    assert 'Bucket play-logs created successfully.' in output
+
+    output = run()
+    assert 'Plan: 0 to add, 0 to change, 2 unchanged.' in output
+    assert 'No changes. The screenplay is up to date.' in output
+
+    screenplay_instance['count'] = 3
+    screenplay.write_text(yaml.safe_dump({'resources': resources}))
+    output = run()
+    assert 'launch 1 more instance(s)' in output
+    assert 'Plan: 0 to add, 1 to change, 1 unchanged.' in output
@@ -0,0 +1,91 @@
+import json
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from devops_bot.commands import ec2 as ec2_commands
+from devops_bot.regions import REGION_COLUMN, RegionFanOut, resolve_regions
+
+
+def test_region_names_are_resolved(aws):
+    assert resolve_regions(None, {'region_name': 'eu-west-1'}) == ['eu-west-1']
+    assert resolve_regions(None, None) == ['us-east-1']
+    assert resolve_regions('us-east-1, eu-west-1,', None) == ['us-east-1', 'eu-west-1']
+    every = resolve_regions('all', None)
+    assert every == sorted(every) and {'us-east-1', 'eu-west-1', 'ap-southeast-2'} <= set(every)
+
+
+def test_a_failing_region_does_not_hide_the_others(capsys):
+    def fetch(region):
+        if region == 'bad-1':
+            yield {'name': 'partial'}
+            raise RuntimeError('throttled')
+        for index in range(3):
+            yield {'name': f"{region}-{index}"}
+
+    fan_out = RegionFanOut(['us-east-1', 'bad-1', 'eu-west-1'], fetch, workers=3)
+    rows = list(fan_out)
+
+    assert sorted(row['name'] for row in rows if row[REGION_COLUMN] != 'bad-1') == [
+        'eu-west-1-0', 'eu-west-1-1', 'eu-west-1-2', 'us-east-1-0', 'us-east-1-1', 'us-east-1-2']
+    assert fan_out.failed() == {'bad-1': 'RuntimeError: throttled'}
+    assert fan_out.results['bad-1']['rows'] == 1 and fan_out.results['us-east-1']['rows'] == 3
+
+    fan_out.report()
+    err = capsys.readouterr().err
+    assert 'us-east-1: 3 rows' in err
+    assert 'bad-1: 1 rows' in err and 'failed: RuntimeError: throttled' in err
+
+
+def test_regions_are_queried_concurrently():
+    started = threading.Barrier(4, timeout=5)
+
+    def fetch(region):
+        started.wait()  # only returns once every region is in flight at the same time
+        return [{'name': region}]
+
+    rows = list(RegionFanOut([f"region-{index}" for index in range(4)], fetch, workers=4))
+    assert len(rows) == 4
+
+
+def test_a_fetch_that_fails_before_any_row_is_recorded():
+    def fetch(region):
+        raise ValueError(f"{region} is disabled")
+
+    fan_out = RegionFanOut(['me-south-1'], fetch)
+    assert list(fan_out) == []
+    assert fan_out.failed() == {'me-south-1': 'ValueError: me-south-1 is disabled'}
+
+
+@pytest.fixture
+def two_region_fleet(aws_credentials, ami_id):
+    from devops_bot.aws_clients import get_client
+    from devops_bot.common import load_aws_credentials
+
+    credentials = load_aws_credentials()
+    launched = {}
+    for region in ('us-east-1', 'eu-west-1'):
+        ec2 = get_client('ec2', credentials, region_name=region)
+        launched[region] = [instance['InstanceId'] for instance in ec2.run_instances(
+            ImageId=ami_id, InstanceType='t2.micro', MinCount=2, MaxCount=2)['Instances']]
+    return launched
+
+
+def test_list_ec2_merges_regions_and_reports_failures(two_region_fleet, monkeypatch):
+    original = ec2_commands.iter_ec2_instances
+
+    def iter_ec2_instances(ec2, *args, **kwargs):
+        if ec2.meta.region_name == 'ap-south-1':
+            raise RuntimeError('region not enabled')
+        return original(ec2, *args, **kwargs)
+
+    monkeypatch.setattr(ec2_commands, 'iter_ec2_instances', iter_ec2_instances)
+    result = CliRunner().invoke(ec2_commands.list_ec2_instances,
+                                ['--regions', 'us-east-1,eu-west-1,ap-south-1', '--output', 'jsonl'])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    by_region = {region: sorted(row['Instance ID'] for row in rows if row[REGION_COLUMN] == region)
+                 for region in two_region_fleet}
+    assert by_region == {region: sorted(ids) for region, ids in two_region_fleet.items()}
+    assert 'ap-south-1: 0 rows' in result.stderr and 'region not enabled' in result.stderr
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+from click.testing import CliRunner
+
+from devops_bot.aws_clients import get_client
+from devops_bot.commands import s3 as s3_commands
+from devops_bot.common import load_aws_credentials
+
+
+@pytest.fixture
+def s3(aws_credentials, aws):
+    return aws('s3')
+
+
+def publish_storage_metric(cloudwatch, bucket_name, metric, storage_type, value):
+    cloudwatch.put_metric_data(Namespace='AWS/S3', MetricData=[{
+        'MetricName': metric,
+        'Dimensions': [{'Name': 'BucketName', 'Value': bucket_name}, {'Name': 'StorageType', 'Value': storage_type}],
+        'Timestamp': datetime.now(timezone.utc) - timedelta(hours=12),  # S3 publishes once a day
+        'Value': value,
+    }])
+
+
+def test_metrics_sum_every_storage_class(aws, aws_credentials):
+    cloudwatch = aws('cloudwatch')
+    publish_storage_metric(cloudwatch, 'app-logs', 'NumberOfObjects', 'AllStorageTypes', 7)
+    publish_storage_metric(cloudwatch, 'app-logs', 'BucketSizeBytes', 'StandardStorage', 100)
+    publish_storage_metric(cloudwatch, 'app-logs', 'BucketSizeBytes', 'GlacierStorage', 900)
+    publish_storage_metric(cloudwatch, 'other', 'BucketSizeBytes', 'StandardStorage', 5)
+
+    assert s3_commands.bucket_metrics(aws_credentials, 'app-logs', 'us-east-1') == (7, 1000)
+    assert s3_commands.bucket_metrics(aws_credentials, 'empty', 'us-east-1') is None
+
+
+def test_first_page_marks_truncated_counts(s3, aws_credentials):
+    s3.create_bucket(Bucket='big')
+    s3.create_bucket(Bucket='small')
+    for index in range(1001):
+        s3.put_object(Bucket='big', Key=f"k{index}", Body=b'x')
+    s3.put_object(Bucket='small', Key='k', Body=b'xyz')
+    buckets = {bucket['Name']: bucket for bucket in s3.list_buckets()['Buckets']}
+
+    big = s3_commands.enrich_bucket(aws_credentials, buckets['big'], ['name', 'objects'], 'first-page')
+    assert (big['Number of Objects'], big['Size (Bytes)']) == ('1000+', '1000+')
+    small = s3_commands.enrich_bucket(aws_credentials, buckets['small'], ['name', 'objects', 'size'], 'first-page')
+    assert (small['Number of Objects'], small['Size (Bytes)']) == (1, 3)
+    exact = s3_commands.enrich_bucket(aws_credentials, buckets['big'], ['name', 'objects'], 'exact')
+    assert exact['Number of Objects'] == 1001
+
+
+def test_list_s3_skips_counting_without_count_columns(s3, monkeypatch):
+    s3.create_bucket(Bucket='app-logs')
+    monkeypatch.setattr(s3_commands, 'count_bucket_objects', pytest.fail)
+
+    result = CliRunner().invoke(s3_commands.list_s3_buckets, ['--columns', 'name,created', '--count-mode', 'exact'])
+    assert result.exit_code == 0, result.output
+    assert 'app-logs' in result.output
+
+
+@pytest.fixture
+def delete_calls(s3):
+    """Record the size of every delete_objects request on the shared client."""
+    sizes = []
+    get_client('s3', load_aws_credentials()).meta.events.register(
+        'before-parameter-build.s3.DeleteObjects', lambda params, **kwargs: sizes.append(len(params['Delete']['Objects'])))
+    return sizes
+
+
+def delete_bucket(bucket_name):
+    return CliRunner().invoke(s3_commands.delete_bucket, [bucket_name, '--workers', '2'], input='y\n')
+
+
+def test_large_bucket_is_deleted_in_batches_of_1000(s3, delete_calls):
+    s3.create_bucket(Bucket='bulk')
+    for index in range(2345):
+        s3.put_object(Bucket='bulk', Key=f"k{index}", Body=b'')
+
+    result = delete_bucket('bulk')
+    assert result.exit_code == 0, result.output
+    assert "Bucket 'bulk' and all its 2345 objects deleted successfully." in result.output
+    assert sorted(delete_calls) == [345, 1000, 1000]
+    assert 'bulk' not in [bucket['Name'] for bucket in s3.list_buckets()['Buckets']]
+
+
+def test_versions_and_delete_markers_are_deleted(s3, delete_calls):
+    s3.create_bucket(Bucket='versioned')
+    s3.put_bucket_versioning(Bucket='versioned', VersioningConfiguration={'Status': 'Enabled'})
+    for body in (b'1', b'2', b'3'):
+        s3.put_object(Bucket='versioned', Key='config', Body=body)
+    s3.put_object(Bucket='versioned', Key='gone', Body=b'x')
+    s3.delete_object(Bucket='versioned', Key='gone')
+
+    batches = list(s3_commands.iter_delete_batches(s3, 'versioned'))
+    assert len(batches) == 1 and len(batches[0]) == 5 and all('VersionId' in entry for entry in batches[0])
+
+    result = delete_bucket('versioned')
+    assert result.exit_code == 0, result.output
+    assert 'all its 5 objects deleted successfully' in result.output
+    assert delete_calls == [5]
+
+
+def test_per_key_errors_keep_the_bucket(s3):
+    s3.create_bucket(Bucket='locked')
+    for key in ('a', 'b', 'c'):
+        s3.put_object(Bucket='locked', Key=key, Body=b'')
+
+    def refuse_b(parsed, **kwargs):
+        parsed['Errors'] = [{'Key': 'b', 'Code': 'AccessDenied', 'Message': 'Access Denied'}]
+
+    get_client('s3', load_aws_credentials()).meta.events.register('after-call.s3.DeleteObjects', refuse_b)
+    result = delete_bucket('locked')
+    assert "Failed to delete 1 object(s) from 'locked'; the bucket was kept." in result.output
+    assert 'b: Access Denied' in result.output
+    assert 'locked' in [bucket['Name'] for bucket in s3.list_buckets()['Buckets']]
+
+
+def test_a_failed_batch_reports_every_key():
+    class Refusing:
+        def delete_objects(self, **kwargs):
+            raise ClientError({'Error': {'Code': 'SlowDown', 'Message': 'Please reduce your request rate.'}}, 'DeleteObjects')
+
+    count, errors = s3_commands.delete_batch(Refusing(), 'bucket', [{'Key': 'a'}, {'Key': 'b'}])
+    assert count == 0
+    assert [error['Key'] for error in errors] == ['a', 'b'] and 'SlowDown' in errors[0]['Message']
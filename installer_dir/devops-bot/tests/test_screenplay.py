@@ -0,0 +1,94 @@
+import threading
+import time
+
+import click
+import pytest
+
+from devops_bot.screenplay import ScreenplayExecutor, ScreenplayTask
+
+
+def task(name, service='s3', depends_on=(), run=None):
+    return ScreenplayTask(name, service, run or (lambda results: name), depends_on)
+
+
+def test_dependencies_run_first_and_receive_results():
+    executor = ScreenplayExecutor([
+        task('a'),
+        task('b', depends_on=['a'], run=lambda results: results['a'] + 'b'),
+    ])
+    assert executor.run()
+    assert executor.tasks['b'].result == 'ab'
+    assert [t.name for t in executor.critical_path()] == ['a', 'b']
+
+
+def test_failed_dependency_skips_dependents():
+    def fail(results):
+        raise RuntimeError('boom')
+
+    executor = ScreenplayExecutor([task('a', run=fail), task('b', depends_on=['a']), task('c')])
+    assert not executor.run()
+    assert executor.tasks['a'].status == 'failed'
+    assert executor.tasks['b'].status == 'skipped'
+    assert executor.tasks['c'].status == 'done'
+
+
+def test_skips_reach_every_transitive_dependent():
+    def fail(results):
+        raise RuntimeError('boom')
+
+    # Listed dependents first, so a single pass over them would leave 'a' waiting on 'b'.
+    executor = ScreenplayExecutor([task('a', depends_on=['b']), task('b', depends_on=['c']), task('c', run=fail)])
+    assert not executor.run()
+    assert [executor.tasks[name].status for name in 'abc'] == ['skipped', 'skipped', 'failed']
+    assert executor.tasks['a'].error == 'dependency b skipped'
+
+
+def test_service_limit_bounds_concurrency():
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def run(results):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.pop()
+
+    executor = ScreenplayExecutor([task(f"t{i}", 'ec2', run=run) for i in range(8)], workers=8, limits={'ec2': 2})
+    assert executor.run()
+    assert max(peak) <= 2
+
+
+def test_graph_errors():
+    with pytest.raises(click.ClickException, match='cycle'):
+        ScreenplayExecutor([task('a', depends_on=['b']), task('b', depends_on=['a'])])
+    with pytest.raises(click.ClickException, match='unknown'):
+        ScreenplayExecutor([task('a', depends_on=['missing'])])
+    with pytest.raises(click.ClickException, match='Duplicate'):
+        ScreenplayExecutor([task('a'), task('a')])
+
+
+def test_zero_limit_is_rejected():
+    with pytest.raises(click.ClickException, match='at least 1'):
+        ScreenplayExecutor([task('a', 'ec2')], limits={'ec2': 0})
+
+
+def test_unrunnable_tasks_raise_instead_of_spinning():
+    executor = ScreenplayExecutor([task('a', 'ec2')])
+    executor.limits['ec2'] = 0  # bypasses the constructor check
+    with pytest.raises(click.ClickException, match='No screenplay resource can start'):
+        executor.run()
+
+
+def test_cli_rejects_zero_limit(tmp_path):
+    from click.testing import CliRunner
+
+    from devops_bot.commands.ec2 import create_ec2_dob
+
+    screenplay = tmp_path / 'screenplay.yaml'
+    screenplay.write_text('resources: {}\n')
+    result = CliRunner().invoke(create_ec2_dob, [str(screenplay), '--limit', 'ec2', '0'])
+    assert result.exit_code == 2
+    assert "Invalid value for '--limit'" in result.output
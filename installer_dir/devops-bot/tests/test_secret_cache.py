@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import Fernet
+
+from devops_bot.secret_cache import SecretCache
+
+
+def write_secret(tmp_path, text, key=None):
+    key = key or Fernet.generate_key()
+    (tmp_path / 'key').write_bytes(key)
+    (tmp_path / 'secret.enc').write_bytes(Fernet(key).encrypt(text.encode()))
+    return str(tmp_path / 'secret.enc'), str(tmp_path / 'key')
+
+
+def test_decrypt_counts_one_lookup_per_call(tmp_path):
+    cache = SecretCache()
+    path, key_path = write_secret(tmp_path, 'first')
+
+    assert cache.decrypt(path, key_path) == 'first'
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'hit_rate': 0.0}
+    assert cache.decrypt(path, key_path) == 'first'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_changed_file_is_decrypted_again(tmp_path):
+    cache = SecretCache()
+    path, key_path = write_secret(tmp_path, 'first')
+    cache.decrypt(path, key_path)
+    write_secret(tmp_path, 'second, and longer')
+
+    assert cache.decrypt(path, key_path) == 'second, and longer'
+    assert cache.stats()['misses'] == 2
+
+
+def test_concurrent_lookups_are_all_counted(tmp_path):
+    cache = SecretCache()
+    path, key_path = write_secret(tmp_path, 'secret')
+    key = (tmp_path / 'key').read_bytes()
+
+    def work(index):
+        if index % 2:
+            return cache.decrypt(path, key_path)
+        return cache.fernet(key).decrypt((tmp_path / 'secret.enc').read_bytes()).decode()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert set(executor.map(work, range(2000))) == {'secret'}
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 2000
+    assert stats['misses'] == 2
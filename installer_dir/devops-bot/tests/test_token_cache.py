@@ -0,0 +1,129 @@
+import base64
+import json
+import os
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from devops_bot import common, http_client, token_cache
+from devops_bot.commands import auth
+
+
+@pytest.fixture(autouse=True)
+def token_file(monkeypatch):
+    monkeypatch.setattr(token_cache, '_refresher', token_cache.TokenRefresher())
+    monkeypatch.setattr(token_cache, 'VERIFY_INITIAL_DELAY', 0.01)
+    return common.DEVOPS_BOT_TOKEN_FILE
+
+
+def saved_record(expires_in, verified=True, username='alice'):
+    record = {'token': 'tok', 'username': username, 'verified': verified,
+              'verified_at': time.time() - 3600 if verified else None, 'expires_at': time.time() + expires_in}
+    token_cache.save_token_record(record)
+    return record
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+
+def test_token_expiry_sources():
+    now = time.time()
+    assert token_cache.token_expiry('tok', {'expires_at': 1234}) == 1234
+    assert abs(token_cache.token_expiry('tok', {'expires_in': 60}) - (now + 60)) < 5
+    claims = base64.urlsafe_b64encode(json.dumps({'exp': 4102444800}).encode()).decode().rstrip('=')
+    assert token_cache.token_expiry(f"header.{claims}.signature") == 4102444800
+    assert abs(token_cache.token_expiry('not-a-jwt') - (now + token_cache.TOKEN_TTL)) < 5
+
+
+def test_legacy_token_file_is_unverified(token_file):
+    common.ensure_user_folder()
+    with open(token_file, 'w') as legacy:
+        legacy.write('plain-token\n')
+    record = token_cache.load_token_record()
+    assert record['token'] == 'plain-token'
+    assert record['username'] is None
+    assert token_cache.token_status(record) == 'unverified'
+
+
+def test_token_status_transitions():
+    record = {'token': 'tok', 'username': 'alice', 'verified': True, 'verified_at': 0, 'expires_at': 1000}
+    assert token_cache.token_status(None) == 'missing'
+    assert token_cache.token_status(record, now=1000) == 'expired'
+    assert token_cache.token_status(record, now=1000 - token_cache.REFRESH_MARGIN) == 'expiring'
+    assert token_cache.token_status(record, now=1000 - token_cache.REFRESH_MARGIN - 1) == 'valid'
+    assert token_cache.token_status(dict(record, verified=False), now=0) == 'unverified'
+
+
+def test_saved_token_is_private(token_file):
+    saved_record(3600)
+    assert os.stat(token_file).st_mode & 0o777 == 0o600
+
+
+def test_verify_retries_until_accepted(monkeypatch):
+    responses = [FakeResponse(503), FakeResponse(401), FakeResponse(200, {'expires_in': 7200})]
+    monkeypatch.setattr(http_client, 'http_post', lambda *args, **kwargs: responses.pop(0))
+    record = saved_record(60, verified=False)
+
+    assert token_cache.verify_token_remote(record, timeout=5)
+    assert not responses
+    saved = token_cache.load_token_record()
+    assert saved['verified'] and saved['expires_at'] > time.time() + 7000
+
+
+def test_verify_gives_up_after_timeout(monkeypatch):
+    monkeypatch.setattr(http_client, 'http_post', lambda *args, **kwargs: FakeResponse(401))
+    record = saved_record(60, verified=False)
+
+    assert not token_cache.verify_token_remote(record, timeout=0.1)
+    assert not token_cache.load_token_record()['verified']
+
+
+def test_valid_token_needs_no_network(monkeypatch):
+    monkeypatch.setattr(token_cache, 'verify_token_remote', pytest.fail)
+    saved_record(3600)
+    assert token_cache.get_valid_token() == 'tok'
+
+
+def test_expiring_token_is_refreshed_in_background(monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr(token_cache, 'verify_token_remote', lambda record: started.set())
+    saved_record(60)
+
+    assert token_cache.get_valid_token() == 'tok'
+    assert started.wait(2)
+
+
+def test_expired_token_is_not_returned():
+    saved_record(-1)
+    assert token_cache.get_valid_token() is None
+
+
+def test_login_keeps_expiring_token_and_refreshes_it(monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr(token_cache, 'verify_token_remote', lambda record: started.set())
+    saved_record(60)
+
+    result = CliRunner().invoke(auth.login, [])
+    assert result.exit_code == 0, result.output
+    assert 'Already logged in as alice' in result.output
+    assert 're-verifying it in the background' in result.output
+    assert started.wait(2)
+
+
+def test_login_prompts_when_token_expired(monkeypatch):
+    monkeypatch.setattr(auth, 'http_post', lambda *args, **kwargs: FakeResponse(200, {'token': 'new', 'expires_in': 3600}))
+    monkeypatch.setattr(auth, 'verify_token_remote', lambda record: True)
+    saved_record(-1)
+
+    result = CliRunner().invoke(auth.login, [], input='alice\nsecret\n')
+    assert result.exit_code == 0, result.output
+    assert 'Login successful' in result.output
+    assert token_cache.load_token_record()['token'] == 'new'
@@ -0,0 +1,110 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import pytest
+
+from devops_bot import versions
+from devops_bot.common import encrypt_data
+from devops_bot.versions import VersionPayloadCache
+
+
+def test_payload_cache_round_trip(tmp_path, key):
+    cache = VersionPayloadCache(str(tmp_path), memory_entries=1)
+    info = {'version_id': 'v1', 'content': []}
+    cache.put('v1', '"etag1"', encrypt_data(json.dumps(info), key), info)
+    cache.put('v2', '"etag2"', encrypt_data(json.dumps(info), key), info)
+    # v1 has left the memory tier and is read back from disk.
+    assert cache.get('v1', '"etag1"') == info
+    assert cache.get('v1', '"other"') is None
+
+
+def test_concurrent_eviction_is_safe(tmp_path, key):
+    cache = VersionPayloadCache(str(tmp_path), memory_entries=2, disk_entries=5)
+    body = encrypt_data(json.dumps({'content': []}), key)
+
+    def work(i):
+        cache.put(f"v{i}", f'"{i}"', body, {'content': []})
+        cache.get(f"v{i - 3}", f'"{i - 3}"')
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(work, range(400)))  # re-raises any worker exception
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.enc')]) == 5
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+@pytest.fixture
+def version_bucket(aws_credentials, aws):
+    s3 = aws('s3')
+    s3.create_bucket(Bucket=versions.VERSION_BUCKET_NAME)
+    return s3
+
+
+def test_listing_restores_entries_lost_to_concurrent_saves(version_bucket):
+    versions.save_version_info_to_bucket('v1', 'first', [{'InstanceId': 'i-1'}])
+    stale_manifest = versions.load_bucket_manifest(version_bucket)
+    versions.save_version_info_to_bucket('v2', 'second', [{'InstanceId': 'i-2'}, {'InstanceId': 'i-3'}])
+    # A save that read the manifest before v2 was added writes it back last.
+    versions.save_bucket_manifest(version_bucket, stale_manifest)
+
+    listed = {version[0]: version for version in versions.list_versions(ttl=0)}
+    assert set(listed) == {'v1', 'v2'}
+    assert listed['v2'][1:2] + listed['v2'][3:4] == ('second', 2)
+    assert set(versions.load_bucket_manifest(version_bucket)) == {'v1', 'v2'}
+
+
+def test_listing_trusts_the_manifest_within_the_ttl(version_bucket):
+    from devops_bot.aws_clients import get_client
+    from devops_bot.common import load_aws_credentials
+
+    listings = []
+    get_client('s3', load_aws_credentials()).meta.events.register(
+        'before-call.s3.ListObjectsV2', lambda **kwargs: listings.append(1))
+    versions.save_version_info_to_bucket('v1', 'first', [])
+    assert [version[0] for version in versions.list_versions()] == ['v1']
+    assert len(listings) == 1
+
+    stale_manifest = versions.load_bucket_manifest(version_bucket)
+    versions.save_version_info_to_bucket('v2', 'second', [])
+    versions.save_bucket_manifest(version_bucket, stale_manifest)
+    assert [version[0] for version in versions.list_versions()] == ['v1']
+    assert len(listings) == 1
+
+    assert {version[0] for version in versions.list_versions(ttl=0)} == {'v1', 'v2'}
+    versions.save_bucket_manifest(version_bucket, stale_manifest)
+    assert {version[0] for version in versions.list_versions(rebuild=True)} == {'v1', 'v2'}
+    assert len(listings) == 3
+
+
+def test_listing_drops_deleted_versions(version_bucket):
+    versions.save_version_info_to_bucket('v1', 'first', [])
+    versions.save_version_info_to_bucket('v2', 'second', [])
+    version_bucket.delete_object(Bucket=versions.VERSION_BUCKET_NAME, Key='v1.enc')
+
+    assert [version[0] for version in versions.list_versions(ttl=0)] == ['v2']
+
+
+def test_timestamps_are_utc_in_saves_and_rebuilds(version_bucket):
+    versions.save_version_info_to_bucket('v1', 'first', [])
+    saved = versions.load_bucket_manifest(version_bucket)['v1']['timestamp']
+    rebuilt = versions.rebuild_bucket_manifest(version_bucket)['v1']['timestamp']
+    for timestamp in (saved, rebuilt):
+        assert timestamp.endswith('+00:00')
+    assert abs((versions.parse_timestamp(saved) - versions.parse_timestamp(rebuilt)).total_seconds()) < 5
+
+
+def test_since_and_order_use_utc(version_bucket):
+    versions.save_version_info_to_bucket('old', 'old', [])
+    versions.save_version_info_to_bucket('new', 'new', [])
+    manifest = versions.load_bucket_manifest(version_bucket)
+    manifest['old']['timestamp'] = '2024-07-25 23:30:00+00:00'
+    manifest['new']['timestamp'] = '2024-07-26 01:31:00+02:00'  # a minute later, saved in UTC+2
+    versions.save_bucket_manifest(version_bucket, manifest)
+
+    listed = versions.list_versions()
+    assert [version[0] for version in listed] == ['new', 'old']
+    assert listed[0][2] == '2024-07-25 23:31:00+00:00'
+    assert [version[0] for version in versions.list_versions(since='2024-07-25 23:31')] == ['new']
+    with pytest.raises(click.BadParameter):
+        versions.list_versions(since='yesterday')
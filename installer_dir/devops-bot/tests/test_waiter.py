@@ -0,0 +1,101 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from devops_bot.waiter import InstanceWaiter, is_retryable
+
+
+@pytest.fixture
+def ec2(aws):
+    client = aws('ec2')
+    return client
+
+
+@pytest.fixture
+def launch(ami_id):
+    def launch(ec2, count):
+        instances = ec2.run_instances(ImageId=ami_id, InstanceType='t2.micro', MinCount=count, MaxCount=count)['Instances']
+        return [instance['InstanceId'] for instance in instances]
+    return launch
+
+
+def fast_waiter(ec2):
+    return InstanceWaiter(ec2, initial_delay=0.01, max_delay=0.02)
+
+
+def test_waits_for_many_instances_in_one_poll(ec2, launch):
+    instance_ids = launch(ec2, 30)
+    waiter = fast_waiter(ec2)
+    instances = waiter.wait(instance_ids, timeout=5)
+    assert [instance['InstanceId'] for instance in instances] == instance_ids
+    assert waiter.polls <= 2
+
+
+def test_unknown_id_does_not_hide_known_instances(ec2, launch):
+    instance_ids = launch(ec2, 2)
+    waiter = fast_waiter(ec2)
+    futures = [waiter.submit(instance_id, timeout=5) for instance_id in instance_ids]
+    bogus = waiter.submit('i-0123456789abcdef0', timeout=0.5)
+    assert [future.result(timeout=3)['InstanceId'] for future in futures] == instance_ids
+    with pytest.raises(TimeoutError):
+        bogus.result(timeout=5)
+
+
+def test_terminated_instance_fails_its_future(ec2, launch):
+    instance_id, = launch(ec2, 1)
+    ec2.terminate_instances(InstanceIds=[instance_id])
+    with pytest.raises(Exception, match='terminated|shutting-down'):
+        fast_waiter(ec2).wait([instance_id], timeout=5)
+
+
+class FlakyEC2:
+    """Raise the queued errors from the next describe_instances pages, then answer normally."""
+
+    def __init__(self, ec2, errors):
+        self.ec2 = ec2
+        self.errors = list(errors)
+
+    def get_paginator(self, name):
+        if self.errors:
+            error = self.errors.pop(0)
+            return FailingPaginator(error)
+        return self.ec2.get_paginator(name)
+
+
+class FailingPaginator:
+    def __init__(self, error):
+        self.error = error
+
+    def paginate(self, **kwargs):
+        raise self.error
+
+
+def client_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+                       'DescribeInstances')
+
+
+def test_transient_errors_are_retried(ec2, launch):
+    instance_ids = launch(ec2, 2)
+    flaky = FlakyEC2(ec2, [EndpointConnectionError(endpoint_url='https://ec2.us-east-1.amazonaws.com'),
+                           client_error('RequestLimitExceeded', 503), RuntimeError('connection reset')])
+    waiter = fast_waiter(flaky)
+    assert [instance['InstanceId'] for instance in waiter.wait(instance_ids, timeout=5)] == instance_ids
+    assert not flaky.errors
+    assert waiter.polls >= 4
+
+
+def test_waiter_keeps_working_after_errors(ec2, launch):
+    first, second = launch(ec2, 2)
+    flaky = FlakyEC2(ec2, [ValueError('unexpected')] * 3)
+    waiter = fast_waiter(flaky)
+    assert waiter.submit(first, timeout=5).result(timeout=5)['InstanceId'] == first
+    assert waiter.submit(second, timeout=5).result(timeout=5)['InstanceId'] == second
+
+
+def test_non_retryable_error_fails_the_batch(ec2, launch):
+    instance_id, = launch(ec2, 1)
+    waiter = fast_waiter(FlakyEC2(ec2, [client_error('UnauthorizedOperation', 403)]))
+    with pytest.raises(ClientError, match='UnauthorizedOperation'):
+        waiter.wait([instance_id], timeout=5)
+    assert not is_retryable(client_error('InvalidParameterValue'))
+    assert is_retryable(client_error('Throttling'))
@@ -0,0 +1,164 @@
+import sys
+import time
+
+import pytest
+
+from devops_bot import worker
+from devops_bot.master import Dispatcher, WorkerRegistry, create_app
+from devops_bot.worker import Heartbeat, TaskQueue, collect_telemetry, create_worker_app
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="commands run through a POSIX shell")
+
+
+def wait_for(job, statuses=('succeeded', 'failed', 'cancelled'), timeout=10):
+    deadline = time.monotonic() + timeout
+    while job.status not in statuses:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+def test_jobs_report_exit_code_and_output():
+    tasks = TaskQueue(parallelism=2)
+    ok = tasks.submit("echo hello; echo oops >&2")
+    bad = tasks.submit("exit 3")
+
+    assert wait_for(ok).status == 'succeeded'
+    assert tasks.read_output(ok, 'stdout') == (b'hello\n', 6)
+    assert tasks.read_output(ok, 'stdout', 6) == (b'', 6)
+    assert tasks.read_output(ok, 'stderr', 2) == (b'ps\n', 5)
+    assert (wait_for(bad).status, bad.exit_code) == ('failed', 3)
+
+
+def test_output_is_readable_while_running():
+    tasks = TaskQueue(parallelism=1)
+    job = tasks.submit("echo first; sleep 0.5; echo second")
+    wait_for(job, ('running',))
+    deadline = time.monotonic() + 5
+    while tasks.read_output(job, 'stdout')[0] != b'first\n':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert job.status == 'running'
+    wait_for(job)
+    assert tasks.read_output(job, 'stdout', 6) == (b'second\n', 13)
+
+
+def test_submit_does_not_wait_for_the_pool():
+    tasks = TaskQueue(parallelism=1)
+    started = time.monotonic()
+    jobs = [tasks.submit("sleep 0.2") for _ in range(3)]
+    assert time.monotonic() - started < 0.1
+    assert tasks.counts()['queued'] >= 2
+    for job in jobs:
+        wait_for(job)
+
+
+def test_cancel_queued_and_running_jobs():
+    tasks = TaskQueue(parallelism=1)
+    running = tasks.submit("sleep 30")
+    queued = tasks.submit("echo never")
+    wait_for(running, ('running',))
+
+    assert tasks.cancel(queued.id).status == 'cancelled'
+    started = time.monotonic()
+    tasks.cancel(running.id)
+    assert wait_for(running).status == 'cancelled'
+    assert time.monotonic() - started < 5
+    assert tasks.read_output(queued, 'stdout') == (b'', 0)
+    assert tasks.cancel('unknown') is None
+
+
+def test_output_is_capped_and_finished_jobs_evicted():
+    tasks = TaskQueue(parallelism=1, max_output=10, max_finished=2)
+    jobs = [tasks.submit("printf 0123456789abcdef") for _ in range(4)]
+    for job in jobs:
+        wait_for(job)
+
+    assert tasks.read_output(jobs[-1], 'stdout') == (b'0123456789', 10)
+    assert jobs[-1].truncated['stdout']
+    assert [job.id for job in tasks.jobs()] == [job.id for job in jobs[-2:]]
+
+
+def test_worker_app_endpoints():
+    tasks = TaskQueue(parallelism=2)
+    client = create_worker_app(tasks).test_client()
+
+    response = client.post('/execute_task', json={'command': 'echo hi'})
+    assert response.status_code == 202
+    job = wait_for(tasks.get(response.get_json()['job_id']))
+    output = client.get(f"/tasks/{job.id}/output").get_json()
+    assert (output['status'], output['stdout'], output['stdout_offset']) == ('succeeded', 'hi\n', 3)
+    assert client.get(f"/tasks/{job.id}/output?stdout_offset=3").get_json()['stdout'] == ''
+
+    assert client.post('/execute_task', json={}).status_code == 400
+    assert client.post('/execute_tasks', json={'commands': ['true', '']}).status_code == 400
+    assert client.post('/execute_task', json={'command': ['ls']}).status_code == 400
+    assert len(client.post('/execute_tasks', json={'commands': ['true'] * 5}).get_json()['job_ids']) == 5
+    assert client.get('/tasks/missing').status_code == 404
+    assert client.post('/tasks/missing/cancel').status_code == 404
+    assert len(client.get('/tasks?limit=2').get_json()['tasks']) == 2
+
+
+def test_finished_jobs_are_evicted_by_retained_output():
+    tasks = TaskQueue(parallelism=1, max_output=10, max_finished=100, max_retained=25)
+    jobs = [tasks.submit("printf 0123456789") for _ in range(4)] + [tasks.submit("true")]
+    for job in jobs:
+        wait_for(job)
+
+    assert [job.id for job in tasks.jobs()] == [job.id for job in jobs[-3:]]
+    assert sum(job.output_bytes() for job in tasks.jobs()) <= 25
+
+
+@pytest.mark.parametrize('commands', ['ls', ['ls', 3], ['ls', None], {'ls': 1}, None])
+def test_execute_tasks_rejects_anything_but_a_list_of_strings(commands):
+    tasks = TaskQueue(parallelism=1)
+    response = create_worker_app(tasks).test_client().post('/execute_tasks', json={'commands': commands})
+    assert response.status_code == 400
+    assert tasks.jobs() == []
+
+
+class MasterOverTestClient:
+    """Deliver the worker's heartbeat posts to a master app in process."""
+
+    def __init__(self):
+        self.restart()
+        self.paths = []
+
+    def restart(self):
+        self.registry = WorkerRegistry()
+        self.client = create_app(self.registry, Dispatcher(self.registry)).test_client()
+
+    def post(self, url, json, timeout):
+        path = '/' + url.split('/', 3)[3]
+        self.paths.append(path)
+        response = self.client.post(path, json=json)
+        assert response.status_code in (200, 404), response.get_json()
+        response.raise_for_status = lambda: None  # the only error let through is the 404 send() handles
+        return response
+
+
+def test_telemetry_reports_queue_and_current_task():
+    tasks = TaskQueue(parallelism=1)
+    job = tasks.submit("sleep 0.3")
+    tasks.submit("true")
+    wait_for(job, ('running',))
+
+    telemetry = collect_telemetry(tasks)
+    assert (telemetry['queued'], telemetry['running'], telemetry['current_task']) == (1, 1, 'sleep 0.3')
+    assert telemetry['disk_free'] > 0
+
+
+def test_heartbeat_registers_once_and_again_after_master_restart(monkeypatch):
+    master = MasterOverTestClient()
+    monkeypatch.setattr(worker, 'http_post', master.post)
+    heartbeat = Heartbeat('http://master:5001/', {'worker_id': 'w1', 'worker_url': 'http://w1:5002'}, TaskQueue(parallelism=1))
+
+    heartbeat.send()
+    heartbeat.send()
+    assert master.paths == ['/register_worker', '/heartbeat']
+    assert master.registry.get('w1')['queued'] == 0
+
+    master.restart()
+    heartbeat.send()
+    assert master.paths[2:] == ['/heartbeat', '/register_worker']
+    assert master.registry.get('w1')['status'] == 'healthy'
@@ -0,0 +1,174 @@
+"""Local record of the DevOps Bot login token, its expiry and verification.
+
+The token file holds the token together with the user it belongs to, when it
+expires and whether the API has verified it.  A verified token is trusted
+locally, without a network call, until it is close to expiry; inside that
+window it is re-verified on a background thread while the command carries
+on.  Verification polls with a short, growing delay instead of fixed steps.
+
+Files written by older versions hold only the bare token; they are read as
+an unverified token of unknown owner.
+"""
+import atexit
+import base64
+import json
+import os
+import random
+import threading
+import time
+
+from .common import API_BASE_URL, DEVOPS_BOT_TOKEN_FILE, ensure_user_folder
+
+TOKEN_TTL = 12 * 3600  # seconds, when neither the API nor the token says
+REFRESH_MARGIN = 600  # seconds before expiry to start re-verifying
+REFRESH_INTERVAL = 60  # seconds between re-verifications of an expiring token
+VERIFY_TIMEOUT = 60  # seconds of polling before giving up
+VERIFY_INITIAL_DELAY = 0.25  # seconds
+VERIFY_MAX_DELAY = 5  # seconds
+REFRESH_JOIN_TIMEOUT = 3  # seconds an exiting command waits for a refresh
+
+
+def token_expiry(token, response=None):
+    """Return the expiry of ``token`` as a timestamp.
+
+    Uses ``expires_at`` or ``expires_in`` from the API response, then the
+    ``exp`` claim if the token is a JWT, then ``TOKEN_TTL`` from now.
+    """
+    response = response or {}
+    if response.get('expires_at'):
+        return float(response['expires_at'])
+    if response.get('expires_in'):
+        return time.time() + float(response['expires_in'])
+    parts = token.split('.')
+    if len(parts) == 3:
+        try:
+            payload = parts[1] + '=' * (-len(parts[1]) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+        except (ValueError, KeyError, TypeError):
+            pass
+    return time.time() + TOKEN_TTL
+
+
+def load_token_record():
+    """Return the saved token record, or None if there is no token."""
+    if not os.path.exists(DEVOPS_BOT_TOKEN_FILE):
+        return None
+    with open(DEVOPS_BOT_TOKEN_FILE) as token_file:
+        content = token_file.read().strip()
+    if not content:
+        return None
+    try:
+        record = json.loads(content)
+    except ValueError:
+        record = None
+    if not isinstance(record, dict) or not record.get('token'):
+        record = {'token': content, 'username': None, 'verified': False, 'verified_at': None,
+                  'expires_at': token_expiry(content)}
+    return record
+
+
+def save_token_record(record):
+    ensure_user_folder()
+    tmp_path = f"{DEVOPS_BOT_TOKEN_FILE}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as token_file:
+        json.dump(record, token_file)
+    os.replace(tmp_path, DEVOPS_BOT_TOKEN_FILE)
+
+
+def new_token_record(username, token, response=None):
+    return {'token': token, 'username': username, 'verified': False, 'verified_at': None,
+            'expires_at': token_expiry(token, response)}
+
+
+def token_status(record, now=None):
+    """Return 'missing', 'expired', 'unverified', 'expiring' or 'valid'."""
+    now = time.time() if now is None else now
+    if not record:
+        return 'missing'
+    if record['expires_at'] <= now:
+        return 'expired'
+    if not record['verified']:
+        return 'unverified'
+    if record['expires_at'] - now <= REFRESH_MARGIN:
+        return 'expiring'
+    return 'valid'
+
+
+def verify_token_remote(record, timeout=VERIFY_TIMEOUT):
+    """Poll the API until it accepts the token, with jittered exponential backoff.
+
+    Updates and saves ``record`` and returns True once verified; returns
+    False when the API has not accepted the token within ``timeout``.
+    """
+    from requests.exceptions import RequestException
+
+    from .http_client import http_post
+
+    deadline = time.monotonic() + timeout
+    delay = VERIFY_INITIAL_DELAY
+    while True:
+        try:
+            response = http_post(f"{API_BASE_URL}/api/verify_token", headers={'Content-Type': 'application/json'},
+                                 json={"username": record['username'], "token": record['token']})
+        except RequestException:
+            response = None
+        if response is not None and response.status_code == 200:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            body = body if isinstance(body, dict) else {}
+            if body.get('token'):
+                record['token'] = body['token']
+            if body.get('token') or body.get('expires_at') or body.get('expires_in'):
+                record['expires_at'] = token_expiry(record['token'], body)
+            record['verified'] = True
+            record['verified_at'] = time.time()
+            save_token_record(record)
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay * random.uniform(0.8, 1.2), remaining))
+        delay = min(delay * 2, VERIFY_MAX_DELAY)
+
+
+class TokenRefresher:
+    """Re-verify an expiring token on one background thread per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, record):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=verify_token_remote, args=(record,), daemon=True)
+            self._thread.start()
+        atexit.register(self.join)
+
+    def join(self, timeout=REFRESH_JOIN_TIMEOUT):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+_refresher = TokenRefresher()
+
+
+def get_valid_token():
+    """Return the saved token if it can be used, checking locally.
+
+    This is what ``login`` uses to decide whether to prompt.  An expiring or
+    unverified token is still returned and re-verified in the background; an
+    expired or missing one returns None.
+    """
+    record = load_token_record()
+    status = token_status(record)
+    if status in ('missing', 'expired'):
+        return None
+    recently_verified = record['verified_at'] and time.time() - record['verified_at'] < REFRESH_INTERVAL
+    if status in ('expiring', 'unverified') and record['username'] and not recently_verified:
+        _refresher.start(record)
+    return record['token']
@@ -0,0 +1,390 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import click
+from botocore.exceptions import ClientError
+
+from .aws_clients import get_client
+from .common import (
+    BASE_DIR, VERSION_BUCKET_NAME, VERSION_DIR, decrypt_data, encrypt_data, ensure_user_folder, ensure_version_folder,
+    load_aws_credentials, load_key
+)
+
+def check_bucket_exists(bucket_name):
+    try:
+        credentials = load_aws_credentials()
+        s3 = get_client('s3', credentials)
+        s3.head_bucket(Bucket=bucket_name)
+        return True
+    except ClientError:
+        return False
+
+# Serialize instance information
+def serialize_instance_info(instance):
+    for key, value in instance.items():
+        if isinstance(value, datetime):
+            instance[key] = value.isoformat()
+        elif isinstance(value, list):
+            instance[key] = [serialize_instance_info(item) if isinstance(item, dict) else item for item in value]
+        elif isinstance(value, dict):
+            instance[key] = serialize_instance_info(value)
+    return instance
+
+def create_version_bucket():
+    credentials = load_aws_credentials()
+    if not credentials:
+        click.echo("No AWS credentials found. Please configure them first.")
+        return None
+
+    s3 = get_client('s3', credentials)
+    try:
+        if click.confirm("Do you want to create a new bucket for version information?", default=True):
+            s3.create_bucket(Bucket=VERSION_BUCKET_NAME)
+            click.echo(f"S3 bucket '{VERSION_BUCKET_NAME}' created successfully.")
+    except ClientError as e:
+        click.echo(click.style(f"Failed to create S3 bucket: {e}", fg="red"))
+
+# The manifest is an encrypted index of every version in a store (the local
+# version folder or the version bucket) holding its comment, timestamp,
+# instance count and location, so listings never decrypt version payloads.
+MANIFEST_NAME = "manifest.enc"
+LOCAL_MANIFEST_FILE = os.path.join(VERSION_DIR, MANIFEST_NAME)
+
+# Timestamps are stored in UTC as "2024-07-25 08:56:10+00:00" so entries
+# written on machines in different time zones sort and filter together.
+def utc_timestamp(moment=None):
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(sep=' ', timespec='seconds')
+
+def parse_timestamp(value, naive_as_local=True):
+    """Parse a stored or user-given timestamp into an aware datetime.
+
+    Manifests written before timestamps were stored in UTC hold naive local
+    times; ``--since`` values without an offset are taken as UTC.
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo:
+        return moment
+    return moment.astimezone() if naive_as_local else moment.replace(tzinfo=timezone.utc)
+
+def manifest_entry(comment, content, location, timestamp=None, etag=None):
+    entry = {
+        'comment': comment,
+        'timestamp': timestamp or utc_timestamp(),
+        'count': len(content),
+        'location': location
+    }
+    if etag:
+        entry['etag'] = etag
+    return entry
+
+def load_local_manifest():
+    if not os.path.exists(LOCAL_MANIFEST_FILE):
+        return None
+    with open(LOCAL_MANIFEST_FILE, 'rb') as manifest_file:
+        return json.loads(decrypt_data(manifest_file.read(), load_key()))
+
+def save_local_manifest(manifest):
+    ensure_version_folder()
+    with open(LOCAL_MANIFEST_FILE, 'wb') as manifest_file:
+        manifest_file.write(encrypt_data(json.dumps(manifest), load_key()))
+
+def load_bucket_manifest(s3):
+    try:
+        response = s3.get_object(Bucket=VERSION_BUCKET_NAME, Key=MANIFEST_NAME)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(decrypt_data(response['Body'].read(), load_key()))
+
+def save_bucket_manifest(s3, manifest):
+    s3.put_object(Bucket=VERSION_BUCKET_NAME, Key=MANIFEST_NAME, Body=encrypt_data(json.dumps(manifest), load_key()))
+
+def reconcile_local_manifest(manifest):
+    """Bring the local manifest in line with the version files on disk.
+
+    Only versions missing from the manifest (e.g. written before it existed)
+    are decrypted.  Returns True when the manifest changed.
+    """
+    if not os.path.isdir(VERSION_DIR):
+        return False
+    on_disk = {
+        file_name[:-len(".enc")] for file_name in os.listdir(VERSION_DIR)
+        if file_name.endswith(".enc") and file_name != MANIFEST_NAME
+    }
+    changed = False
+    for version_id in set(manifest) - on_disk:
+        del manifest[version_id]
+        changed = True
+    for version_id in on_disk - set(manifest):
+        version_info = load_version_info(version_id)
+        if version_info:
+            mtime = os.path.getmtime(os.path.join(VERSION_DIR, f"{version_id}.enc"))
+            timestamp = utc_timestamp(datetime.fromtimestamp(mtime, timezone.utc))
+            manifest[version_id] = manifest_entry(version_info.get('comment', ''), version_info['content'], 'local', timestamp)
+            changed = True
+    return changed
+
+def iter_version_objects(s3):
+    """Yield every version object in the version bucket, page by page."""
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=VERSION_BUCKET_NAME):
+        for obj in page.get('Contents', []):
+            if obj['Key'] != MANIFEST_NAME:
+                yield obj
+
+def reconcile_bucket_manifest(s3, manifest):
+    """Bring the bucket manifest in line with the version objects.
+
+    Saves running at the same time each rewrite the manifest, so one can drop
+    the other's entry; the object listing is the source of truth.  Only
+    versions missing from the manifest or overwritten since (a different
+    ETag) are read.  Returns True when the manifest changed.
+    """
+    objects = {obj['Key'].split(".")[0]: obj for obj in iter_version_objects(s3)}
+    changed = False
+    for version_id in set(manifest) - set(objects):
+        del manifest[version_id]
+        changed = True
+    stale = [(version_id, obj['ETag']) for version_id, obj in objects.items()
+             if manifest.get(version_id, {}).get('etag') != obj['ETag']]
+    for (version_id, etag), version_info in zip(stale, load_version_infos(stale)):
+        if version_info:
+            timestamp = utc_timestamp(objects[version_id]['LastModified'])
+            manifest[version_id] = manifest_entry(version_info.get('comment', ''), version_info['content'], 's3', timestamp, etag)
+            changed = True
+    return changed
+
+# Listings trust the bucket manifest and check it against the version objects
+# at most once per TTL, so a listing is normally one small read.  When this
+# machine last checked is kept locally.
+BUCKET_MANIFEST_CHECK_FILE = os.path.join(BASE_DIR, "version_manifest_check.json")
+BUCKET_MANIFEST_TTL = 3600  # seconds
+
+def bucket_manifest_checked_within(ttl):
+    if not os.path.exists(BUCKET_MANIFEST_CHECK_FILE):
+        return False
+    with open(BUCKET_MANIFEST_CHECK_FILE) as check_file:
+        return time.time() - json.load(check_file)['checked_at'] < ttl
+
+def mark_bucket_manifest_checked():
+    ensure_user_folder()
+    with open(BUCKET_MANIFEST_CHECK_FILE, 'w') as check_file:
+        json.dump({'checked_at': time.time()}, check_file)
+
+def rebuild_bucket_manifest(s3):
+    """Rebuild the bucket manifest by reading every version object once."""
+    manifest = {}
+    reconcile_bucket_manifest(s3, manifest)
+    save_bucket_manifest(s3, manifest)
+    mark_bucket_manifest_checked()
+    return manifest
+
+# Version payloads fetched from the bucket are cached twice, keyed by version
+# ID and ETag so an overwritten object is never served stale: decrypted in
+# memory for this process, and as the still-encrypted object body on disk so
+# later runs skip the download.
+PAYLOAD_CACHE_DIR = os.path.join(BASE_DIR, "version_cache")
+PAYLOAD_MEMORY_ENTRIES = 256
+PAYLOAD_DISK_ENTRIES = 2000
+FETCH_WORKERS = 16
+
+class VersionPayloadCache:
+    def __init__(self, directory=PAYLOAD_CACHE_DIR, memory_entries=PAYLOAD_MEMORY_ENTRIES, disk_entries=PAYLOAD_DISK_ENTRIES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._memory = OrderedDict()
+
+    def _path(self, version_id, etag):
+        tag = etag.strip('"')
+        return os.path.join(self.directory, f"{version_id}.{tag}.enc")
+
+    def get(self, version_id, etag):
+        key = (version_id, etag)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(version_id, etag)
+        try:
+            with open(path, 'rb') as cached_file:
+                encrypted_version_info = cached_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Never cached, or evicted by another thread just now.
+            return None
+        version_info = json.loads(decrypt_data(encrypted_version_info, load_key()))
+        self._remember(key, version_info)
+        return version_info
+
+    def put(self, version_id, etag, encrypted_body, version_info):
+        path = self._path(version_id, etag)
+        with self._disk_lock:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # Write then rename, so a concurrent get never reads half a file.
+            with open(f"{path}.tmp", 'wb') as cached_file:
+                cached_file.write(encrypted_body)
+            os.replace(f"{path}.tmp", path)
+            self._evict_disk()
+        self._remember((version_id, etag), version_info)
+
+    def _remember(self, key, version_info):
+        with self._lock:
+            self._memory[key] = version_info
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Called with the disk lock held; other processes may still remove files.
+        entries = [name for name in os.listdir(self.directory) if name.endswith('.enc')]
+        if len(entries) <= self.disk_entries:
+            return
+        stamped = []
+        for name in entries:
+            path = os.path.join(self.directory, name)
+            try:
+                stamped.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        stamped.sort()
+        for _, path in stamped[:len(stamped) - self.disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+_payload_cache = VersionPayloadCache()
+
+def fetch_version_from_bucket(s3, version_id, etag=None):
+    """Return a bucket version's payload, from the cache when the ETag matches."""
+    if etag:
+        version_info = _payload_cache.get(version_id, etag)
+        if version_info is not None:
+            return version_info
+    response = s3.get_object(Bucket=VERSION_BUCKET_NAME, Key=f"{version_id}.enc")
+    encrypted_version_info = response['Body'].read()
+    version_info = json.loads(decrypt_data(encrypted_version_info, load_key()))
+    _payload_cache.put(version_id, response['ETag'], encrypted_version_info, version_info)
+    return version_info
+
+def load_version_infos(versions, workers=FETCH_WORKERS):
+    """Load many versions concurrently, yielding payloads in input order.
+
+    ``versions`` holds (version_id, etag) pairs; the ETag may be None.
+    Missing versions yield None.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(lambda version: load_version_info(*version), versions)
+
+def save_version_info_locally(version_id, comment, content):
+    ensure_version_folder()
+    key = load_key()
+    version_info = {
+        'version_id': version_id,
+        'comment': comment,
+        'content': [serialize_instance_info(instance) for instance in content]
+    }
+    encrypted_version_info = encrypt_data(json.dumps(version_info), key)
+    with open(os.path.join(VERSION_DIR, f"{version_id}.enc"), 'wb') as version_file:
+        version_file.write(encrypted_version_info)
+    manifest = load_local_manifest() or {}
+    manifest[version_id] = manifest_entry(comment, content, 'local')
+    save_local_manifest(manifest)
+    click.echo(f"Version information saved locally with ID {version_id}.")
+
+def save_version_info_to_bucket(version_id, comment, content):
+    key = load_key()
+    credentials = load_aws_credentials()
+    if not credentials:
+        click.echo("No AWS credentials found. Please configure them first.")
+        return None
+
+    version_info = {
+        'version_id': version_id,
+        'comment': comment,
+        'content': [serialize_instance_info(instance) for instance in content]
+    }
+    encrypted_version_info = encrypt_data(json.dumps(version_info), key)
+
+    s3 = get_client('s3', credentials)
+    try:
+        response = s3.put_object(Bucket=VERSION_BUCKET_NAME, Key=f"{version_id}.enc", Body=encrypted_version_info)
+        manifest = load_bucket_manifest(s3)
+        if manifest is None:
+            manifest = rebuild_bucket_manifest(s3)
+        manifest[version_id] = manifest_entry(comment, content, 's3', etag=response['ETag'])
+        save_bucket_manifest(s3, manifest)
+        click.echo(f"Version information saved in S3 bucket with ID {version_id}.")
+    except ClientError as e:
+        click.echo(click.style(f"Failed to save version information to bucket: {e}", fg="red"))
+
+def load_version_info(version_id, etag=None):
+    key = load_key()
+    if os.path.exists(os.path.join(VERSION_DIR, f"{version_id}.enc")):
+        with open(os.path.join(VERSION_DIR, f"{version_id}.enc"), 'rb') as version_file:
+            encrypted_version_info = version_file.read()
+        decrypted_version_info = decrypt_data(encrypted_version_info, key)
+        return json.loads(decrypted_version_info)
+    else:
+        try:
+            credentials = load_aws_credentials()
+            s3 = get_client('s3', credentials)
+            return fetch_version_from_bucket(s3, version_id, etag)
+        except ClientError as e:
+            click.echo(click.style(f"No version information found for ID {version_id}.", fg="red"))
+            return None
+
+def list_versions(limit=None, since=None, rebuild=False, ttl=BUCKET_MANIFEST_TTL):
+    """Return (version_id, comment, timestamp, count, etag) tuples, newest first.
+
+    Reads the local and bucket manifests instead of the version payloads.
+    The bucket manifest is trusted as it is; once ``ttl`` has passed since
+    the last check it is reconciled with a listing of the version objects,
+    and it is rebuilt from them when it is missing or ``rebuild`` is set.  ``since``
+    is a UTC date or time such as "2024-07-25" and ``limit`` caps the number
+    of versions returned.  Timestamps are returned in UTC.
+    """
+    entries = {}
+    manifest = load_local_manifest() or {}
+    if reconcile_local_manifest(manifest):
+        save_local_manifest(manifest)
+    entries.update(manifest)
+
+    credentials = load_aws_credentials()
+    if credentials:
+        s3 = get_client('s3', credentials)
+        try:
+            manifest = None if rebuild else load_bucket_manifest(s3)
+            if manifest is None:
+                manifest = rebuild_bucket_manifest(s3)
+            elif not bucket_manifest_checked_within(ttl):
+                if reconcile_bucket_manifest(s3, manifest):
+                    save_bucket_manifest(s3, manifest)
+                mark_bucket_manifest_checked()
+            entries.update(manifest)
+        except ClientError as e:
+            click.echo(click.style(f"Error listing versions in S3: {e}", fg="red"))
+
+    try:
+        since = parse_timestamp(since, naive_as_local=False) if since else None
+    except ValueError:
+        raise click.BadParameter(f"'{since}' is not a date or time such as 2024-07-25.", param_hint="'--since'")
+    versions = []
+    for version_id, entry in entries.items():
+        timestamp = parse_timestamp(entry['timestamp'])
+        if not since or timestamp >= since:
+            versions.append((version_id, entry.get('comment', ''), timestamp, entry['count'], entry.get('etag')))
+    versions.sort(key=lambda version: version[2], reverse=True)
+    versions = [(version_id, comment, utc_timestamp(timestamp), count, etag)
+                for version_id, comment, timestamp, count, etag in versions]
+    return versions[:limit] if limit else versions
@@ -0,0 +1,152 @@
+"""Shared waiter for EC2 instances to reach the running state.
+
+Every pending instance gets a future.  One background thread polls all of
+them with a single batched describe_instances call per round, starting with
+short intervals and backing off exponentially with jitter, and resolves each
+future as soon as its instance is ready.  Instances are looked up with an
+instance-id filter rather than InstanceIds, so an ID that is not visible yet
+is simply absent from the answer instead of failing the whole batch.  Launching 200 instances costs a
+handful of polls instead of 200 separate wait loops.
+
+A poll that is throttled or hits a network or server error is retried on
+the same backoff; the instances it covered only fail at their deadline.  Any
+other API error fails the instances of that batch.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+INITIAL_DELAY = 1.0
+MAX_DELAY = 15.0
+BACKOFF = 1.6
+DEFAULT_TIMEOUT = 600
+DESCRIBE_BATCH = 200  # values per instance-id filter
+
+FAILED_STATES = ('shutting-down', 'terminated', 'stopping', 'stopped')
+RETRYABLE_ERROR_CODES = ('RequestLimitExceeded', 'Throttling', 'ThrottlingException', 'RequestThrottled',
+                         'InternalError', 'InternalFailure', 'ServiceUnavailable', 'Unavailable')
+
+
+def is_retryable(error):
+    """True for throttling, 5xx and errors that never reached an answer from EC2."""
+    from botocore.exceptions import ClientError
+
+    if not isinstance(error, ClientError):
+        return True
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+    return error.response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES or status >= 500
+
+
+class InstanceWaiter:
+    def __init__(self, ec2, initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY, backoff=BACKOFF):
+        self.ec2 = ec2
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._reset_delay = False
+
+    def submit(self, instance_id, require_public_ip=False, timeout=DEFAULT_TIMEOUT):
+        """Return a future resolved with the instance description once it is ready.
+
+        Ready means running, and with ``require_public_ip`` also holding a
+        public IP.  The future fails if the instance stops or terminates, or
+        with TimeoutError after ``timeout`` seconds.
+        """
+        future = Future()
+        with self._lock:
+            self._pending[instance_id] = (future, require_public_ip, time.monotonic() + timeout)
+            # New work restarts the backoff so fresh launches are polled quickly.
+            self._reset_delay = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return future
+
+    def wait(self, instance_ids, require_public_ip=False, timeout=DEFAULT_TIMEOUT):
+        """Block until every instance is ready and return them in input order."""
+        futures = [self.submit(instance_id, require_public_ip, timeout) for instance_id in instance_ids]
+        return [future.result() for future in futures]
+
+    def _run(self):
+        delay = self.initial_delay
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        # Cleared under the same lock submit() checks, so no new work is missed.
+                        self._thread = None
+                        return
+                    if self._reset_delay:
+                        delay = self.initial_delay
+                        self._reset_delay = False
+                time.sleep(random.uniform(delay / 2, delay))
+                try:
+                    self._poll()
+                except Exception:
+                    # Deadlines still apply on the next poll; the thread must outlive the error.
+                    pass
+                delay = min(self.max_delay, delay * self.backoff)
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _poll(self):
+        with self._lock:
+            pending = dict(self._pending)
+        instance_ids = list(pending)
+        found = {}
+        for start in range(0, len(instance_ids), DESCRIBE_BATCH):
+            batch = instance_ids[start:start + DESCRIBE_BATCH]
+            self.polls += 1
+            try:
+                pages = self.ec2.get_paginator('describe_instances').paginate(
+                    Filters=[{'Name': 'instance-id', 'Values': batch}])
+                for page in pages:
+                    for reservation in page['Reservations']:
+                        for instance in reservation['Instances']:
+                            found[instance['InstanceId']] = instance
+            except Exception as e:
+                if not is_retryable(e):
+                    for instance_id in batch:
+                        self._finish(instance_id, error=e)
+
+        now = time.monotonic()
+        for instance_id, (future, require_public_ip, deadline) in pending.items():
+            instance = found.get(instance_id)
+            state = instance['State']['Name'] if instance else None
+            if state == 'running' and (instance.get('PublicIpAddress') or not require_public_ip):
+                self._finish(instance_id, result=instance)
+            elif state in FAILED_STATES:
+                self._finish(instance_id, error=Exception(f"Instance {instance_id} entered state '{state}' while waiting for it to run."))
+            elif now > deadline:
+                wanted = "'running' state with a public IP" if require_public_ip else "'running' state"
+                self._finish(instance_id, error=TimeoutError(f"Instance {instance_id} did not reach {wanted} within the timeout period."))
+
+    def _finish(self, instance_id, result=None, error=None):
+        with self._lock:
+            entry = self._pending.pop(instance_id, None)
+        if entry is None:
+            return
+        if error is not None:
+            entry[0].set_exception(error)
+        else:
+            entry[0].set_result(result)
+
+
+_waiters = {}
+_waiters_lock = threading.Lock()
+
+
+def get_instance_waiter(ec2):
+    """Return the process-wide waiter for an EC2 client."""
+    with _waiters_lock:
+        waiter = _waiters.get(id(ec2))
+        if waiter is None or waiter.ec2 is not ec2:
+            waiter = _waiters[id(ec2)] = InstanceWaiter(ec2)
+        return waiter
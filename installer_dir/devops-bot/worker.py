@@ -0,0 +1,337 @@
+"""Worker task queue: accept commands, run them on a bounded process pool.
+
+Submitting a task returns a job ID at once.  A fixed number of runner threads
+take jobs off the queue and run each command as a subprocess, capturing
+stdout, stderr and the exit code while it runs, so callers can poll status
+and read output incrementally by offset, or cancel a job that is queued or
+running.  Finished jobs are kept up to a limit on their number and on the
+output they hold in total, oldest evicted first.
+
+While it runs the worker sends the master a small heartbeat with its load,
+memory, free disk, task counts and current task, and registers again if the
+master has forgotten it.
+"""
+import itertools
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .http_client import http_post
+
+WORKER_PARALLELISM = os.cpu_count() or 2
+MAX_OUTPUT_BYTES = 4 * 1024 * 1024  # per stream and job
+MAX_FINISHED_JOBS = 1000
+MAX_RETAINED_OUTPUT_BYTES = 256 * 1024 * 1024  # across all finished jobs
+CANCEL_GRACE = 5  # seconds between terminate and kill
+HEARTBEAT_INTERVAL = 10  # seconds
+CURRENT_TASK_CHARS = 200
+
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class Job:
+    def __init__(self, command):
+        self.id = uuid.uuid4().hex
+        self.command = command
+        self.status = 'queued'
+        self.exit_code = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.process = None
+        self.output = {'stdout': bytearray(), 'stderr': bytearray()}
+        self.truncated = {'stdout': False, 'stderr': False}
+        self.cancel_requested = False
+
+    def summary(self):
+        return {
+            'job_id': self.id,
+            'command': self.command,
+            'status': self.status,
+            'exit_code': self.exit_code,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'stdout_bytes': len(self.output['stdout']),
+            'stderr_bytes': len(self.output['stderr']),
+        }
+
+    def output_bytes(self):
+        return len(self.output['stdout']) + len(self.output['stderr'])
+
+
+class TaskQueue:
+    def __init__(self, parallelism=WORKER_PARALLELISM, max_output=MAX_OUTPUT_BYTES, max_finished=MAX_FINISHED_JOBS,
+                 max_retained=MAX_RETAINED_OUTPUT_BYTES):
+        self.parallelism = max(1, parallelism)
+        self.max_output = max_output
+        self.max_finished = max_finished
+        self.max_retained = max_retained
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._queue = queue.Queue()
+        self._finished = 0
+        self._finished_bytes = 0
+        self._runners = [threading.Thread(target=self._run, daemon=True) for _ in range(self.parallelism)]
+        for runner in self._runners:
+            runner.start()
+
+    def submit(self, command):
+        job = Job(command)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, status=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if not status or job.status == status]
+
+    def counts(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running') + FINISHED_STATES}
+
+    def current(self):
+        """Return the command of the most recently started running job."""
+        with self._lock:
+            running = [job for job in self._jobs.values() if job.status == 'running']
+        if not running:
+            return None
+        return max(running, key=lambda job: job.started_at).command[:CURRENT_TASK_CHARS]
+
+    def read_output(self, job, stream, offset=0):
+        """Return the bytes of ``stream`` written after ``offset`` and the new offset."""
+        with self._lock:
+            data = bytes(job.output[stream][offset:])
+        return data, offset + len(data)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return job
+            job.cancel_requested = True
+            if job.status == 'queued':
+                self._finish(job, 'cancelled')
+                return job
+            process = job.process
+        if process is not None:
+            self._signal(process, signal.SIGTERM)
+            threading.Timer(CANCEL_GRACE, self._signal, (process, getattr(signal, 'SIGKILL', signal.SIGTERM))).start()
+        return job
+
+    def _signal(self, process, signum):
+        if process.poll() is not None:
+            return
+        try:
+            if os.name == 'posix':
+                # The command runs through a shell; signal its whole process group.
+                os.killpg(process.pid, signum)
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _finish(self, job, status):
+        # Called with the lock held.
+        job.status = status
+        job.finished_at = time.time()
+        job.process = None
+        self._finished += 1
+        self._finished_bytes += job.output_bytes()
+        if self._finished > self.max_finished or self._finished_bytes > self.max_retained:
+            for job_id, old in list(self._jobs.items()):
+                if self._finished <= self.max_finished and self._finished_bytes <= self.max_retained:
+                    break
+                if old.status in FINISHED_STATES:
+                    del self._jobs[job_id]
+                    self._finished -= 1
+                    self._finished_bytes -= old.output_bytes()
+
+    def _collect(self, job, stream, pipe):
+        for chunk in iter(lambda: pipe.read1(65536), b''):
+            with self._lock:
+                buffer = job.output[stream]
+                room = self.max_output - len(buffer)
+                if room < len(chunk):
+                    job.truncated[stream] = True
+                buffer.extend(chunk[:max(room, 0)])
+        pipe.close()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status != 'queued':
+                    continue
+                job.status = 'running'
+                job.started_at = time.time()
+            try:
+                process = subprocess.Popen(
+                    job.command, shell=True, stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    start_new_session=(os.name == 'posix')
+                )
+            except OSError as e:
+                with self._lock:
+                    job.error = str(e)
+                    self._finish(job, 'failed')
+                continue
+            with self._lock:
+                job.process = process
+                cancelled = job.cancel_requested
+            if cancelled:
+                self._signal(process, signal.SIGTERM)
+            readers = [threading.Thread(target=self._collect, args=(job, stream, pipe), daemon=True)
+                       for stream, pipe in (('stdout', process.stdout), ('stderr', process.stderr))]
+            for reader in readers:
+                reader.start()
+            exit_code = process.wait()
+            for reader in readers:
+                reader.join()
+            with self._lock:
+                job.exit_code = exit_code
+                if job.cancel_requested:
+                    status = 'cancelled'
+                else:
+                    status = 'succeeded' if exit_code == 0 else 'failed'
+                self._finish(job, status)
+
+
+def collect_telemetry(tasks):
+    """Gather the heartbeat payload; cheap enough to run every few seconds."""
+    counts = tasks.counts()
+    telemetry = {
+        'queued': counts['queued'],
+        'running': counts['running'],
+        'current_task': tasks.current(),
+        'disk_free': shutil.disk_usage(os.path.abspath(os.sep)).free,
+    }
+    if hasattr(os, 'getloadavg'):
+        telemetry['cpu_load'] = round(os.getloadavg()[0], 2)
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        memory = psutil.virtual_memory()
+        telemetry['memory_percent'] = memory.percent
+        telemetry['memory_available'] = memory.available
+        if 'cpu_load' not in telemetry:
+            telemetry['cpu_load'] = psutil.cpu_percent()
+    return telemetry
+
+
+class Heartbeat:
+    """Periodically push telemetry to the master, registering when needed."""
+
+    def __init__(self, master_url, registration, tasks, interval=HEARTBEAT_INTERVAL):
+        self.master_url = master_url.rstrip('/')
+        self.registration = registration
+        self.tasks = tasks
+        self.interval = interval
+        self.registered = False
+
+    def send(self):
+        telemetry = collect_telemetry(self.tasks)
+        if self.registered:
+            response = http_post(f"{self.master_url}/heartbeat",
+                                 json=dict(telemetry, worker_id=self.registration['worker_id']), timeout=5)
+            if response.status_code != 404:
+                response.raise_for_status()
+                return
+        # First beat, or the master restarted and lost its registry.
+        response = http_post(f"{self.master_url}/register_worker", json=dict(telemetry, **self.registration), timeout=5)
+        response.raise_for_status()
+        self.registered = True
+
+    def _loop(self):
+        while True:
+            try:
+                self.send()
+            except Exception:
+                self.registered = False
+            time.sleep(self.interval)
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+
+
+def create_worker_app(tasks=None):
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+    tasks = tasks or TaskQueue()
+    app.config['TASKS'] = tasks
+
+    def job_or_404(job_id):
+        job = tasks.get(job_id)
+        if job is None:
+            return None, (jsonify({"error": f"Job {job_id} not found"}), 404)
+        return job, None
+
+    @app.route('/execute_task', methods=['POST'])
+    def execute_task():
+        command = (request.get_json(silent=True) or {}).get('command')
+        if not command or not isinstance(command, str):
+            return jsonify({"error": "command must be a non-empty string"}), 400
+        job = tasks.submit(command)
+        return jsonify({"status": job.status, "job_id": job.id, "command": command}), 202
+
+    @app.route('/execute_tasks', methods=['POST'])
+    def execute_tasks():
+        commands = (request.get_json(silent=True) or {}).get('commands', [])
+        if not isinstance(commands, list) or not all(command and isinstance(command, str) for command in commands):
+            return jsonify({"error": "commands must be a list of non-empty strings"}), 400
+        return jsonify({"job_ids": [tasks.submit(command).id for command in commands]}), 202
+
+    @app.route('/tasks', methods=['GET'])
+    def list_tasks():
+        limit = request.args.get('limit', type=int)
+        jobs = tasks.jobs(request.args.get('status'))
+        if limit is not None:
+            jobs = list(itertools.islice(reversed(jobs), limit))
+        return jsonify({"tasks": [job.summary() for job in jobs], "counts": tasks.counts()})
+
+    @app.route('/tasks/<job_id>', methods=['GET'])
+    def task_status(job_id):
+        job, error = job_or_404(job_id)
+        return error or jsonify(job.summary())
+
+    @app.route('/tasks/<job_id>/output', methods=['GET'])
+    def task_output(job_id):
+        job, error = job_or_404(job_id)
+        if error:
+            return error
+        body = {"status": job.status, "exit_code": job.exit_code}
+        for stream in ('stdout', 'stderr'):
+            data, offset = tasks.read_output(job, stream, request.args.get(f'{stream}_offset', 0, type=int))
+            body[stream] = data.decode('utf-8', errors='replace')
+            body[f'{stream}_offset'] = offset
+            body[f'{stream}_truncated'] = job.truncated[stream]
+        return jsonify(body)
+
+    @app.route('/tasks/<job_id>/cancel', methods=['POST'])
+    def cancel_task(job_id):
+        job, error = job_or_404(job_id)
+        if error:
+            return error
+        tasks.cancel(job_id)
+        return jsonify(job.summary())
+
+    return app